@@ -11,7 +11,7 @@ from sqlalchemy.orm import Session
 from app.database import get_db
 from app.schemas.schemas import Token, UserCreate
 from app.crud import user as user_crud
-from app.core.security import create_access_token
+from app.core.security import create_access_token, user_claims
 from app.core.settings import settings  # settings dan foydalanamiz
 
 
@@ -21,9 +21,10 @@ router = APIRouter()
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl=f"{settings.API_V1_STR}/token")
 
-async def generate_access_token(telegram_id: str) -> dict:
-    """JWT token yaratish"""
-    access_token = create_access_token(subject=telegram_id)
+async def generate_access_token(telegram_id: str, user: Any = None) -> dict:
+    """JWT token yaratish (user berilsa, uning claimlari tokenga yoziladi)"""
+    claims = user_claims(user) if user is not None else None
+    access_token = create_access_token(subject=telegram_id, claims=claims)
     return {"access_token": access_token, "token_type": "bearer"}
 
 
@@ -4,11 +4,11 @@ from fastapi import APIRouter, Depends, HTTPException, status, Query, Path
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.database import get_db as get_async_db  # Asinxron DB session
-from app.schemas.schemas import Feedback, FeedbackCreate, FeedbackUpdate, Feedbackss
+from app.schemas.schemas import Feedback, FeedbackCreate, FeedbackUpdate, Feedbackss, TokenClaims
 from app.crud import feedback as feedback_crud
 from app.crud import worker as worker_crud
 from app.crud import user as user_crud
-from app.core.security import get_current_active_user
+from app.core.security import get_current_claims
 from app.models import models
 
 router = APIRouter()
@@ -19,7 +19,7 @@ async def create_feedback(
     text: str = Query(..., min_length=1, max_length=500),  # Fikr matni 1 dan 500 ta belgigacha
     rate: int = Query(..., ge=1, le=5),  # Rate 1 dan 5 gacha
     db: AsyncSession = Depends(get_async_db),
-    current_user: models.User = Depends(get_current_active_user),
+    current_user: TokenClaims = Depends(get_current_claims),
 ) -> Any:
     user_id = current_user.id  # Hozirgi autentifikatsiyalangan foydalanuvchining ID si
 
@@ -54,7 +54,7 @@ async def create_feedback(
 async def delete_feedback(
     feedback_id: int = Path(..., description="O'chiriladigan feedback ID si"),
     db: AsyncSession = Depends(get_async_db),
-    current_user: models.User = Depends(get_current_active_user),
+    current_user: TokenClaims = Depends(get_current_claims),
 ) -> dict:
     feedback = await feedback_crud.get_feedback(db, feedback_id=feedback_id)
     if feedback is None:
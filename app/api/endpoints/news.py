@@ -1,20 +1,100 @@
-from fastapi import FastAPI, Depends, HTTPException, APIRouter
+import json
+from fastapi import FastAPI, Depends, HTTPException, APIRouter, Request, Query, status
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
-from app.database import get_db as get_async_db
-from typing import List
-from app.schemas.schemas import NewsOut
+from app.database import get_db as get_async_db, AsyncSessionLocal
+from typing import List, Optional
+from app.schemas.schemas import NewsOut, TokenClaims
 from app.models import models
 from app.crud.news import get_all_news, get_news_by_id, mark_news_as_read_once, get_unread_news_count
-from app.core.security import get_current_active_user
+from app.crud import user as user_crud
+from app.core.events import news_hub, UNREAD_CHANGED
+from app.core.replica import get_read_db
+from app.core.security import get_current_claims, verify_token
+from app.core.settings import settings
 
 router = APIRouter()
 
 @router.get("/", response_model=List[NewsOut])
-async def api_get_all_news(db: AsyncSession = Depends(get_async_db)):
+async def api_get_all_news(db: AsyncSession = Depends(get_read_db)):
     return await get_all_news(db)
 
+
+def _sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+async def _news_event_stream(user_id: int, unread_count: int):
+    subscription = news_hub.subscribe(user_id)
+    try:
+        yield _sse("unread_count", {"unread_news_count": unread_count})
+        # Mijoz uzilganda StreamingResponse generatorni bekor qiladi
+        while True:
+            if not await subscription.wait(settings.NEWS_STREAM_HEARTBEAT):
+                # Proxy ulanishni yopmasligi uchun
+                yield ": ping\n\n"
+                continue
+
+            news_items, delta, recount = subscription.drain()
+            for news in news_items:
+                yield _sse("news_published", news)
+
+            if recount:
+                # Sessiya faqat hisoblash vaqtida ochiladi, ulanish pulda ushlanmaydi
+                async with AsyncSessionLocal() as db:
+                    unread_count = await get_unread_news_count(db, user_id)
+            elif delta:
+                unread_count += delta
+            else:
+                continue
+            yield _sse("unread_count", {"unread_news_count": unread_count})
+    finally:
+        news_hub.unsubscribe(subscription)
+
+
+@router.get("/stream")
+async def api_news_stream(
+        request: Request,
+        token: Optional[str] = Query(None, description="EventSource header yubora olmagani uchun"),
+):
+    """
+    Yangiliklar uchun Server-Sent Events oqimi
+
+    `news_published` va `unread_count` hodisalarini yuboradi,
+    `/unread/count` ni so'rab turish o'rniga ishlatiladi.
+    """
+    authorization = request.headers.get("Authorization")
+    if authorization and authorization.lower().startswith("bearer "):
+        token = authorization[7:]
+
+    telegram_id = verify_token(token) if token else None
+    if telegram_id is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+
+    # get_db dependency ishlatilmaydi: u oqim tugaguncha ulanishni ushlab turadi
+    async with AsyncSessionLocal() as db:
+        user = await user_crud.get_user_by_telegram_id(db, telegram_id=telegram_id)
+        if user is None:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Could not validate credentials",
+                headers={"WWW-Authenticate": "Bearer"},
+            )
+        unread_count = await get_unread_news_count(db, user.id)
+
+    return StreamingResponse(
+        _news_event_stream(user.id, unread_count),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 @router.get("/{news_id}", response_model=NewsOut)
-async def api_get_news(news_id: int, db: AsyncSession = Depends(get_async_db)):
+async def api_get_news(news_id: int, db: AsyncSession = Depends(get_read_db)):
 
     news = await get_news_by_id(db, news_id)
 
@@ -25,7 +105,7 @@ async def api_get_news(news_id: int, db: AsyncSession = Depends(get_async_db)):
 @router.post("/{news_id}/read", response_model=NewsOut)
 async def api_mark_news_as_read(
         news_id: int,
-        current_user: models.User = Depends(get_current_active_user),
+        current_user: TokenClaims = Depends(get_current_claims),
         db: AsyncSession = Depends(get_async_db),
 ):
     user_id = current_user.id
@@ -33,13 +113,17 @@ async def api_mark_news_as_read(
     news = await mark_news_as_read_once(db, news_id, user_id)
     if not news:
         raise HTTPException(status_code=404, detail="News not found")
+
+    # Foydalanuvchining ochiq oqimlariga o'qilmaganlar soni o'zgarganini bildirish
+    await news_hub.notify(db, {"type": UNREAD_CHANGED, "user_id": user_id})
+    await db.commit()
     return news
 
 @router.get("/unread/count")
 async def api_get_unread_news_count(
-    db: AsyncSession = Depends(get_async_db),
-    current_user: models.User = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_read_db),
+    current_user: TokenClaims = Depends(get_current_claims),
 ):
     user_id = current_user.id
     count = await get_unread_news_count(db, user_id)
-    return {"unread_news_count": count}
\ No newline at end of file
+    return {"unread_news_count": count}
@@ -1,5 +1,5 @@
 from typing import Any, List, Optional, Union
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, Request, status, Query
 from sqlalchemy import select
 
 from app.api.endpoints.auth import generate_access_token
@@ -7,11 +7,13 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from app.models import models
 from app.database import get_db as get_async_db  # Asinxron DB session
 from app.schemas import schemas
-from app.schemas.schemas import Token, User, UserCreate, UserOut, UserUpdate, UserWithFeedbacks, WorkerOut
+from app.schemas.schemas import (
+    Token, TokenClaims, User, UserBatchRequest, UserCreate, UserOut, UserUpdate, UserWithFeedbacks, WorkerOut,
+)
+from app.core.settings import settings
 from app.crud import user as user_crud
 from app.crud import feedback as feedback_crud
-from app.crud import worker as worker_crud
-from app.core.security import get_current_active_user
+from app.core.security import get_current_claims, get_user_record
 import random
 import string
 
@@ -20,17 +22,16 @@ router = APIRouter()
 
 @router.post("/user_check")
 async def check_user(
+        request: Request,
         telegram_id: str,
         db: AsyncSession = Depends(get_async_db),
 ) -> Any:
-    # user_crud.get_user_by_telegram_id ni asinxron deb taxmin qilamiz
-    user = await user_crud.get_user_by_telegram_id(db, telegram_id = telegram_id)
+    # Foydalanuvchi cache orqali olinadi (ko'pincha bazaga murojaatsiz)
+    user = await get_user_record(db, telegram_id, request=request)
     if not user:
         return {"registered": False}
 
-    # generate_access_token ni asinxron deb qoldiramiz, agar u sinxron bo'lsa keyinroq optimallashtiriladi
-    token = await generate_access_token(telegram_id) if hasattr(generate_access_token,
-                                                                '__call__') else generate_access_token(telegram_id)
+    token = await generate_access_token(telegram_id, user)
     return {
         "registered": True,
         "is_worker": user.is_worker,
@@ -47,19 +48,11 @@ async def register_user(
         is_worker: bool = False,
         db: AsyncSession = Depends(get_async_db),
 ) -> Any:
-    user = await user_crud.get_user_by_telegram_id(db, telegram_id = telegram_id)
-    if not user:
-        db_user = models.User(
-            telegram_id = telegram_id,
-            name = name,
-            is_worker = is_worker,
-        )
-        db.add(db_user)
-        await db.commit()
-        await db.refresh(db_user)
+    # Bitta so'rov: INSERT ... ON CONFLICT DO NOTHING + mavjud user/worker tekshiruvi
+    user = await user_crud.get_or_create_user(db, telegram_id=telegram_id, name=name, is_worker=is_worker)
+    token = await generate_access_token(telegram_id, user)
 
-        token = await generate_access_token(telegram_id) if hasattr(generate_access_token,
-                                                                    '__call__') else generate_access_token(telegram_id)
+    if user.created:
         return {
             "access_token": token,
             "is_worker": is_worker,
@@ -68,73 +61,86 @@ async def register_user(
             "registered": False,
         }
 
-    else:
-        worker = await worker_crud.get_worker_by_telegram_id(db, telegram_id = telegram_id)
-        if not worker:
-            token = await generate_access_token(telegram_id) if hasattr(generate_access_token,
-                                                                        '__call__') else generate_access_token(
-                telegram_id)
-            return {
-                "access_token": token,
-                "is_worker": False,
-                "name": name,
-                "telegram_id": telegram_id,
-                "registered": False,
-            }
-        else:
-            token = await generate_access_token(telegram_id) if hasattr(generate_access_token,
-                                                                        '__call__') else generate_access_token(
-                telegram_id)
-            return {
-                "access_token": token,
-                "is_worker": True,
-                "name": name,
-                "telegram_id": telegram_id,
-                "registered": True,
-            }
+    return {
+        "access_token": token,
+        "is_worker": user.has_worker,
+        "name": name,
+        "telegram_id": telegram_id,
+        "registered": user.has_worker,
+    }
 
 
 @router.get("/me", response_model=Union[UserOut, WorkerOut])
 async def get_user_profile(
     db: AsyncSession = Depends(get_async_db),
-    current_user: models.User = Depends(get_current_active_user),
+    current_user: TokenClaims = Depends(get_current_claims),
 ):
-    # Avvalo, foydalanuvchini bazadan olish
-    user = await user_crud.get_user_by_telegram_id(
-        db, telegram_id=current_user.telegram_id
-    )
-    if not user:
+    # User va worker bitta LEFT JOIN so'rovi bilan (profil cache dan) olinadi
+    profile = await user_crud.get_profile(db, telegram_id=current_user.telegram_id)
+    if not profile:
         raise HTTPException(
             status_code=404,
             detail="User not found"
         )
 
     # Agar worker emas bo‘lsa, oddiy foydalanuvchi ma’lumotlarini qaytaramiz
-    if not user.is_worker:
-        return UserOut.from_orm(user)
+    user = profile["user"]
+    if not user["is_worker"]:
+        return UserOut(**user)
 
-    # Aks holda — workerni olish
-    worker = await worker_crud.get_worker_by_telegram_id(
-        db, telegram_id=current_user.telegram_id
-    )
+    # Aks holda — worker ma'lumotlari
+    worker = profile["worker"]
     if not worker:
         raise HTTPException(
             status_code=404,
             detail="Worker not found"
         )
 
-    # Faqat topilgandan keyin image ni o‘zgartirish
-    if worker.image:
-        worker.image = f"https://admin.ishbozor.uz/{worker.image}"
-    else:
-        # image yo'q bo'lsa, None qilib qoldirish ham mumkin
-        worker.image = None
+    # Cache dagi yozuv o'zgartirilmaydi, image alohida beriladi
+    image = f"https://admin.ishbozor.uz/{worker['image']}" if worker["image"] else None
 
     # Va tayyor worker javobi
-    return WorkerOut.from_orm(worker)
+    return WorkerOut(**{**worker, "image": image})
+
 
 
 
+@router.post("/batch")
+async def get_users_batch(
+    batch: UserBatchRequest,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: TokenClaims = Depends(get_current_claims),
+):
+    """
+    Bir nechta foydalanuvchini telegram_id bo'yicha bitta so'rov bilan olish
+
+    Natija kiritilgan tartibda, topilmagan telegram_id lar `missing` da qaytariladi
+    """
+    if len(batch.telegram_ids) > settings.BATCH_MAX_IDS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Bir so'rovda ko'pi bilan {settings.BATCH_MAX_IDS} ta ID yuborish mumkin"
+        )
+
+    rows = await user_crud.get_users_by_telegram_ids(db, list(set(batch.telegram_ids)))
+    users_by_telegram_id = {row.telegram_id: row for row in rows}
+
+    items = []
+    missing = []
+    for telegram_id in batch.telegram_ids:
+        user = users_by_telegram_id.get(telegram_id)
+        if user is None:
+            missing.append(telegram_id)
+            continue
+        items.append({
+            "id": user.id,
+            "telegram_id": user.telegram_id,
+            "name": user.name,
+            "is_worker": user.is_worker,
+        })
+
+    return {"items": items, "missing": missing}
+
 
 # def generate_random_telegram_id(length=10):
 #
@@ -3,151 +3,290 @@ Utilities API endpointlari
 
 Turli yordamchi API endpointlari
 """
-from typing import Any, List, Dict
+from typing import Any, List, Dict, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, status, Query, UploadFile, File
-from fastapi.responses import FileResponse
+from fastapi import APIRouter, Depends, HTTPException, Request, status, Query
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.future import select
-import io
-import csv
-import json
+import asyncio
+from datetime import date, datetime, time, timedelta
+import logging
 import os
-from pathlib import Path
-import openpyxl
-from io import BytesIO
-from fastapi import Response, HTTPException
-from app.database import get_db as get_async_db 
-from app.core.security import get_current_active_user
+import secrets
+import tempfile
+from app.database import AsyncSessionLocal, get_db as get_async_db, pool_metrics, read_pool_metrics
+from app.api.endpoints.workers import worker_filter_params
+from app.core.jobs import job_queue
+from app.core.media import accepted_encodings, media_sweeper
+from app.core.security import get_current_active_user, get_current_admin_claims, get_current_claims
+from app.core.slowlog import slow_query_log
+from app.core.replica import get_read_db, replica_router
+from app.core.rollups import ROLLUP_METRICS, hourly_start
+from app.core.stats import system_stats
 from app.core.settings import settings
-from app.models.models import User
+from app.schemas.schemas import ExportJobStatus, TokenClaims, UserOut
 from app.models import models
+from app.crud import export as export_crud
+from app.crud import stats as stats_crud
 from app.crud import worker as worker_crud
-from app.crud import feedback as feedback_crud
-from app.crud import user as user_crud
+from app.utils.exports import (
+    EXPORT_BATCH_SIZE, EXPORT_FORMATS, WORKER_EXPORT_FIELDS, WORKER_EXPORT_HEADERS, XlsxExportWriter,
+    export_fingerprint, export_params, get_export_pool, iter_worker_export, run_worker_export, worker_export_row,
+)
+from app.utils.helpers import iter_file
 
 router = APIRouter()
+logger = logging.getLogger("app.exports")
 
 
 
 
 @router.get("/stats/system")
 async def get_system_stats(
-        db: AsyncSession = Depends(get_async_db),
-        current_user: User = Depends(get_current_active_user),
+        current_user: UserOut = Depends(get_current_active_user),
+) -> Any:
+    """
+    Tizim statistikasi
+
+    Fonda davriy hisoblanadigan snapshotdan beriladi; `generated_at` -
+    snapshot hisoblangan vaqt (UTC).
+    """
+    try:
+        return await system_stats.get()
+    except Exception as e:
+        logger.error(f"Stats error: {str(e)}")
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Statistika hali tayyor emas")
+
+
+@router.get("/stats/db-pool")
+async def get_db_pool_stats(
+        current_user: UserOut = Depends(get_current_active_user),
+) -> Any:
+    """Shu jarayondagi DB ulanishlar pullari holati va hisoblagichlari, replika lagi"""
+    return {
+        "primary": pool_metrics.snapshot(),
+        "replica": read_pool_metrics.snapshot() if read_pool_metrics is not None else None,
+        "replica_lag": replica_router.lag,
+        "replica_in_use": replica_router.available,
+    }
+
+
+@router.get("/db/slow-queries")
+async def get_slow_queries(
+        admin: TokenClaims = Depends(get_current_admin_claims),
 ) -> Any:
+    """Shu jarayondagi oxirgi sekin SQL so'rovlar va ularning EXPLAIN rejalari (eng yangisi birinchi)"""
+    return {
+        "threshold": slow_query_log.threshold,
+        "entries": slow_query_log.snapshot(),
+    }
 
-    # Foydalanuvchilar soni
-    users_count = await user_crud.get_user_count(db)
-    active_users_count = await user_crud.get_active_user_count(db)
 
-    # Ishchilar statistikasi
-    worker_stats = await worker_crud.get_worker_statistics(db)
+@router.get("/stats/series")
+async def get_stats_series(
+        metric: str = Query(..., pattern=f"^({'|'.join(ROLLUP_METRICS)})$"),
+        start: Optional[date] = Query(None, description="Bo'sh bo'lsa oxirgi 30 kun"),
+        end: Optional[date] = Query(None, description="Bo'sh bo'lsa bugun"),
+        interval: str = Query("day", pattern="^(day|hour)$"),
+        db: AsyncSession = Depends(get_read_db),
+        current_user: UserOut = Depends(get_current_active_user),
+) -> Any:
+    """
+    Rollup jadvallaridan vaqt qatori (yaratilgan qatorlar soni)
 
-    # Fikrlar statistikasi
-    feedback_stats = await feedback_crud.get_feedback_statistics(db)
+    interval=hour faqat oxirgi STATS_HOURLY_DAYS kun uchun. Bo'sh kun/soatlar
+    0 bilan to'ldiriladi; `updated_at` - rollup oxirgi marta yangilangan vaqt.
+    """
+    end = end or date.today()
+    start = start or end - timedelta(days=29)
+    if start > end:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="start end dan katta bo'lmasligi kerak")
+    if (end - start).days >= settings.STATS_SERIES_MAX_DAYS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Ko'pi bilan {settings.STATS_SERIES_MAX_DAYS} kunlik davr so'rash mumkin",
+        )
 
-    # Ko'nikmalar va tillar
-    top_skills = []
-    top_languages = []
+    if interval == "day":
+        counts = dict(await stats_crud.get_daily_series(db, metric, start, end))
+        points = [
+            {"t": day.isoformat(), "count": counts.get(day, 0)}
+            for day in (start + timedelta(days=offset) for offset in range((end - start).days + 1))
+        ]
+    else:
+        range_start = max(datetime.combine(start, time.min), hourly_start(settings.STATS_HOURLY_DAYS))
+        range_end = datetime.combine(end + timedelta(days=1), time.min)
+        counts = dict(await stats_crud.get_hourly_series(db, metric, range_start, range_end))
+        hours = int((range_end - range_start).total_seconds() // 3600) if range_end > range_start else 0
+        points = [
+            {"t": hour.isoformat(), "count": counts.get(hour, 0)}
+            for hour in (range_start + timedelta(hours=offset) for offset in range(hours))
+        ]
 
     return {
-        "total_users": users_count,
-        "active_users": active_users_count,
-        "total_workers": worker_stats["total_workers"],
-        "active_workers": worker_stats["active_workers"],
-        "total_feedbacks": feedback_stats["total_feedbacks"],
-        "active_feedbacks": feedback_stats["active_feedbacks"],
-        "average_rating": feedback_stats["average_rating"],
-        "rating_distribution": feedback_stats["rating_distribution"],
-        "payment_distribution": worker_stats["payment_distribution"],
-        "gender_distribution": worker_stats["gender_distribution"],
-        "disability_distribution": worker_stats.get("disability_distribution", {}),  # Yangi maydon
-        "top_skills": top_skills,
-        "top_languages": top_languages,
+        "metric": metric,
+        "interval": interval,
+        "points": points,
+        "updated_at": await stats_crud.get_watermark_time(db, metric),
     }
 
 
 @router.get("/export/workers")
 async def export_workers_excel(
-        db: AsyncSession = Depends(get_async_db)
-) -> Response:
+        request: Request,
+        format: str = Query("xlsx", pattern="^(xlsx|csv|ndjson)$"),
+        is_active: Optional[bool] = Query(None, description="Bo'sh bo'lsa barcha ishchilar"),
+        filters: Dict[str, Any] = Depends(worker_filter_params),
+        db: AsyncSession = Depends(get_read_db)
+) -> StreamingResponse:
     """
-    Ishchilar ro'yxatini Excel formatida eksport qilish (ommaviy endpoint)
+    Ishchilar ro'yxatini eksport qilish (ommaviy endpoint)
+
+    /workers/filter/ dagi filter parametrlari qabul qilinadi. format:
+    - **xlsx**: qatorlar server-side cursor dan partiyalab o'qiladi va openpyxl
+      write-only rejimida threadda vaqtinchalik faylga yoziladi
+    - **csv** / **ndjson**: qatorlar cursor dan to'g'ridan-to'g'ri javobga oqadi,
+      mijoz qabul qilsa gzip bilan siqiladi
+
+    Event loop bloklanmaydi va xotira ishchilar soniga bog'liq emas.
     """
     try:
-        # Barcha ishchilarni olish
-        stmt = select(models.Worker)
-        result = await db.execute(stmt)
-        workers = result.scalars().all()
-
-        # Excel faylini xotiraga yaratish (disk o'rniga)
-        output = BytesIO()
-        workbook = openpyxl.Workbook()
-        worksheet = workbook.active
-        worksheet.title = "Ishchilar"
-
-        # Ustun nomlari
-        headers = [
-            "ID", "Telegram ID", "Ism", "Haqida", "Yosh", "Telefon", "Jinsi",
-            "To'lov turi", "Kunlik to'lov", "Tillar", "Ko'nikmalar",
-            "Manzil", "Nogironlik darajasi", "Rasm", "Yaratilgan sana", "Yangilangan sana", "Faol"
-        ]
+        criteria = worker_crud.build_worker_filters(**filters, is_active=is_active)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
 
-        # Ustun nomlarini yozish
-        for col_num, header in enumerate(headers, 1):
-            cell = worksheet.cell(row=1, column=col_num)
-            cell.value = header
-            cell.font = openpyxl.styles.Font(bold=True)
-            # Ustun kengligini o'rnatish
-            worksheet.column_dimensions[openpyxl.utils.get_column_letter(col_num)].width = 15
-
-        # Ma'lumotlarni yozish
-        for row_num, worker in enumerate(workers, 2):
-            try:
-                worksheet.cell(row=row_num, column=1).value = worker.id
-                worksheet.cell(row=row_num, column=2).value = worker.telegram_id
-                worksheet.cell(row=row_num, column=3).value = worker.name
-                worksheet.cell(row=row_num, column=4).value = worker.about
-                worksheet.cell(row=row_num, column=5).value = worker.age
-                worksheet.cell(row=row_num, column=6).value = worker.phone
-                worksheet.cell(row=row_num, column=7).value = worker.gender
-                worksheet.cell(row=row_num, column=8).value = worker.payment_type
-                worksheet.cell(row=row_num, column=9).value = worker.daily_payment
-                worksheet.cell(row=row_num, column=10).value = worker.languages
-                worksheet.cell(row=row_num, column=11).value = worker.skills
-                worksheet.cell(row=row_num, column=12).value = worker.location
-                worksheet.cell(row=row_num, column=13).value = worker.disability_degree  # Yangi maydon
-                worksheet.cell(row=row_num, column=14).value = worker.image
-                worksheet.cell(row=row_num, column=15).value = worker.created_at.isoformat() if worker.created_at else ""
-                worksheet.cell(row=row_num, column=16).value = worker.updated_at.isoformat() if worker.updated_at else ""
-                worksheet.cell(row=row_num, column=17).value = "Ha" if worker.is_active else "Yo'q"
-            except Exception as e:
-                # Qatorlardagi alohida xatolar butun jarayonni to'xtatmasligi kerak
-                continue
-
-        # Faylni BytesIO obyektiga saqlash
-        workbook.save(output)
-        output.seek(0)  # Pozitsiyasini boshiga qaytarish
-
-        # Response qaytarish
-        headers = {
-            'Content-Disposition': 'attachment; filename="workers_export.xlsx"',
-            'Content-Type': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
-        }
-        return Response(content=output.getvalue(), headers=headers)
+    media_type, extension = EXPORT_FORMATS[format]
+    headers = {'Content-Disposition': f'attachment; filename="workers_export.{extension}"'}
 
+    if format != "xlsx":
+        compress = "gzip" in accepted_encodings(request.headers.get("accept-encoding", ""))
+        headers["Vary"] = "Accept-Encoding"
+        if compress:
+            headers["Content-Encoding"] = "gzip"
+        return StreamingResponse(
+            iter_worker_export(format, criteria, compress, replica_router.session_factory(request)),
+            headers=headers, media_type=media_type
+        )
+
+    fd, file_path = tempfile.mkstemp(suffix=".xlsx")
+    os.close(fd)
+    try:
+        writer = await asyncio.to_thread(XlsxExportWriter, "Ishchilar", WORKER_EXPORT_HEADERS)
+        async for rows in worker_crud.stream_worker_rows(db, WORKER_EXPORT_FIELDS, EXPORT_BATCH_SIZE, *criteria):
+            await asyncio.to_thread(writer.append_rows, map(worker_export_row, rows))
+        await asyncio.to_thread(writer.save, file_path)
     except Exception as e:
+        os.remove(file_path)
         # Xatoni log qilish
-        import logging
         logging.error(f"Export workers error: {str(e)}")
 
         # Xato haqida xabar qaytarish
         raise HTTPException(status_code=500, detail=f"Export yaratishda xatolik: {str(e)}")
 
+    headers['Content-Length'] = str(os.path.getsize(file_path))
+    return StreamingResponse(iter_file(file_path, remove=True), headers=headers, media_type=media_type)
+
+
+def _export_status(export: models.ExportJob) -> ExportJobStatus:
+    progress = None
+    if export.status == "done":
+        progress = 100.0
+    elif export.total:
+        progress = round(min(export.rows / export.total, 1.0) * 100, 1)
+    elif export.total == 0:
+        progress = 0.0
+    return ExportJobStatus(
+        id=export.id,
+        format=export.format,
+        status=export.status,
+        rows=export.rows or 0,
+        total=export.total,
+        progress=progress,
+        download_url=export.file_path if export.status == "done" else None,
+        error=export.error,
+        created_at=export.created_at,
+        finished_at=export.finished_at,
+    )
+
+
+@job_queue.handler("worker_export")
+async def process_worker_export(payload: Dict[str, Any]) -> None:
+    """Eksport faylini jarayonlar pulida yozish va natijani api_export_job ga saqlash"""
+    await media_sweeper.purge_exports()
+    async with AsyncSessionLocal() as db:
+        export = await export_crud.start_export(db, payload["export_id"], settings.EXPORT_STALE_AFTER)
+    if export is None:
+        # Tugagan yoki boshqa jarayon bajaryapti
+        return
+
+    _, extension = EXPORT_FORMATS[export.format]
+    filename = f"workers_{export.id}_{secrets.token_urlsafe(16)}.{extension}"
+    loop = asyncio.get_running_loop()
+    try:
+        rows = await loop.run_in_executor(
+            get_export_pool(), run_worker_export, export.id, export.format, export.params,
+            str(settings.EXPORT_DIR / filename),
+        )
+    except Exception as e:
+        logger.error(f"Export {export.id} xatolik bilan tugadi: {str(e)}")
+        async with AsyncSessionLocal() as db:
+            await export_crud.fail_export(db, export.id, str(e))
+        return
+
+    async with AsyncSessionLocal() as db:
+        await export_crud.finish_export(db, export.id, f"{settings.MEDIA_URL}exports/{filename}", rows)
+
+
+@router.post("/exports", response_model=ExportJobStatus, status_code=status.HTTP_202_ACCEPTED)
+async def create_export(
+        format: str = Query("xlsx", pattern="^(xlsx|csv|ndjson)$"),
+        is_active: Optional[bool] = Query(None, description="Bo'sh bo'lsa barcha ishchilar"),
+        filters: Dict[str, Any] = Depends(worker_filter_params),
+        db: AsyncSession = Depends(get_async_db),
+        claims: TokenClaims = Depends(get_current_claims),
+) -> Any:
+    """
+    Ishchilar eksportini fon rejimida boshlash
+
+    Parametrlar /export/workers bilan bir xil. Fayl alohida jarayonda media
+    papkasiga yoziladi; holat va yuklab olish URL i GET /exports/{id} da.
+    Foydalanuvchining xuddi shu format va filtrli eksporti bajarilayotgan (yoki
+    yaqinda tugagan) bo'lsa, yangisi yaratilmaydi - o'sha eksport qaytariladi.
+    """
+    params = export_params(filters, is_active)
+    try:
+        worker_crud.build_worker_filters(**params)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    export, created = await export_crud.get_or_create_export(
+        db,
+        fingerprint=export_fingerprint(format, params, claims.id),
+        export_format=format,
+        params=params,
+        user_id=claims.id,
+        reuse_window=settings.EXPORT_REUSE_WINDOW,
+    )
+    if created:
+        await job_queue.enqueue("worker_export", {"export_id": export.id})
+    return _export_status(export)
+
+
+@router.get("/exports/{export_id}", response_model=ExportJobStatus)
+async def get_export_status(
+        export_id: int,
+        db: AsyncSession = Depends(get_async_db),
+        claims: TokenClaims = Depends(get_current_claims),
+) -> Any:
+    """Eksport holati, progress va tayyor bo'lsa yuklab olish URL i (faqat eksport egasiga)"""
+    export = await export_crud.get_export(db, export_id, claims.id)
+    if export is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Eksport topilmadi")
+    return _export_status(export)
+
 
 @router.get("/skills", response_model=List[str])
-async def get_all_skills(db: AsyncSession = Depends(get_async_db)):
+async def get_all_skills(db: AsyncSession = Depends(get_read_db)):
     return await worker_crud.get_all_skill_names(db)
 
 # @router.get("/disability_degrees", response_model=List[str])
@@ -1,29 +1,153 @@
-from typing import Any, List, Optional, Dict
+from typing import Any, List, Optional, Dict, Tuple
 from fastapi import (
     APIRouter, Depends, HTTPException, Request, status, Query,
     Form, UploadFile, File, Path, Body,
 )
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from sqlalchemy import and_, or_
+from sqlalchemy import and_
 from sqlalchemy.orm import selectinload
-import aiofiles  # Asinxron fayl operatsiyalari uchun
+from sqlalchemy.exc import IntegrityError
+import asyncio
+import logging
 import os
+import tempfile
+import uuid
 from pathlib import Path as FilePath
 from ...core.security import get_current_user
-from app.database import get_db as get_async_db  # Sizning get_db funksiyangiz
+from app.database import AsyncSessionLocal, get_db as get_async_db  # Sizning get_db funksiyangiz
 from app.schemas.schemas import (
     Worker, WorkerCreate, WorkerUpdate, WorkerWithFeedbacks,
-    WorkerLocation, Feedback, WorkerSearchParams, WorkerStats, WorkerDetail, WorkerSimpleSchema
+    WorkerLocation, Feedback, WorkerSearchParams, WorkerStats, WorkerDetail, WorkerSimpleSchema,
+    TokenClaims, UserOut, WorkerImportResult, WorkerChange, WorkerChangeFeed,
 )
 from app.crud import worker as worker_crud
 from app.crud import feedback as feedback_crud
 from app.crud import user as user_crud
-from app.core.security import get_current_active_user
+from app.core.security import get_current_active_user, get_current_admin_claims, get_current_claims
 from app.core.settings import settings
+from app.core.jobs import job_queue
+from app.core.replica import get_read_db
+from app.core.media import media_sweeper
 from app.models import models
+from app.utils.images import (
+    DEFAULT_VARIANT, InvalidImageError, content_image_location, create_image_variants, image_file_paths,
+    image_variant_url, sniff_image_type,
+)
+from app.utils.helpers import UploadTooLargeError, stream_upload_file
+from app.utils.worker_import import ImportFileError, import_workers_file
 ####
 router = APIRouter()
+logger = logging.getLogger("app.workers")
+
+
+def _reuse_image_variants(destination: str, basename: str) -> bool:
+    """
+    Shu kontentdagi rasm variantlari allaqachon bormi
+
+    Mavjud fayllarning mtime i yangilanadi, aks holda sweeper ularni
+    hali hech kim ishlatmayapti deb o'chirib yuborishi mumkin.
+    """
+    paths = image_file_paths(f"{destination}/{basename}_{DEFAULT_VARIANT}.jpg")
+    if not all(os.path.exists(path) for path in paths):
+        return False
+    for path in paths:
+        os.utime(path)
+    return True
+
+
+async def receive_worker_image(image: UploadFile) -> Tuple[str, str]:
+    """
+    Yuklangan rasmni spool papkasiga yozish va turini tekshirish
+
+    Qayta ishlash fon vazifasida bajariladi, shuning uchun fayl so'rovdan
+    keyin ham (jarayon qayta ishga tushsa ham) saqlanib qoladi.
+
+    Returns:
+        (spool dagi fayl yo'li, SHA-256 digest)
+    """
+    upload_path = FilePath(settings.UPLOAD_SPOOL_DIR) / f"{uuid.uuid4().hex}.upload"
+    os.makedirs(os.path.dirname(upload_path), exist_ok = True)
+
+    # Fayl bo'laklab yoziladi, xotirada to'liq saqlanmaydi
+    try:
+        header, digest = await stream_upload_file(image, str(upload_path), settings.MAX_UPLOAD_SIZE)
+    except UploadTooLargeError as e:
+        raise HTTPException(
+            status_code = status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail = str(e)
+        )
+
+    # Turi mijoz yuborgan content_type bo'yicha emas, fayl baytlari bo'yicha tekshiriladi
+    if sniff_image_type(header) not in settings.ALLOWED_IMAGE_TYPES:
+        os.remove(upload_path)
+        raise HTTPException(
+            status_code = status.HTTP_400_BAD_REQUEST,
+            detail = f"Rasm turi qabul qilinmaydi. Qabul qilinadigan turlar: {settings.ALLOWED_IMAGE_TYPES}"
+        )
+    return str(upload_path), digest
+
+
+async def store_worker_image(upload_path: str, digest: str) -> str:
+    """
+    Rasm variantlarini yaratish
+
+    Fayllar kontent xeshi bo'yicha nomlanadi: bir xil rasm qayta yuklansa
+    qayta ishlanmaydi va diskda bitta nusxa saqlanadi.
+
+    Returns:
+        Worker.image uchun yo'l (to'liq o'lchamdagi JPEG varianti)
+    """
+    subdir, basename = content_image_location(digest)
+    url_dir = f"{settings.MEDIA_URL}uploads/workers/{subdir}"
+    if not await asyncio.to_thread(_reuse_image_variants, url_dir, basename):
+        await create_image_variants(upload_path, str(FilePath(settings.WORKER_IMAGES_DIR) / subdir), basename)
+    return f"{url_dir}/{basename}_{DEFAULT_VARIANT}.jpg"
+
+
+def _discard_upload(upload_path: str) -> None:
+    if os.path.exists(upload_path):
+        os.remove(upload_path)
+
+
+@job_queue.handler("worker_image")
+async def process_worker_image(payload: Dict[str, Any]) -> None:
+    """Fon vazifasi: rasm variantlarini yaratib, ishchiga biriktirish"""
+    upload_path = payload["upload_path"]
+    if not os.path.exists(upload_path):
+        # Media sweeper eskirgan spool faylini o'chirgan: qayta urinish foyda bermaydi
+        logger.warning(f"Ishchi {payload['worker_id']} rasmi spool da topilmadi: {upload_path}")
+        return
+    try:
+        image_url = await store_worker_image(upload_path, payload["digest"])
+    except InvalidImageError as e:
+        # Qayta urinish foyda bermaydi
+        logger.warning(f"Ishchi {payload['worker_id']} rasmi o'qilmadi: {str(e)}")
+        _discard_upload(upload_path)
+        return
+
+    async with AsyncSessionLocal() as db:
+        applied, exists, old_image = await worker_crud.apply_worker_image(
+            db, payload["worker_id"], image_url, payload.get("upload_seq", 0)
+        )
+    _discard_upload(upload_path)
+
+    # Yangiroq yuklanish allaqachon biriktirilgan yoki ishchi shu orada o'chirilgan
+    # bo'lsa yangi rasm, aks holda eskisi keraksiz bo'lib qoladi
+    if not applied or not exists:
+        stale_image = image_url
+    elif old_image != image_url:
+        stale_image = old_image
+    else:
+        stale_image = None
+    if stale_image:
+        await job_queue.enqueue("worker_image_cleanup", {"image": stale_image})
+
+
+@job_queue.handler("worker_image_cleanup")
+async def cleanup_worker_image(payload: Dict[str, Any]) -> None:
+    """Fon vazifasi: hech bir ishchi ishlatmayotgan rasm fayllarini o'chirish"""
+    await media_sweeper.remove_image(payload["image"])
 
 
 @router.get("/", response_model = List[WorkerSimpleSchema])
@@ -31,7 +155,7 @@ async def read_workers(
         skip: int = Query(0, description = "O'tkazib yuborish uchun ma'lumotlar soni"),
         limit: int = Query(100, description = "Qaytariladigan ma'lumotlar soni"),
         is_active: bool = Query(True, description = "Faqat faol ishchilarni qaytarish"),
-        db: AsyncSession = Depends(get_async_db),
+        db: AsyncSession = Depends(get_read_db),
 ) -> Any:
     workers = await worker_crud.get_workers(db, skip = skip, limit = limit, is_active = is_active)
     result = []
@@ -51,6 +175,7 @@ async def read_workers(
             skills = skills_list,
             languages = languages_list,
             image = image,
+            image_thumb = f"https://admin.ishbozor.uz{image_variant_url(worker.image)}" if worker.image else None,
             disability_degree = worker.disability_degree,  # Yangi maydon qo'shildi
         ))
 
@@ -59,11 +184,12 @@ async def read_workers(
 
 @router.get("/me", response_model = dict)
 async def read_worker_me(
-        current_user: models.User = Depends(get_current_active_user),
+        current_user: TokenClaims = Depends(get_current_claims),
         db: AsyncSession = Depends(get_async_db)
 ):
-    telegram_id = current_user.telegram_id
-    worker = await worker_crud.get_worker_by_telegram_id(db, telegram_id)
+    # /users/me bilan umumiy profil so'rovi (cache lanadi)
+    profile = await user_crud.get_profile(db, current_user.telegram_id)
+    worker = profile["worker"] if profile else None
     if not worker:
         raise HTTPException(
             status_code = status.HTTP_404_NOT_FOUND,
@@ -71,24 +197,24 @@ async def read_worker_me(
         )
 
     worker_data = {
-        "id": worker.id,
-        "telegram_id": worker.telegram_id,
-        "name": worker.name,
-        "about": worker.about,
-        "age": worker.age,
-        "phone": worker.phone,
-        "time_type": worker.time_type,
-        "gender": worker.gender,
-        "payment_type": worker.payment_type,
-        "daily_payment": worker.daily_payment,
-        "languages": worker.languages,
-        "skills": worker.skills,
-        "location": worker.location,
-        "image": f"https://admin.ishbozor.uz{worker.image}",
-        "is_active": worker.is_active,
-        "disability_degree": worker.disability_degree,  # Yangi maydon qo'shildi
-        "aliment_payer": worker.aliment_payer,
-        "aliment_payer_code": worker.aliment_payer_code,
+        "id": worker["id"],
+        "telegram_id": worker["telegram_id"],
+        "name": worker["name"],
+        "about": worker["about"],
+        "age": worker["age"],
+        "phone": worker["phone"],
+        "time_type": worker["time_type"],
+        "gender": worker["gender"],
+        "payment_type": worker["payment_type"],
+        "daily_payment": worker["daily_payment"],
+        "languages": worker["languages"],
+        "skills": worker["skills"],
+        "location": worker["location"],
+        "image": f"https://admin.ishbozor.uz{worker['image']}",
+        "is_active": worker["is_active"],
+        "disability_degree": worker["disability_degree"],  # Yangi maydon qo'shildi
+        "aliment_payer": worker["aliment_payer"],
+        "aliment_payer_code": worker["aliment_payer_code"],
     }
     return worker_data
 
@@ -112,7 +238,7 @@ async def create_worker_with_image(
         aliment_payer_code: Optional[str] = Form(None),
         image: Optional[UploadFile] = File(None),
         db: AsyncSession = Depends(get_async_db),
-        current_user: models.User = Depends(get_current_active_user),
+        current_user: UserOut = Depends(get_current_active_user),
 ) -> Any:
     db_worker = await worker_crud.get_worker_by_telegram_id(db, telegram_id = telegram_id)
     if db_worker:
@@ -129,6 +255,9 @@ async def create_worker_with_image(
                 detail = "Telefon raqami ro'yxatdan o'tgan"
             )
 
+    # Rasm turi va hajmi ishchi yaratilishidan oldin tekshiriladi
+    upload = await receive_worker_image(image) if image else None
+
     worker_data = WorkerCreate(
         telegram_id = telegram_id,
         name = name,
@@ -147,114 +276,60 @@ async def create_worker_with_image(
         aliment_payer_code = aliment_payer_code,
     )
 
-    db_worker = await worker_crud.create_worker(db = db, worker = worker_data)
-
-    if image:
-        content_type = image.content_type
-        if content_type not in settings.ALLOWED_IMAGE_TYPES:
-            raise HTTPException(
-                status_code = status.HTTP_400_BAD_REQUEST,
-                detail = f"Rasm turi qabul qilinmaydi. Qabul qilinadigan turlar: {settings.ALLOWED_IMAGE_TYPES}"
-            )
-
-        file_extension = os.path.splitext(image.filename)[1]
-        filename = f"worker_{db_worker.id}{file_extension}"
-        file_path = FilePath(settings.WORKER_IMAGES_DIR) / filename
-        os.makedirs(os.path.dirname(file_path), exist_ok = True)
-
-        async with aiofiles.open(file_path, "wb") as buffer:
-            content = await image.read()
-            await buffer.write(content)
-
-        image_url = f"{settings.MEDIA_URL}uploads/workers/{filename}"
-        db_worker = await worker_crud.update_worker_image(db, worker_id = db_worker.id, image_path = image_url)
+    try:
+        db_worker = await worker_crud.create_worker(db = db, worker = worker_data)
+    except BaseException:
+        if upload:
+            _discard_upload(upload[0])
+        raise
+
+    # Rasm variantlari fon vazifasida yaratiladi, javob qator yozilishi bilan qaytadi
+    if upload:
+        upload_path, digest = upload
+        upload_seq = await worker_crud.next_image_upload_seq(db)
+        await job_queue.enqueue(
+            "worker_image",
+            {"worker_id": db_worker.id, "upload_path": upload_path, "digest": digest, "upload_seq": upload_seq},
+            pin_host = True,  # yuklangan fayl shu hostdagi spool papkasida
+        )
 
     return db_worker
 
 
-@router.get("/workers/filter/")
-async def filter_workers(
+def worker_filter_params(
         request: Request,
         name: Optional[str] = None,
         gender: Optional[str] = None,
         min_narx: Optional[int] = None,
         max_narx: Optional[int] = None,
-        db: AsyncSession = Depends(get_async_db)
-):
+) -> Dict[str, Any]:
+    """/workers/filter/ parametrlari (worker_crud.build_worker_filters uchun); eksport ham ishlatadi"""
     raw_query_params = request.query_params
-    skills = raw_query_params.getlist("skills[]")
-    languages = raw_query_params.getlist("languages[]")
-    age_range = raw_query_params.getlist("age_range[]")
-    time_type = raw_query_params.getlist("time_type[]")
-    disability_degree = raw_query_params.getlist("disability_degree[]")
-    aliment_payer = raw_query_params.getlist("aliment_payers[]")
-    stmt = select(models.Worker).where(models.Worker.is_active == True)
-
-    # Name yoki skill bo'yicha filter
-    if name:
-        # Agar name kiritilgan bo'lsa, uni ism yoki skill nomi sifatida tekshiramiz
-        name_condition = models.Worker.name.ilike(f"%{name}%")
-        location = models.Worker.location.ilike(f"%{name}%")
-
-        # Skill nomi bo'yicha qidiruv
-        skill_condition = models.Worker.skills.ilike(f"%{name}%")
-
-        # Shartlarni OR orqali birlashtiramiz
-        stmt = stmt.where(or_(name_condition, skill_condition, location))
-
-    # Skills
-    if skills and "barchasi" not in [s.lower() for s in skills]:
-        skill_conditions = [models.Worker.skills.ilike(f"%{skill}%") for skill in skills]
-        stmt = stmt.where(or_(*skill_conditions))
-
-    # Languages
-    if languages and "barchasi" not in [l.lower() for l in languages]:
-        lang_conditions = [models.Worker.languages.ilike(f"%{lang}%") for lang in languages]
-        stmt = stmt.where(or_(*lang_conditions))
-
-    # Gender
-    if gender and gender.lower() != "barchasi":
-        stmt = stmt.where(models.Worker.gender.ilike(gender))
-
-    #disability
-    if disability_degree and "barchasi" not in [d.lower() for d in disability_degree]:
-        disability_conditions = [
-            models.Worker.disability_degree.ilike(f"%{d}%") for d in disability_degree
-        ]
-        stmt = stmt.where(or_(*disability_conditions))
-    # Narx oralig'i (filter narxlarni ichida bo‘lishi kerak)
-    if min_narx is not None:
-        stmt = stmt.where(models.Worker.daily_payment >= min_narx)
+    return {
+        "name": name,
+        "gender": gender,
+        "min_narx": min_narx,
+        "max_narx": max_narx,
+        "skills": raw_query_params.getlist("skills[]"),
+        "languages": raw_query_params.getlist("languages[]"),
+        "age_range": raw_query_params.getlist("age_range[]"),
+        "time_type": raw_query_params.getlist("time_type[]"),
+        "disability_degree": raw_query_params.getlist("disability_degree[]"),
+        "aliment_payer": raw_query_params.getlist("aliment_payers[]"),
+    }
 
-    if max_narx is not None:
-        stmt = stmt.where(models.Worker.daily_payment <= max_narx)
 
-    if aliment_payer and "barchasi" not in [str(a).lower() for a in aliment_payer]:
-        # 1 yoki 0 string bo'lib keladi, ularni boolean ga aylantiramiz
-        try:
-            bool_values = [bool(int(a)) for a in aliment_payer if a in ["0", "1"]]
-            stmt = stmt.where(models.Worker.aliment_payer.in_(bool_values))
-        except ValueError:
-            return {"error": "aliment_payers[] values must be 0 or 1"}
-
-    # Age Range
-    if age_range and "barchasi" not in [a.lower() for a in age_range]:
-        age_conditions = []
-        for range_str in age_range:
-            try:
-                min_age, max_age = map(int, range_str.split("-"))
-                age_conditions.append(
-                    models.Worker.age.between(min_age, max_age)
-                )
-            except ValueError:
-                return {"error": f"age_range '{range_str}' must be like 25-35"}
-        stmt = stmt.where(or_(*age_conditions))
-
-    if time_type and "barchasi" not in [t.lower() for t in time_type]:
-        time_conditions = [models.Worker.time_type.ilike(t) for t in time_type]
-        stmt = stmt.where(or_(*time_conditions))
+@router.get("/workers/filter/")
+async def filter_workers(
+        filters: Dict[str, Any] = Depends(worker_filter_params),
+        db: AsyncSession = Depends(get_read_db)
+):
+    try:
+        criteria = worker_crud.build_worker_filters(**filters)
+    except ValueError as e:
+        return {"error": str(e)}
 
-    result = await db.execute(stmt)
+    result = await db.execute(select(models.Worker).where(*criteria))
     workers = result.scalars().all()
 
     return [
@@ -269,6 +344,7 @@ async def filter_workers(
             "skills": w.get_skills_list(),
             "languages": w.get_languages_list(),
             "image": f"https://admin.ishbozor.uz{w.image}" if w.image else None,
+            "image_thumb": f"https://admin.ishbozor.uz{image_variant_url(w.image)}" if w.image else None,
             "disability_degree": w.disability_degree,  # Yangi maydon qo'shildi
             "aliment_payer":w.aliment_payer,
             "daily_payment":w.daily_payment,
@@ -278,8 +354,162 @@ async def filter_workers(
     ]
 
 
+INT4_MIN, INT4_MAX = -2 ** 31, 2 ** 31 - 1
+
+
+@router.get("/batch")
+async def read_workers_batch(
+        ids: List[str] = Query(..., description = "Ishchi ID lari: ids=1&ids=2 yoki ids=1,2,3"),
+        db: AsyncSession = Depends(get_read_db),
+):
+    """
+    Bir nechta ishchini bitta so'rov bilan olish
+
+    Natija kiritilgan ID lar tartibida, topilmagan ID lar `missing` da qaytariladi
+    """
+    try:
+        worker_ids = [int(part) for value in ids for part in value.split(",") if part.strip()]
+    except ValueError:
+        raise HTTPException(
+            status_code = status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail = "ids butun sonlardan iborat bo'lishi kerak"
+        )
+
+    if len(worker_ids) > settings.BATCH_MAX_IDS:
+        raise HTTPException(
+            status_code = status.HTTP_400_BAD_REQUEST,
+            detail = f"Bir so'rovda ko'pi bilan {settings.BATCH_MAX_IDS} ta ID yuborish mumkin"
+        )
+
+    # INTEGER ustun chegarasidan tashqaridagi ID lar bazaga yuborilmaydi (missing bo'ladi)
+    lookup_ids = {worker_id for worker_id in worker_ids if INT4_MIN <= worker_id <= INT4_MAX}
+    rows = await worker_crud.get_workers_by_ids(db, list(lookup_ids)) if lookup_ids else []
+    workers_by_id = {row.id: row for row in rows}
+
+    items = []
+    missing = []
+    for worker_id in worker_ids:
+        w = workers_by_id.get(worker_id)
+        if w is None:
+            missing.append(worker_id)
+            continue
+        items.append({
+            "id": w.id,
+            "name": w.name,
+            "age": w.age,
+            "gender": w.gender,
+            "phone": w.phone,
+            "time_type": w.time_type,
+            "location": w.location,
+            "skills": [s.strip() for s in w.skills.split(",")] if w.skills else [],
+            "languages": [l.strip() for l in w.languages.split(",")] if w.languages else [],
+            "image": f"https://admin.ishbozor.uz{w.image}" if w.image else None,
+            "image_thumb": f"https://admin.ishbozor.uz{image_variant_url(w.image)}" if w.image else None,
+            "disability_degree": w.disability_degree,
+        })
+
+    return {"items": items, "missing": missing}
+
+
+def parse_change_cursor(since: str) -> Tuple[int, int]:
+    """ "<txid>-<seq>" kursorini (txid, seq) ga aylantirish; "0" - jurnal boshi"""
+    if since == "0":
+        return 0, 0
+    try:
+        txid, seq = since.split("-")
+        cursor = int(txid), int(seq)
+    except ValueError:
+        raise HTTPException(
+            status_code = status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail = "since '<txid>-<seq>' ko'rinishida bo'lishi kerak"
+        )
+    if min(cursor) < 0:
+        raise HTTPException(status_code = status.HTTP_422_UNPROCESSABLE_ENTITY, detail = "since manfiy bo'lmasligi kerak")
+    return cursor
+
+
+@router.get("/changes", response_model = WorkerChangeFeed)
+async def read_worker_changes(
+        since: str = Query("0", description = "Oldingi javobdagi next_since (birinchi marta 0 - butun katalog)"),
+        limit: int = Query(settings.WORKER_CHANGES_PAGE_SIZE, ge = 1, le = settings.WORKER_CHANGES_MAX_PAGE_SIZE),
+        db: AsyncSession = Depends(get_read_db),
+        claims: TokenClaims = Depends(get_current_claims),
+):
+    """
+    since dan keyingi ishchi o'zgarishlari (Django admin dagilari ham)
+
+    Sahifada bitta ishchining bir nechta o'zgarishi bo'lsa, faqat oxirgisi
+    qaytariladi. O'chirilgan ishchilar worker=None bilan (tombstone) keladi.
+    """
+    cursor = parse_change_cursor(since)
+    rows = await worker_crud.get_worker_changes(db, cursor, limit)
+
+    # Qatorlar (txid, seq) tartibida: ishchining oxirgi yozuvi eng oxirida keladi
+    latest = {}
+    for position, row in enumerate(rows):
+        latest[row.worker_id] = (position, row)
+    changes = [
+        WorkerChange(
+            seq = row.seq,
+            op = "upsert" if row.Worker is not None else "delete",
+            worker_id = row.worker_id,
+            worker = row.Worker,
+        )
+        for _, row in sorted(latest.values(), key = lambda item: item[0])
+    ]
+    return WorkerChangeFeed(
+        changes = changes,
+        next_since = f"{rows[-1].txid}-{rows[-1].seq}" if rows else since,
+        has_more = len(rows) == limit,
+    )
+
+
+@router.post("/import", response_model = WorkerImportResult)
+async def import_workers(
+        file: UploadFile = File(..., description = "CSV yoki XLSX (export/workers formatida)"),
+        update_existing: bool = Query(False, description = "Mavjud ishchilarni telegram_id bo'yicha yangilash"),
+        db: AsyncSession = Depends(get_async_db),
+        admin: TokenClaims = Depends(get_current_admin_claims),
+) -> Any:
+    """
+    Ishchilarni CSV/XLSX fayldan ommaviy import qilish (faqat ADMIN_TELEGRAM_IDS)
+
+    Har bir qator WorkerCreate bilan tekshiriladi; xatoli qatorlar `errors` da
+    qator raqami bilan qaytariladi, qolganlari bitta COPY + merge bilan yoziladi.
+    """
+    fd, upload_path = tempfile.mkstemp(suffix = ".import")
+    os.close(fd)
+    try:
+        try:
+            await stream_upload_file(file, upload_path, settings.WORKER_IMPORT_MAX_SIZE)
+        except UploadTooLargeError as e:
+            raise HTTPException(
+                status_code = status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                detail = str(e)
+            )
+
+        try:
+            return await import_workers_file(
+                db, upload_path, update_existing = update_existing, max_errors = settings.WORKER_IMPORT_MAX_ERRORS
+            )
+        except ImportFileError as e:
+            raise HTTPException(
+                status_code = status.HTTP_400_BAD_REQUEST,
+                detail = str(e)
+            )
+        except IntegrityError:
+            # Import paytida parallel so'rov bir xil telefon raqamini yozgan
+            raise HTTPException(
+                status_code = status.HTTP_409_CONFLICT,
+                detail = "Import paytida ma'lumotlar o'zgardi, qayta urinib ko'ring"
+            )
+    finally:
+        if os.path.exists(upload_path):
+            os.remove(upload_path)
+
+
 @router.get("/{worker_id}")
-async def get_worker_with_feedbacks(worker_id: int, db: AsyncSession = Depends(get_async_db)):
+async def get_worker_with_feedbacks(worker_id: int, db: AsyncSession = Depends(get_read_db)):
     stmt = (
         select(models.Worker)
         .options(
@@ -352,18 +582,11 @@ async def update_worker(
         aliment_payer: Optional[bool] = Form(None),
         aliment_payer_code: Optional[str] = Form(None),
         db: AsyncSession = Depends(get_async_db),
-        current_user: models.User = Depends(get_current_active_user),
+        current_user: UserOut = Depends(get_current_active_user),
 ) -> Any:
-    worker = await worker_crud.get_worker(db, worker_id = worker_id)
-    if worker is None:
-        raise HTTPException(
-            status_code = status.HTTP_404_NOT_FOUND,
-            detail = "Ishchi topilmadi"
-        )
-
-    if phone and phone != worker.phone:
+    if phone:
         db_worker_by_phone = await worker_crud.get_worker_by_phone(db, phone = phone)
-        if db_worker_by_phone:
+        if db_worker_by_phone and db_worker_by_phone.id != worker_id:
             raise HTTPException(
                 status_code = status.HTTP_400_BAD_REQUEST,
                 detail = "Telefon raqami ro'yxatdan o'tgan"
@@ -398,38 +621,38 @@ async def update_worker(
         update_data["is_active"] = is_active
 
     if languages is not None:
-        worker.set_languages([lang.strip() for lang in languages.split(",")])
+        update_data["languages"] = ", ".join(lang.strip() for lang in languages.split(","))
     if skills is not None:
-        worker.set_skills([skill.strip() for skill in skills.split(",")])
-
-    worker_update = WorkerUpdate(**update_data)
-    worker = await worker_crud.update_worker(db = db, worker_id = worker_id, worker_update = worker_update)
-
-    if image:
-        content_type = image.content_type
-        if content_type not in settings.ALLOWED_IMAGE_TYPES:
-            raise HTTPException(
-                status_code = status.HTTP_400_BAD_REQUEST,
-                detail = f"Rasm turi qabul qilinmaydi. Qabul qilinadigan turlar: {settings.ALLOWED_IMAGE_TYPES}"
-            )
-
-        if worker.image:
-            old_image_path = FilePath(settings.BASE_DIR) / worker.image.lstrip('/')
-            if os.path.exists(old_image_path):
-                os.remove(old_image_path)  # Bu sinxron, lekin keyinroq optimallashtirish mumkin
+        update_data["skills"] = ", ".join(skill.strip() for skill in skills.split(","))
 
-        file_extension = os.path.splitext(image.filename)[1]
-        filename = f"worker_{worker_id}{file_extension}"
-        file_path = FilePath(settings.WORKER_IMAGES_DIR) / filename
-        os.makedirs(os.path.dirname(file_path), exist_ok = True)
+    upload = await receive_worker_image(image) if image else None
 
-        async with aiofiles.open(file_path, "wb") as buffer:
-            content = await image.read()
-            await buffer.write(content)
+    # Maydonlar bitta UPDATE ... RETURNING bilan yoziladi
+    worker_update = WorkerUpdate(**update_data)
+    try:
+        worker = await worker_crud.update_worker(db = db, worker_id = worker_id, worker_update = worker_update)
+    except BaseException:
+        if upload:
+            _discard_upload(upload[0])
+        raise
+    if worker is None:
+        if upload:
+            _discard_upload(upload[0])
+        raise HTTPException(
+            status_code = status.HTTP_404_NOT_FOUND,
+            detail = "Ishchi topilmadi"
+        )
 
-        image_url = f"{settings.MEDIA_URL}uploads/workers/{filename}"
-        worker = await worker_crud.update_worker_image(db = db, worker_id = worker_id, image_path = image_url)
-        worker.image = f"https://admin.ishbozor.uz{worker.image}"
+    # Yangi rasm fon vazifasida qayta ishlanib biriktiriladi, eski rasm fayllari keyin tozalanadi
+    if upload:
+        upload_path, digest = upload
+        # Tartib raqami: kechikkan eski yuklanish yangisini almashtirmasligi uchun
+        upload_seq = await worker_crud.next_image_upload_seq(db)
+        await job_queue.enqueue(
+            "worker_image",
+            {"worker_id": worker_id, "upload_path": upload_path, "digest": digest, "upload_seq": upload_seq},
+            pin_host = True,
+        )
     return worker
 
 
@@ -438,40 +661,32 @@ async def toggle_worker_status(
         worker_id: int,
         is_active: bool = Body(..., embed = True),
         db: AsyncSession = Depends(get_async_db),
-        current_user: models.User = Depends(get_current_active_user),
+        current_user: TokenClaims = Depends(get_current_claims),
 ) -> dict:
-    worker = await worker_crud.get_worker(db, worker_id = worker_id)
-    if worker is None:
-        raise HTTPException(
-            status_code = status.HTTP_404_NOT_FOUND,
-            detail = "Ishchi topilmadi"
-        )
-
     updated_worker = await worker_crud.update_worker_status(
         db = db,
         worker_id = worker_id,
         is_active = is_active
     )
-
-    if updated_worker:
-        return {
-            "status": "success",
-            "message": f"Ishchi statusi {is_active} qiymatiga o'zgartirildi",
-            "worker_id": worker_id,
-            "is_active": is_active
-        }
-    else:
+    if updated_worker is None:
         raise HTTPException(
-            status_code = status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail = "Ishchi statusini o'zgartirishda xatolik yuz berdi"
+            status_code = status.HTTP_404_NOT_FOUND,
+            detail = "Ishchi topilmadi"
         )
 
+    return {
+        "status": "success",
+        "message": f"Ishchi statusi {is_active} qiymatiga o'zgartirildi",
+        "worker_id": worker_id,
+        "is_active": is_active
+    }
+
 
 @router.delete("/{worker_id}", status_code = status.HTTP_200_OK)
 async def delete_worker(
         worker_id: int,
         db: AsyncSession = Depends(get_async_db),
-        current_user: models.User = Depends(get_current_active_user),
+        current_user: UserOut = Depends(get_current_active_user),
 ) -> dict:
     worker = await worker_crud.get_worker(db, worker_id = worker_id)
     if worker is None:
@@ -480,14 +695,12 @@ async def delete_worker(
             detail = "Ishchi topilmadi"
         )
 
-    if worker.image:
-        image_path = FilePath(settings.BASE_DIR) / worker.image.lstrip('/')
-        if os.path.exists(image_path):
-            os.remove(image_path)  # Bu sinxron, lekin keyinroq optimallashtirish mumkin
-
     success = await worker_crud.delete_worker(db = db, worker_id = worker_id)
 
     if success:
+        # Rasm fayllari fon vazifasida o'chiriladi (boshqa ishchi ishlatmayotgan bo'lsa)
+        if worker.image:
+            await job_queue.enqueue("worker_image_cleanup", {"image": worker.image})
         return {"status": "success", "message": "Ishchi muvaffaqiyatli o'chirildi", "id": worker_id}
     else:
         raise HTTPException(
@@ -0,0 +1,134 @@
+"""
+Jarayon ichidagi cache
+
+Hajmi chegaralangan, muddatli (TTL) LRU cache va ilovadagi cache ekzempliarlari
+"""
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+
+from app.core.settings import settings
+from app.crud import token as token_crud
+from app.database import AsyncSessionLocal
+
+logger = logging.getLogger("app.cache")
+
+
+class TTLCache:
+    """
+    Hajmi chegaralangan TTL cache
+
+    Eng uzoq ishlatilmagan yozuvlar hajm to'lganda chiqarib tashlanadi,
+    muddati o'tgan yozuvlar esa o'qish paytida o'chiriladi.
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        item = self._data.get(key)
+        if item is None:
+            return default
+        expires_at, value = item
+        if expires_at < time.monotonic():
+            del self._data[key]
+            return default
+        self._data.move_to_end(key)
+        return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        self._data[key] = (time.monotonic() + (ttl or self.ttl), value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def pop(self, key: Hashable) -> None:
+        self._data.pop(key, None)
+
+    def clear(self) -> None:
+        self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+# Autentifikatsiya qilingan foydalanuvchilar: telegram_id -> UserOut
+user_cache = TTLCache(maxsize=settings.USER_CACHE_SIZE, ttl=settings.USER_CACHE_TTL)
+
+
+# Profil (user + worker ustunlari): telegram_id -> dict
+profile_cache = TTLCache(maxsize=settings.PROFILE_CACHE_SIZE, ttl=settings.PROFILE_CACHE_TTL)
+
+
+def invalidate_profile(telegram_id: Optional[str]) -> None:
+    """Profil (user yoki worker) o'zgarganda cache yozuvini o'chirish"""
+    if telegram_id is not None:
+        profile_cache.pop(str(telegram_id))
+
+
+def invalidate_user(telegram_id: Optional[str]) -> None:
+    """Foydalanuvchi o'zgarganda uning cache yozuvlarini o'chirish"""
+    if telegram_id is not None:
+        user_cache.pop(str(telegram_id))
+        invalidate_profile(telegram_id)
+
+
+class TokenVersionTable:
+    """
+    Token versiyalari jadvalining xotiradagi nusxasi
+
+    JWT dagi `ver` shu jadvaldagi versiyadan kichik bo'lsa token bekor
+    qilingan hisoblanadi. Jadval fon vazifasida davriy yangilanadi, shu
+    jarayonda oshirilgan versiyalar esa darhol qo'llanadi.
+    """
+
+    def __init__(self, refresh_interval: float):
+        self.refresh_interval = refresh_interval
+        self._versions: Dict[int, int] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    def get(self, user_id: int) -> int:
+        return self._versions.get(user_id, 0)
+
+    def set(self, user_id: int, version: int) -> None:
+        # Versiyalar faqat o'sadi
+        if version > self._versions.get(user_id, 0):
+            self._versions[user_id] = version
+
+    async def refresh(self) -> None:
+        async with AsyncSessionLocal() as db:
+            versions = await token_crud.get_token_versions(db)
+        for user_id, version in versions.items():
+            self.set(user_id, version)
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.refresh_interval)
+            try:
+                await self.refresh()
+            except Exception as e:
+                logger.error(f"Token versiyalarini yangilashda xatolik: {str(e)}")
+
+    async def start(self) -> None:
+        try:
+            await self.refresh()
+        except Exception as e:
+            logger.error(f"Token versiyalarini yuklashda xatolik: {str(e)}")
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+token_versions = TokenVersionTable(refresh_interval=settings.TOKEN_VERSION_REFRESH_INTERVAL)
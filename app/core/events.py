@@ -0,0 +1,178 @@
+"""
+Real-time hodisalar
+
+Yangiliklar haqidagi hodisalarni ulangan foydalanuvchilarga tarqatuvchi hub.
+Hodisalar PostgreSQL LISTEN/NOTIFY orqali keladi, shuning uchun Django admin
+va boshqa FastAPI jarayonlaridagi o'zgarishlar ham har bir jarayonga yetib boradi.
+Shu kanal orqali admin dagi user/worker o'zgarishlari profil cache ni ham
+bekor qiladi.
+"""
+import asyncio
+import json
+import logging
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Set, Tuple
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.cache import invalidate_user, profile_cache, user_cache
+from app.core.settings import settings
+from app.database import engine
+
+logger = logging.getLogger("app.events")
+
+# Hodisa turlari
+NEWS_CREATED = "news_created"
+UNREAD_CHANGED = "unread_changed"
+PROFILE_CHANGED = "profile_changed"
+
+
+class Subscription:
+    """
+    Bitta ulanish uchun obuna
+
+    Hodisalar navbatga cheksiz yig'ilmaydi: yangi yangiliklar soni hisoblagichda,
+    oxirgi yangiliklar esa cheklangan deque da saqlanadi. Shu sababli bitta
+    ulanish xotirasi hodisalar sonidan qat'i nazar chegaralangan.
+    """
+
+    __slots__ = ("user_id", "unread_delta", "recount", "latest", "_wakeup")
+
+    def __init__(self, user_id: int, max_pending: int):
+        self.user_id = user_id
+        self.unread_delta = 0
+        self.recount = False
+        self.latest: Deque[Dict[str, Any]] = deque(maxlen=max_pending)
+        self._wakeup = asyncio.Event()
+
+    def push_news(self, news: Dict[str, Any]) -> None:
+        self.latest.append(news)
+        self.unread_delta += 1
+        self._wakeup.set()
+
+    def request_recount(self) -> None:
+        self.recount = True
+        self._wakeup.set()
+
+    async def wait(self, timeout: float) -> bool:
+        """Hodisani kutish. Vaqt tugasa False qaytaradi"""
+        try:
+            await asyncio.wait_for(self._wakeup.wait(), timeout)
+        except asyncio.TimeoutError:
+            return False
+        self._wakeup.clear()
+        return True
+
+    def drain(self) -> Tuple[List[Dict[str, Any]], int, bool]:
+        """Yig'ilgan hodisalarni olish va holatni tozalash"""
+        news = list(self.latest)
+        self.latest.clear()
+        delta, self.unread_delta = self.unread_delta, 0
+        recount, self.recount = self.recount, False
+        return news, delta, recount
+
+
+class NewsHub:
+    """
+    Jarayon ichidagi fan-out hub
+
+    Har bir FastAPI jarayoni bitta LISTEN ulanishini ochadi va kelgan
+    hodisalarni shu jarayondagi barcha obunachilarga tarqatadi.
+    """
+
+    def __init__(self, channel: str, max_pending: int):
+        self.channel = channel
+        self.max_pending = max_pending
+        self._subscribers: Set[Subscription] = set()
+        self._by_user: Dict[int, Set[Subscription]] = {}
+        self._listener_task: Optional[asyncio.Task] = None
+
+    @property
+    def connections(self) -> int:
+        return len(self._subscribers)
+
+    def subscribe(self, user_id: int) -> Subscription:
+        subscription = Subscription(user_id, self.max_pending)
+        self._subscribers.add(subscription)
+        self._by_user.setdefault(user_id, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        self._subscribers.discard(subscription)
+        user_subscriptions = self._by_user.get(subscription.user_id)
+        if user_subscriptions is not None:
+            user_subscriptions.discard(subscription)
+            if not user_subscriptions:
+                del self._by_user[subscription.user_id]
+
+    def dispatch(self, event: Dict[str, Any]) -> None:
+        """Hodisani shu jarayondagi obunachilarga yetkazish"""
+        event_type = event.get("type")
+        if event_type == NEWS_CREATED:
+            news = event.get("news") or {}
+            for subscription in self._subscribers:
+                subscription.push_news(news)
+        elif event_type == UNREAD_CHANGED:
+            for subscription in self._by_user.get(event.get("user_id"), ()):
+                subscription.request_recount()
+        elif event_type == PROFILE_CHANGED:
+            invalidate_user(event.get("telegram_id"))
+
+    async def notify(self, db: AsyncSession, event: Dict[str, Any]) -> None:
+        """
+        Hodisani barcha jarayonlarga yuborish
+
+        NOTIFY tranzaksiya commit bo'lganda yetkaziladi, shuning uchun
+        chaqiruvchi sessiyani commit qilishi kerak.
+        """
+        await db.execute(select(func.pg_notify(self.channel, json.dumps(event))))
+
+    def _on_notify(self, connection, pid, channel, payload) -> None:
+        try:
+            event = json.loads(payload)
+        except ValueError:
+            logger.warning(f"Noto'g'ri hodisa: {payload!r}")
+            return
+        self.dispatch(event)
+
+    async def _listen(self) -> None:
+        while True:
+            try:
+                async with engine.connect() as conn:
+                    raw_connection = await conn.get_raw_connection()
+                    driver_connection = raw_connection.driver_connection
+                    lost = asyncio.Event()
+                    driver_connection.add_termination_listener(lambda c: lost.set())
+                    await driver_connection.add_listener(self.channel, self._on_notify)
+                    logger.info(f"LISTEN {self.channel} boshlandi")
+
+                    # Ulanish uzilgan paytda o'tkazib yuborilgan hodisalar bo'lishi mumkin
+                    for subscription in self._subscribers:
+                        subscription.request_recount()
+                    user_cache.clear()
+                    profile_cache.clear()
+
+                    await lost.wait()
+                logger.warning(f"LISTEN {self.channel} ulanishi uzildi")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"LISTEN {self.channel} xatolik: {str(e)}")
+            await asyncio.sleep(5)
+
+    async def start(self) -> None:
+        if self._listener_task is None:
+            self._listener_task = asyncio.create_task(self._listen())
+
+    async def stop(self) -> None:
+        if self._listener_task is not None:
+            self._listener_task.cancel()
+            try:
+                await self._listener_task
+            except asyncio.CancelledError:
+                pass
+            self._listener_task = None
+
+
+news_hub = NewsHub(settings.NEWS_EVENTS_CHANNEL, settings.NEWS_STREAM_MAX_PENDING)
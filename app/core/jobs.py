@@ -0,0 +1,231 @@
+"""
+Fon vazifalari navbati
+
+So'rov javob qaytargandan keyin bajariladigan ishlar (rasmlarni qayta ishlash,
+fayllarni tozalash) uchun asyncio navbati: cheklangan parallellik, backoff
+bilan qayta urinish va to'xtashda navbatni bo'shatish. Saqlanadigan
+vazifalar api_background_job jadvaliga yoziladi va qayta ishga tushganda
+(yoki boshqa jarayon tomonidan) davom ettiriladi.
+"""
+import asyncio
+import logging
+import random
+import socket
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set
+
+from app.core.settings import settings
+from app.crud import job as job_crud
+from app.database import AsyncSessionLocal
+
+logger = logging.getLogger("app.jobs")
+
+JobHandler = Callable[[Dict[str, Any]], Awaitable[None]]
+
+
+class Job:
+    __slots__ = ("id", "name", "payload", "attempts")
+
+    def __init__(self, job_id: Optional[int], name: str, payload: Dict[str, Any], attempts: int = 0):
+        self.id = job_id
+        self.name = name
+        self.payload = payload
+        self.attempts = attempts
+
+
+class JobQueue:
+    """
+    Jarayon ichidagi vazifalar navbati
+
+    Saqlanadigan vazifani bajarishdan oldin jadvaldagi qatorga ijara (lease)
+    olinadi, shuning uchun bir nechta jarayon bitta vazifani ikki marta bajarmaydi.
+    Hostga bog'langan vazifalarni faqat `host` i mos jarayonlar oladi.
+    """
+
+    def __init__(
+            self,
+            concurrency: int,
+            max_attempts: int,
+            backoff_base: float,
+            backoff_max: float,
+            lease: float,
+            poll_interval: float,
+            drain_timeout: float,
+            host: str,
+    ):
+        self.concurrency = concurrency
+        self.max_attempts = max_attempts
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.lease = lease
+        self.poll_interval = poll_interval
+        self.drain_timeout = drain_timeout
+        self.host = host
+        self._handlers: Dict[str, JobHandler] = {}
+        self._queue: Optional[asyncio.Queue] = None
+        self._workers: List[asyncio.Task] = []
+        self._poll_task: Optional[asyncio.Task] = None
+        self._delayed: Set[asyncio.TimerHandle] = set()
+        self._known: Set[int] = set()  # shu jarayonda navbatdagi saqlangan vazifalar
+
+    def handler(self, name: str) -> Callable[[JobHandler], JobHandler]:
+        """Vazifa turini ro'yxatdan o'tkazish uchun dekorator"""
+        def decorator(func: JobHandler) -> JobHandler:
+            self._handlers[name] = func
+            return func
+        return decorator
+
+    @property
+    def running(self) -> bool:
+        return bool(self._workers)
+
+    async def enqueue(self, name: str, payload: Dict[str, Any], persist: bool = True, pin_host: bool = False) -> None:
+        """
+        Vazifani navbatga qo'shish
+
+        persist=True da vazifa avval bazaga yoziladi, jarayon to'xtab qolsa
+        ham keyin bajariladi. payload JSON ga aylanadigan bo'lishi kerak.
+        pin_host=True - vazifa shu hostning lokal fayllariga bog'liq, uni
+        boshqa serverdagi jarayonlar olmaydi.
+        """
+        if name not in self._handlers:
+            raise LookupError(f"Noma'lum vazifa: {name}")
+        job_id = None
+        if persist:
+            async with AsyncSessionLocal() as db:
+                job_id = await job_crud.create_job(db, name, payload, self.host if pin_host else None)
+                await db.commit()
+        if not self.running:
+            # Saqlangan vazifani keyinroq poll topadi, saqlanmagani yo'qoladi
+            if job_id is None:
+                logger.warning(f"Navbat ishlamayapti, '{name}' vazifasi bajarilmaydi")
+            return
+        self._put(Job(job_id, name, payload))
+
+    def _put(self, job: Job) -> None:
+        if job.id is not None:
+            self._known.add(job.id)
+        self._queue.put_nowait(job)
+
+    def _schedule(self, job: Job, delay: float) -> None:
+        if job.id is not None:
+            self._known.add(job.id)
+        loop = asyncio.get_running_loop()
+
+        def fire() -> None:
+            self._delayed.discard(handle)
+            if self._queue is not None:
+                self._put(job)
+
+        handle = loop.call_later(delay, fire)
+        self._delayed.add(handle)
+
+    def _backoff(self, attempts: int) -> float:
+        delay = min(self.backoff_max, self.backoff_base * 2 ** (attempts - 1))
+        return delay * random.uniform(0.5, 1.0)  # jitter
+
+    async def _run(self, job: Job) -> None:
+        if job.id is not None:
+            async with AsyncSessionLocal() as db:
+                row = await job_crud.claim_job(db, job.id, self.lease, self.host)
+            if row is None:
+                # Boshqa jarayon bajaryapti yoki vazifa allaqachon tugagan
+                self._known.discard(job.id)
+                return
+            job.name, job.payload, job.attempts = row.name, row.payload, row.attempts
+        else:
+            job.attempts += 1
+
+        handler = self._handlers.get(job.name)
+        try:
+            if handler is None:
+                raise LookupError(f"Noma'lum vazifa: {job.name}")
+            await handler(job.payload)
+        except Exception as e:
+            retry_in = None
+            if handler is not None and job.attempts < self.max_attempts:
+                retry_in = self._backoff(job.attempts)
+            logger.warning(
+                f"'{job.name}' vazifasi xatolik bilan tugadi ({job.attempts}-urinish): {str(e)}"
+                + (f", {retry_in:.1f}s dan keyin qayta uriniladi" if retry_in is not None else "")
+            )
+            if job.id is not None:
+                async with AsyncSessionLocal() as db:
+                    await job_crud.fail_job(db, job.id, repr(e), retry_in)
+            if retry_in is not None:
+                self._schedule(job, retry_in)
+            elif job.id is not None:
+                self._known.discard(job.id)
+            return
+
+        if job.id is not None:
+            async with AsyncSessionLocal() as db:
+                await job_crud.complete_job(db, job.id)
+            self._known.discard(job.id)
+
+    async def _worker(self) -> None:
+        while True:
+            job = await self._queue.get()
+            try:
+                await self._run(job)
+            except Exception as e:
+                logger.error(f"'{job.name}' vazifasini bajarishda xatolik: {str(e)}")
+            finally:
+                self._queue.task_done()
+
+    async def poll(self) -> None:
+        """Bazadagi kutayotgan (yoki ijarasi o'tgan) vazifalarni navbatga olish"""
+        async with AsyncSessionLocal() as db:
+            jobs = await job_crud.get_runnable_jobs(db, limit=self.concurrency * 100, host=self.host)
+        for job_id, delay in jobs:
+            if job_id not in self._known:
+                # name va payload claim paytida bazadan olinadi
+                self._schedule(Job(job_id, "", {}), delay)
+
+    async def _poll_loop(self) -> None:
+        while True:
+            try:
+                await self.poll()
+            except Exception as e:
+                logger.error(f"Vazifalar jadvalini o'qishda xatolik: {str(e)}")
+            await asyncio.sleep(self.poll_interval)
+
+    async def start(self) -> None:
+        if self.running:
+            return
+        self._queue = asyncio.Queue()
+        self._workers = [asyncio.create_task(self._worker()) for _ in range(self.concurrency)]
+        self._poll_task = asyncio.create_task(self._poll_loop())
+
+    async def stop(self) -> None:
+        """Yangi vazifalarni qabul qilmay, navbatdagilarini drain_timeout gacha bajarish"""
+        if not self.running:
+            return
+        self._poll_task.cancel()
+        for handle in self._delayed:
+            handle.cancel()
+        self._delayed.clear()
+
+        try:
+            await asyncio.wait_for(self._queue.join(), self.drain_timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"Navbatda {self._queue.qsize()} ta vazifa bajarilmay qoldi")
+
+        for task in [*self._workers, self._poll_task]:
+            task.cancel()
+        await asyncio.gather(*self._workers, self._poll_task, return_exceptions=True)
+        self._workers = []
+        self._poll_task = None
+        self._queue = None
+        self._known.clear()
+
+
+job_queue = JobQueue(
+    concurrency=settings.JOB_CONCURRENCY,
+    max_attempts=settings.JOB_MAX_ATTEMPTS,
+    backoff_base=settings.JOB_BACKOFF_BASE,
+    backoff_max=settings.JOB_BACKOFF_MAX,
+    lease=settings.JOB_LEASE,
+    poll_interval=settings.JOB_POLL_INTERVAL,
+    drain_timeout=settings.JOB_DRAIN_TIMEOUT,
+    host=settings.JOB_HOST or socket.gethostname(),
+)
@@ -0,0 +1,305 @@
+"""
+Media fayllar
+
+Static/media fayllarni berish (immutable cache, sendfile / X-Accel-Redirect,
+oldindan siqilgan nusxalar) va hech bir ishchi ishlatmayotgan rasmlarni fon
+vazifasida tozalovchi sweeper (muddati o'tgan eksportlar va spool fayllari ham).
+"""
+import asyncio
+import logging
+import os
+import stat
+import time
+from mimetypes import guess_type
+from typing import List, Optional, Set
+from urllib.parse import quote
+
+import anyio
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse, Response
+from starlette.staticfiles import NotModifiedResponse, StaticFiles
+from starlette.types import Receive, Scope, Send
+
+from app.core.settings import settings
+from app.crud import export as export_crud
+from app.crud import worker as worker_crud
+from app.database import AsyncSessionLocal
+from app.utils.images import image_file_paths, is_content_addressed
+
+logger = logging.getLogger("app.media")
+
+# Oldindan siqilgan nusxalar: (Content-Encoding, fayl qo'shimchasi), afzallik tartibida
+PRECOMPRESSED_ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+_COMPRESSIBLE_TYPES = {"application/javascript", "application/json", "image/svg+xml"}
+
+
+def _is_compressible(media_type: Optional[str]) -> bool:
+    # JPEG/WebP kabi rasmlar allaqachon siqilgan, ular uchun qo'shimcha stat qilinmaydi
+    return bool(media_type) and (media_type.startswith("text/") or media_type in _COMPRESSIBLE_TYPES)
+
+
+def accepted_encodings(accept_encoding: str) -> Set[str]:
+    """Accept-Encoding dagi q=0 bo'lmagan kodlashlar"""
+    accepted = set()
+    for item in accept_encoding.split(","):
+        encoding, *params = item.split(";")
+        quality = 1.0
+        for param in params:
+            name, _, value = param.strip().partition("=")
+            if name == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if quality > 0:
+            accepted.add(encoding.strip().lower())
+    return accepted
+
+
+class MediaFileResponse(FileResponse):
+    """
+    FileResponse, ASGI server `http.response.pathsend` kengaytmasini qo'llasa
+    fayl baytlari event loop orqali o'tmaydi (server ularni sendfile bilan yuboradi)
+    """
+
+    chunk_size = 256 * 1024  # pathsend bo'lmasa event loopga kamroq qaytish uchun
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        self._pathsend = "http.response.pathsend" in scope.get("extensions", {})
+        await super().__call__(scope, receive, send)
+
+    async def _handle_simple(self, send: Send, send_header_only: bool) -> None:
+        if send_header_only or not self._pathsend:
+            await super()._handle_simple(send, send_header_only)
+            return
+        await send({"type": "http.response.start", "status": self.status_code, "headers": self.raw_headers})
+        await send({"type": "http.response.pathsend", "path": str(self.path)})
+
+
+class MediaFiles(StaticFiles):
+    """
+    Static va media fayllarni berish
+
+    - Kontent-manzilli fayllar (nomi mazmuni bilan o'zgaradi) immutable cache headerini oladi.
+    - Range va ETag/If-None-Match FileResponse orqali qo'llanadi.
+    - Matnli fayllarning .br / .gz nusxalari bo'lsa, mijoz qabul qilsa shular beriladi.
+    - MEDIA_SERVE_MODE="accel" da Python faqat yo'lni tekshiradi, baytlarni esa
+      nginx beradi (Range, ETag va gzip_static ham nginx tomonida). Masalan:
+
+          location /_protected/media/ {
+              internal;
+              alias /srv/ishbor/media/;
+              gzip_static on;
+          }
+    """
+
+    def __init__(self, *args, accel_location: Optional[str] = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.accel_location = accel_location
+
+    @property
+    def accel_enabled(self) -> bool:
+        return settings.MEDIA_SERVE_MODE == "accel" and self.accel_location is not None
+
+    async def get_response(self, path: str, scope: Scope) -> Response:
+        media_type = guess_type(path)[0]
+        compressible = _is_compressible(media_type)
+        if compressible and settings.MEDIA_PRECOMPRESSED and not self.accel_enabled \
+                and scope["method"] in ("GET", "HEAD"):
+            accepted = accepted_encodings(Headers(scope=scope).get("accept-encoding", ""))
+            for encoding, suffix in PRECOMPRESSED_ENCODINGS:
+                if encoding not in accepted:
+                    continue
+                full_path, stat_result = await anyio.to_thread.run_sync(self.lookup_path, path + suffix)
+                if stat_result is not None and stat.S_ISREG(stat_result.st_mode):
+                    return self.file_response(
+                        full_path, stat_result, scope, media_type=media_type, content_encoding=encoding
+                    )
+
+        response = await super().get_response(path, scope)
+        if compressible:
+            response.headers["Vary"] = "Accept-Encoding"
+        return response
+
+    def file_response(
+            self,
+            full_path,
+            stat_result: os.stat_result,
+            scope: Scope,
+            status_code: int = 200,
+            media_type: Optional[str] = None,
+            content_encoding: Optional[str] = None,
+    ) -> Response:
+        headers = {}
+        if is_content_addressed(scope["path"]):
+            headers["Cache-Control"] = f"public, max-age={settings.MEDIA_CACHE_MAX_AGE}, immutable"
+        if content_encoding is not None:
+            headers["Content-Encoding"] = content_encoding
+            headers["Vary"] = "Accept-Encoding"
+
+        if self.accel_enabled:
+            relative_path = os.path.relpath(full_path, os.path.realpath(self.directory))
+            headers["X-Accel-Redirect"] = self.accel_location + quote(relative_path.replace(os.sep, "/"))
+            return Response(
+                status_code=status_code,
+                headers=headers,
+                media_type=media_type or guess_type(full_path)[0] or "application/octet-stream",
+            )
+
+        response = MediaFileResponse(
+            full_path, status_code=status_code, headers=headers, media_type=media_type, stat_result=stat_result
+        )
+        if self.is_not_modified(response.headers, Headers(scope=scope)):
+            return NotModifiedResponse(response.headers)
+        return response
+
+
+class MediaSweeper:
+    """
+    Ishlatilmayotgan rasm fayllarini o'chiruvchi fon vazifasi
+
+    Bir xil rasm bir nechta ishchiga tegishli bo'lishi mumkin, shuning uchun
+    fayllar so'rov ichida o'chirilmaydi. Sweeper DB dagi barcha rasm
+    yo'llarini oladi va ularga tegishli bo'lmagan, `grace` dan eski fayllarni
+    o'chiradi (yangi yuklangan, hali DB ga yozilmagan fayllar saqlanib qoladi).
+    Muddati (export_ttl) o'tgan eksport fayllari va fon vazifasi barcha
+    urinishlardan keyin ham qayta ishlay olmagan spool fayllari (spool_max_age
+    dan eski) ham shu vazifada o'chiriladi.
+    """
+
+    def __init__(
+            self,
+            directory: str,
+            interval: float,
+            grace: float,
+            export_directory: str,
+            export_ttl: float,
+            spool_directory: str,
+            spool_max_age: float,
+    ):
+        self.directory = directory
+        self.interval = interval
+        self.grace = grace
+        self.export_directory = export_directory
+        self.export_ttl = export_ttl
+        self.spool_directory = spool_directory
+        self.spool_max_age = spool_max_age
+        self._task: Optional[asyncio.Task] = None
+
+    async def sweep(self) -> int:
+        async with AsyncSessionLocal() as db:
+            images = await worker_crud.get_worker_image_paths(db)
+        referenced = {os.path.normpath(path) for image in images for path in image_file_paths(image)}
+        return await asyncio.to_thread(self._remove_unreferenced, referenced)
+
+    async def remove_image(self, image: str) -> int:
+        """Bitta rasmning fayllarini, agar uni hech bir ishchi ishlatmasa, darhol o'chirish"""
+        async with AsyncSessionLocal() as db:
+            if await worker_crud.is_image_referenced(db, image):
+                return 0
+        directory = os.path.realpath(self.directory)
+        # Faqat sweeper papkasidagi fayllar; yaqinda qayta ishlatilgan (mtime yangilangan) fayllar qoladi
+        candidates = [
+            path for path in map(os.path.realpath, image_file_paths(image))
+            if os.path.commonpath([path, directory]) == directory
+        ]
+        return await asyncio.to_thread(self._remove_files, candidates)
+
+    async def purge_exports(self) -> int:
+        """Muddati o'tgan eksport yozuvlari va ularning fayllarini o'chirish"""
+        async with AsyncSessionLocal() as db:
+            file_urls = await export_crud.purge_expired_exports(db, self.export_ttl)
+        paths = [os.path.join(self.export_directory, os.path.basename(file_url)) for file_url in file_urls]
+        return await asyncio.to_thread(self._remove_exports, paths)
+
+    def _remove_stale_spool(self) -> int:
+        cutoff = time.time() - self.spool_max_age
+        removed = 0
+        for root, _, files in os.walk(self.spool_directory):
+            for name in files:
+                path = os.path.join(root, name)
+                try:
+                    if os.stat(path).st_mtime < cutoff:
+                        os.remove(path)
+                        removed += 1
+                except FileNotFoundError:
+                    pass
+        return removed
+
+    @staticmethod
+    def _remove_exports(paths: List[str]) -> int:
+        removed = 0
+        for path in paths:
+            try:
+                os.remove(path)
+                removed += 1
+            except FileNotFoundError:
+                pass
+        return removed
+
+    def _remove_files(self, paths: List[str]) -> int:
+        cutoff = time.time() - self.grace
+        removed = 0
+        for path in paths:
+            try:
+                if os.stat(path).st_mtime > cutoff:
+                    continue
+                os.remove(path)
+                removed += 1
+            except FileNotFoundError:
+                pass
+        return removed
+
+    def _remove_unreferenced(self, referenced: Set[str]) -> int:
+        removed = 0
+        for root, _, files in os.walk(self.directory):
+            paths = [os.path.normpath(os.path.join(root, name)) for name in files]
+            removed += self._remove_files([path for path in paths if path not in referenced])
+        return removed
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                removed = await self.sweep()
+                if removed:
+                    logger.info(f"Media sweeper: {removed} ta fayl o'chirildi")
+            except Exception as e:
+                logger.error(f"Media sweeper xatolik: {str(e)}")
+            try:
+                removed = await self.purge_exports()
+                if removed:
+                    logger.info(f"Media sweeper: {removed} ta eksport fayli o'chirildi")
+            except Exception as e:
+                logger.error(f"Eksportlarni tozalashda xatolik: {str(e)}")
+            try:
+                removed = await asyncio.to_thread(self._remove_stale_spool)
+                if removed:
+                    logger.warning(f"Media sweeper: {removed} ta qayta ishlanmagan spool fayli o'chirildi")
+            except Exception as e:
+                logger.error(f"Spool papkasini tozalashda xatolik: {str(e)}")
+
+    async def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+media_sweeper = MediaSweeper(
+    str(settings.WORKER_IMAGES_DIR),
+    interval=settings.MEDIA_SWEEP_INTERVAL,
+    grace=settings.MEDIA_SWEEP_GRACE,
+    export_directory=str(settings.EXPORT_DIR),
+    export_ttl=settings.EXPORT_FILE_TTL,
+    spool_directory=str(settings.UPLOAD_SPOOL_DIR),
+    # worker_image vazifasining barcha urinishlari (ijara + backoff) tugashi uchun yetarli
+    spool_max_age=settings.JOB_MAX_ATTEMPTS * (settings.JOB_LEASE + settings.JOB_BACKOFF_MAX),
+)
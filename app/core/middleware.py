@@ -1,7 +1,12 @@
 import time
 import logging
-from fastapi import Request
+from fastapi import HTTPException, Request
 from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.settings import settings
+from app.core.sqlstats import start_request_stats
 
 # Logger yaratish
 logger = logging.getLogger("app.middleware")
@@ -19,6 +24,7 @@ class LogMiddleware(BaseHTTPMiddleware):
         So'rovni qayta ishlash va logga yozish
         """
         start_time = time.time()
+        sql_stats = start_request_stats(f"{request.method} {request.url.path}")
 
         # Client IP manzilini aniqlash
         forwarded_for = request.headers.get("X-Forwarded-For")
@@ -41,11 +47,16 @@ class LogMiddleware(BaseHTTPMiddleware):
             logger.info(
                 f"Complete request: {request.method} {request.url.path} "
                 f"from {client_ip} - Status: {response.status_code} - "
-                f"Took: {process_time:.4f}s"
+                f"Took: {process_time:.4f}s - "
+                f"DB: {sql_stats.count} queries, {sql_stats.total_time:.4f}s"
+                + (f", slowest {sql_stats.slowest_time:.4f}s: {sql_stats.slowest_summary}" if sql_stats.count else "")
             )
 
             # Response headeriga bajarilish vaqtini qo'shish
             response.headers["X-Process-Time"] = str(process_time)
+            if settings.DEBUG:
+                # Streaming javoblarda body paytidagi so'rovlar hisobga kirmaydi
+                response.headers.update(sql_stats.headers())
 
             return response
 
@@ -60,6 +71,57 @@ class LogMiddleware(BaseHTTPMiddleware):
             raise
 
 
+class BodySizeLimitMiddleware:
+    """
+    Multipart (fayl yuklash) so'rovlari hajmini cheklash
+
+    Starlette formani endpointdan oldin diskka yozib oladi, shuning uchun
+    chegara shu yerda qo'yiladi: Content-Length katta bo'lsa darhol 413,
+    Content-Length bo'lmasa o'qilgan baytlar sanaladi.
+    """
+
+    def __init__(self, app: ASGIApp, max_body_size: int = None):
+        self.app = app
+        self.max_body_size = max_body_size or settings.MAX_REQUEST_BODY_SIZE
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope.get("headers", []))
+        if not headers.get(b"content-type", b"").startswith(b"multipart/form-data"):
+            await self.app(scope, receive, send)
+            return
+
+        max_body_size = settings.REQUEST_BODY_SIZE_OVERRIDES.get(scope["path"], self.max_body_size)
+        content_length = headers.get(b"content-length")
+        if content_length is not None and content_length.isdigit() and int(content_length) > max_body_size:
+            response = JSONResponse(
+                {"detail": f"So'rov hajmi {max_body_size} baytdan oshmasligi kerak"},
+                status_code=413,
+            )
+            await response(scope, receive, send)
+            return
+
+        received = 0
+
+        async def limited_receive() -> Message:
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > max_body_size:
+                    # FastAPI body parse paytidagi HTTPException ni o'zgarishsiz qaytaradi
+                    raise HTTPException(
+                        status_code=413,
+                        detail=f"So'rov hajmi {max_body_size} baytdan oshmasligi kerak",
+                    )
+            return message
+
+        await self.app(scope, limited_receive, send)
+
+
 def setup_cors(app):
     """
     CORS sozlamalari
@@ -0,0 +1,177 @@
+"""
+Rate limiting va load shedding
+
+Token bucket asosidagi ASGI middleware: IP va token egasi bo'yicha cheklash,
+endpointlar narxi, hamda DB pul navbati to'lganda 503 qaytarish
+"""
+import logging
+import math
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.core.settings import settings
+from app.core.security import decode_token
+from app.database import engine
+
+logger = logging.getLogger("app.ratelimit")
+
+
+class RateLimitStore(ABC):
+    """
+    Bucketlar holatini saqlash interfeysi
+
+    Bir nechta jarayon yoki server umumiy limitga ega bo'lishi kerak bo'lsa,
+    shu klassdan meros olib umumiy saqlash (masalan Redis) yoziladi.
+    """
+
+    @abstractmethod
+    async def consume(self, key: str, cost: float, rate: float, capacity: float) -> float:
+        """
+        Bucketdan `cost` token olish
+
+        Returns:
+            0 - ruxsat berildi, aks holda qayta urinishgacha kutish (sekund)
+        """
+
+
+class MemoryRateLimitStore(RateLimitStore):
+    """Jarayon ichidagi store (bucketlar soni chegaralangan LRU)"""
+
+    def __init__(self, max_keys: int):
+        self.max_keys = max_keys
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+
+    async def consume(self, key: str, cost: float, rate: float, capacity: float) -> float:
+        now = time.monotonic()
+        tokens, updated = self._buckets.get(key, (capacity, now))
+        tokens = min(capacity, tokens + (now - updated) * rate)
+
+        if tokens >= cost:
+            tokens -= cost
+            wait = 0.0
+        else:
+            wait = (cost - tokens) / rate
+
+        self._buckets[key] = (tokens, now)
+        self._buckets.move_to_end(key)
+        while len(self._buckets) > self.max_keys:
+            self._buckets.popitem(last=False)
+        return wait
+
+
+def get_client_ip(scope: Scope) -> str:
+    """
+    Client IP manzilini aniqlash
+
+    X-Forwarded-For ning chap qismini client o'zi yozishi mumkin, shuning uchun
+    o'ngdan TRUSTED_PROXY_COUNT-chi manzil olinadi (ishonchli proxy qo'shgani).
+    Proxy sozlanmagan yoki sarlavha qisqa bo'lsa - ulanish manzili.
+    """
+    if settings.TRUSTED_PROXY_COUNT > 0:
+        for name, value in scope.get("headers", []):
+            if name == b"x-forwarded-for":
+                hops = [hop.strip() for hop in value.decode("latin-1").split(",") if hop.strip()]
+                if len(hops) >= settings.TRUSTED_PROXY_COUNT:
+                    return hops[-settings.TRUSTED_PROXY_COUNT]
+                break
+    client = scope.get("client")
+    return client[0] if client else "unknown"
+
+
+def get_telegram_id(scope: Scope) -> Optional[str]:
+    """So'rov egasining telegram_id si: faqat tekshirilgan Bearer token dan"""
+    for name, value in scope.get("headers", []):
+        if name == b"authorization":
+            authorization = value.decode("latin-1")
+            if authorization.lower().startswith("bearer "):
+                payload = decode_token(authorization[7:])
+                if payload is not None:
+                    return payload.sub
+            break
+    return None
+
+
+class RateLimitMiddleware:
+    """
+    Rate limiting va load shedding middleware
+
+    - har bir IP va telegram_id uchun alohida token bucket (429 + Retry-After)
+    - bir vaqtdagi so'rovlar soni yoki DB ulanishini kutayotganlar soni
+      chegaradan oshsa 503 + Retry-After
+    """
+
+    def __init__(self, app: ASGIApp, store: Optional[RateLimitStore] = None):
+        self.app = app
+        self.store = store or MemoryRateLimitStore(settings.RATE_LIMIT_MAX_KEYS)
+        self.in_flight = 0
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        path = scope.get("path", "")
+        if (
+            scope["type"] != "http"
+            or not settings.RATE_LIMIT_ENABLED
+            or not path.startswith(settings.API_V1_STR)
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        cost = settings.RATE_LIMIT_ROUTE_COSTS.get(path, 1)
+        wait = await self.store.consume(
+            f"ip:{get_client_ip(scope)}", cost,
+            settings.RATE_LIMIT_IP_RATE, settings.RATE_LIMIT_IP_BURST,
+        )
+        if not wait:
+            telegram_id = get_telegram_id(scope)
+            if telegram_id is not None:
+                wait = await self.store.consume(
+                    f"tg:{telegram_id}", cost,
+                    settings.RATE_LIMIT_USER_RATE, settings.RATE_LIMIT_USER_BURST,
+                )
+        if wait:
+            response = JSONResponse(
+                {"detail": "So'rovlar soni cheklovdan oshdi"},
+                status_code=429,
+                headers={"Retry-After": str(math.ceil(wait))},
+            )
+            await response(scope, receive, send)
+            return
+
+        # Uzoq ochiq turadigan ulanishlar (SSE) bir vaqtdagi so'rovlarga qo'shilmaydi
+        if path in settings.LOAD_SHED_EXEMPT_PATHS:
+            await self.app(scope, receive, send)
+            return
+
+        if self._overloaded():
+            logger.warning(f"Load shedding: {path} (in flight: {self.in_flight})")
+            response = JSONResponse(
+                {"detail": "Server band, keyinroq urinib ko'ring"},
+                status_code=503,
+                headers={"Retry-After": str(settings.LOAD_SHED_RETRY_AFTER)},
+            )
+            await response(scope, receive, send)
+            return
+
+        self.in_flight += 1
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.in_flight -= 1
+
+    def _overloaded(self) -> bool:
+        if self.in_flight >= settings.LOAD_SHED_MAX_CONCURRENCY:
+            return True
+
+        # Pul to'la bo'lsa, undan ortiq so'rovlar ulanish kutayotgan deb hisoblanadi
+        pool = engine.pool
+        size = getattr(pool, "size", None)
+        if size is None:
+            return False
+        capacity = size() + max(settings.DB_MAX_OVERFLOW, 0)
+        if pool.checkedout() < capacity:
+            return False
+        return self.in_flight - capacity >= settings.LOAD_SHED_DB_QUEUE_THRESHOLD
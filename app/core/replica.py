@@ -0,0 +1,147 @@
+"""
+O'qish replikasiga yo'naltirish
+
+Faqat o'qiydigan endpointlar get_read_db orqali replika sessiyasini oladi.
+Primary ga qaytiladigan holatlar:
+- replika sozlanmagan (DB_READ_URL yo'q) yoki lag tekshiruvi xato berdi;
+- replika DB_READ_MAX_LAG dan ko'proq ortda qolgan;
+- so'rov egasi oxirgi DB_READ_STICKY_WINDOW sekund ichida yozgan
+  (read-your-writes). Yozuvchilar shu jarayonda telegram_id bo'yicha va
+  boshqa jarayonlar uchun cookie orqali eslab qolinadi.
+"""
+import asyncio
+import logging
+from typing import Optional
+
+from fastapi import Request
+from sqlalchemy import text
+from sqlalchemy.orm import sessionmaker
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.cache import TTLCache
+from app.core.ratelimit import get_telegram_id
+from app.core.settings import settings
+from app.database import AsyncSessionLocal, ReadSessionLocal, engine, read_engine
+
+logger = logging.getLogger("app.replica")
+
+READ_PRIMARY_COOKIE = "ishbor_read_primary"
+SAFE_METHODS = {"GET", "HEAD", "OPTIONS"}
+
+# Replikada: oxirgi qabul qilingan WAL ham qo'llangan bo'lsa lag 0 (bo'sh primary
+# da pg_last_xact_replay_timestamp eskirib qoladi), aks holda oxirgi tranzaksiyadan beri vaqt
+REPLICA_LAG_SQL = text("""
+SELECT CASE
+    WHEN NOT pg_is_in_recovery() THEN 0
+    WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+    ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+END
+""")
+
+
+class ReplicaRouter:
+    """Replika holatini kuzatib, so'rov uchun sessiya fabrikasini tanlash"""
+
+    def __init__(self, max_lag: float, check_interval: float, sticky_window: float):
+        self.enabled = read_engine is not engine
+        self.max_lag = max_lag
+        self.check_interval = check_interval
+        self.sticky_window = sticky_window
+        self.lag: Optional[float] = None  # None - hali tekshirilmagan yoki xato
+        self._writers = TTLCache(maxsize=settings.USER_CACHE_SIZE, ttl=sticky_window)
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def available(self) -> bool:
+        return self.enabled and self.lag is not None and self.lag <= self.max_lag
+
+    def mark_write(self, telegram_id: Optional[str]) -> None:
+        if telegram_id is not None:
+            self._writers.set(telegram_id, True)
+
+    def session_factory(self, request: Optional[Request] = None) -> sessionmaker:
+        if not self.available:
+            return AsyncSessionLocal
+        if request is not None:
+            if request.cookies.get(READ_PRIMARY_COOKIE):
+                return AsyncSessionLocal
+            telegram_id = get_telegram_id(request.scope)
+            if telegram_id is not None and self._writers.get(telegram_id):
+                return AsyncSessionLocal
+        return ReadSessionLocal
+
+    async def check_lag(self) -> None:
+        try:
+            async with read_engine.connect() as conn:
+                self.lag = float((await conn.execute(REPLICA_LAG_SQL)).scalar())
+        except Exception as e:
+            if self.lag is not None:
+                logger.warning(f"Replika mavjud emas, so'rovlar primary ga: {str(e)}")
+            self.lag = None
+            return
+        if self.lag > self.max_lag:
+            logger.warning(f"Replika {self.lag:.1f}s ortda, so'rovlar primary ga")
+
+    async def _run(self) -> None:
+        while True:
+            await self.check_lag()
+            await asyncio.sleep(self.check_interval)
+
+    async def start(self) -> None:
+        if self.enabled and self._task is None:
+            await self.check_lag()
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+replica_router = ReplicaRouter(
+    max_lag=settings.DB_READ_MAX_LAG,
+    check_interval=settings.DB_READ_LAG_CHECK_INTERVAL,
+    sticky_window=settings.DB_READ_STICKY_WINDOW,
+)
+
+
+async def get_read_db(request: Request):
+    """Faqat o'qiydigan endpointlar uchun sessiya (replika yoki primary)"""
+    async with replica_router.session_factory(request)() as db:
+        try:
+            yield db
+        finally:
+            await db.close()
+
+
+class ReadYourWritesMiddleware:
+    """
+    Muvaffaqiyatli yozuvchi so'rovdan keyin shu foydalanuvchini primary ga bog'lash
+
+    telegram_id shu jarayonda eslab qolinadi, boshqa jarayonlar uchun esa
+    qisqa muddatli cookie qo'yiladi.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["method"] in SAFE_METHODS or not replica_router.enabled:
+            await self.app(scope, receive, send)
+            return
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start" and message["status"] < 400:
+                replica_router.mark_write(get_telegram_id(scope))
+                cookie = (
+                    f"{READ_PRIMARY_COOKIE}=1; Max-Age={int(replica_router.sticky_window)}; "
+                    f"Path=/; HttpOnly; SameSite=Lax"
+                )
+                message["headers"] = [*message.get("headers", []), (b"set-cookie", cookie.encode("latin-1"))]
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
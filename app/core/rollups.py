@@ -0,0 +1,109 @@
+"""
+Statistika rollup jadvallari
+
+Ro'yxatdan o'tishlar, ishchilar, fikrlar va yangilik ko'rishlari soni kunlik
+(va oxirgi kunlar uchun soatlik) jadvallarga yig'iladi. Har bir metrika uchun
+watermark (hisoblangan oxirgi id) saqlanadi, shuning uchun har safar faqat
+yangi qatorlar o'qiladi. Watermark qatori tranzaksiya davomida qulflanadi:
+bir nechta jarayon bir qatorni ikki marta hisoblamaydi.
+
+id lar commit tartibida ko'rinmaydi (uzoq import tranzaksiyasi kichik id larni
+keyinroq commit qilishi mumkin), shuning uchun yangi chegara avval `pending`
+sifatida yoziladi va o'qilgan snapshot dagi barcha tranzaksiyalar tugagach
+(txid_snapshot_xmin >= pending_xmax) hisoblanadi.
+"""
+import asyncio
+import logging
+from datetime import date, datetime, time, timedelta
+from typing import Any, Dict, Optional, Tuple
+
+from app.core.settings import settings
+from app.crud import stats as stats_crud
+from app.database import AsyncSessionLocal
+from app.models.models import Feedback, NewsView, User, Worker
+
+logger = logging.getLogger("app.rollups")
+
+# metrika -> (manba jadval id si, yaratilgan vaqti)
+ROLLUP_METRICS: Dict[str, Tuple[Any, Any]] = {
+    "users": (User.id, User.created),
+    "workers": (Worker.id, Worker.created_at),
+    "feedbacks": (Feedback.id, Feedback.create_at),
+    "news_views": (NewsView.id, NewsView.created_at),
+}
+
+
+def hourly_start(hourly_days: int) -> datetime:
+    """Soatlik rollup saqlanadigan davr boshi"""
+    return datetime.combine(date.today() - timedelta(days=hourly_days - 1), time.min)
+
+
+class StatsRollup:
+    """
+    Rollup jadvallarini davriy yangilovchi fon vazifasi
+
+    Har bir partiya kamida bitta interval kechikib hisoblanadi: chegara
+    o'qilgandan keyin ochiq qolgan tranzaksiyalar tugashi kutiladi.
+    """
+
+    def __init__(self, interval: float, hourly_days: int):
+        self.interval = interval
+        self.hourly_days = hourly_days
+        self._task: Optional[asyncio.Task] = None
+
+    async def roll_metric(self, metric: str) -> int:
+        """Bitta metrikaning yakunlangan qatorlarini qo'shish. Yangi watermark qaytariladi"""
+        id_column, time_column = ROLLUP_METRICS[metric]
+        async with AsyncSessionLocal() as db:
+            watermark = await stats_crud.lock_watermark(db, metric)
+            last_id = watermark.last_id
+            pending = watermark.pending_id is not None
+            if pending and await stats_crud.get_snapshot_xmin(db) >= watermark.pending_xmax:
+                # pending_id gacha bo'lgan barcha qatorlar commit yoki rollback bo'lgan
+                await stats_crud.apply_rollup(
+                    db, metric, id_column, time_column, last_id, watermark.pending_id,
+                    hourly_start(self.hourly_days),
+                )
+                await stats_crud.set_watermark(db, metric, watermark.pending_id)
+                last_id = watermark.pending_id
+                pending = False
+            if not pending:
+                candidate = await stats_crud.get_rollup_candidate(db, id_column, last_id)
+                if candidate.id is not None:
+                    await stats_crud.set_pending(db, metric, candidate.id, candidate.xmax)
+            await db.commit()
+        return last_id
+
+    async def run(self) -> None:
+        for metric in ROLLUP_METRICS:
+            await self.roll_metric(metric)
+        async with AsyncSessionLocal() as db:
+            await stats_crud.prune_hourly(db, hourly_start(self.hourly_days))
+            await db.commit()
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.run()
+            except Exception as e:
+                logger.error(f"Statistika rollup xatolik: {str(e)}")
+            await asyncio.sleep(self.interval)
+
+    async def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+stats_rollup = StatsRollup(
+    interval=settings.STATS_ROLLUP_INTERVAL,
+    hourly_days=settings.STATS_HOURLY_DAYS,
+)
@@ -1,13 +1,16 @@
 from datetime import datetime, timedelta
-from typing import Any, Optional, Union
-from fastapi import Depends, HTTPException, status
+from typing import Any, Dict, Optional, Union
+from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
+from pydantic import ValidationError
 from sqlalchemy.orm import Session
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.core.settings import settings
 from app.database import get_db
 from app.crud import user as user_crud
+from app.core.cache import token_versions, user_cache
+from app.schemas.schemas import TokenClaims, TokenPayload, UserOut
 
 from fastapi.security import OAuth2PasswordBearer
 
@@ -19,7 +22,11 @@ oauth2_scheme = OAuth2PasswordBearer(
 )
 
 
-def create_access_token(subject: Union[str, Any], expires_delta: Optional[timedelta] = None) -> str:
+def create_access_token(
+    subject: Union[str, Any],
+    expires_delta: Optional[timedelta] = None,
+    claims: Optional[Dict[str, Any]] = None,
+) -> str:
     
     if expires_delta:
         expire = datetime.utcnow() + expires_delta
@@ -29,34 +36,88 @@ def create_access_token(subject: Union[str, Any], expires_delta: Optional[timede
     # JWT payload
     to_encode = {"exp": expire, "sub": str(subject)}
 
+    # Qo'shimcha claimlar (uid, wrk, nam, ver) - bazaga murojaatsiz autentifikatsiya uchun
+    if claims:
+        to_encode.update(claims)
+
     # Token yaratish
     encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
     return encoded_jwt
 
 
-def verify_token(token: str) -> Optional[str]:
+def user_claims(user: Any) -> Dict[str, Any]:
+    """Foydalanuvchi uchun tokenga yoziladigan claimlar"""
+    return {
+        "uid": user.id,
+        "wrk": bool(user.is_worker),
+        "nam": user.name,
+        "ver": token_versions.get(user.id),
+    }
+
+
+def decode_token(token: str) -> Optional[TokenPayload]:
     
     try:
         # Tokenni dekodlash
-        payload = jwt.decode(
+        payload = TokenPayload(**jwt.decode(
             token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM]
-        )
-        telegram_id: str = payload.get("sub")
+        ))
+    except (JWTError, ValidationError):
+        return None
 
-        # Muddati o'tganligini tekshirish
-        expire = payload.get("exp")
-        if expire is None or datetime.utcnow() > datetime.fromtimestamp(expire):
-            return None
+    # Muddati o'tganligini tekshirish
+    expire = payload.exp
+    if payload.sub is None or expire is None or datetime.utcnow() > datetime.fromtimestamp(expire):
+        return None
 
-        return telegram_id
-    except JWTError:
+    # Bekor qilingan tokenlarni rad etish
+    if payload.uid is not None and payload.ver < token_versions.get(payload.uid):
         return None
 
+    return payload
+
+
+def verify_token(token: str) -> Optional[str]:
+    payload = decode_token(token)
+    return payload.sub if payload else None
+
+
+async def get_user_record(
+    db: AsyncSession,
+    telegram_id: str,
+    request: Optional[Request] = None,
+) -> Optional[UserOut]:
+    """
+    Foydalanuvchini cache orqali olish
+
+    Avval so'rov doirasidagi (request.state), keyin jarayon ichidagi TTL cache
+    tekshiriladi; topilmasa bazadan olinib, yengil UserOut yozuvi saqlanadi.
+    """
+    request_users = None
+    if request is not None:
+        request_users = getattr(request.state, "users", None)
+        if request_users is None:
+            request_users = request.state.users = {}
+        if telegram_id in request_users:
+            return request_users[telegram_id]
+
+    record = user_cache.get(telegram_id)
+    if record is None:
+        user = await user_crud.get_user_by_telegram_id(db, telegram_id=telegram_id)
+        if user is not None:
+            record = UserOut.model_validate(user)
+            user_cache.set(telegram_id, record)
+
+    if request_users is not None:
+        request_users[telegram_id] = record
+    return record
+
 
 async def get_current_user(
+    request: Request,
     token: str = Depends(oauth2_scheme),
     db: AsyncSession = Depends(get_db)
-):
+) -> UserOut:
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -68,13 +129,50 @@ async def get_current_user(
     if telegram_id is None:
         raise credentials_exception
 
-    # Foydalanuvchini topish (asynchronous)
-    user = await user_crud.get_user_by_telegram_id(db, telegram_id=telegram_id)
+    # Foydalanuvchini topish (cache orqali)
+    user = await get_user_record(db, telegram_id, request=request)
     if user is None:
         raise credentials_exception
 
     return user
 
-async def get_current_active_user(current_user=Depends(get_current_user)):
+async def get_current_claims(
+    request: Request,
+    token: str = Depends(oauth2_scheme),
+    db: AsyncSession = Depends(get_db)
+) -> TokenClaims:
+    """
+    Joriy foydalanuvchini token claimlaridan olish
+
+    Faqat `id` kerak bo'lgan endpointlar uchun: imzo va versiya tekshirilgan
+    claimlarga ishoniladi, bazaga murojaat qilinmaydi. `uid` claimi yo'q eski
+    tokenlar uchun get_current_user kabi foydalanuvchi qidiriladi.
+    """
+    credentials_exception = HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Could not validate credentials",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+
+    payload = decode_token(token)
+    if payload is None:
+        raise credentials_exception
+
+    if payload.uid is None:
+        user = await get_user_record(db, payload.sub, request=request)
+        if user is None:
+            raise credentials_exception
+        return TokenClaims(id=user.id, telegram_id=user.telegram_id, is_worker=user.is_worker, name=user.name)
+
+    return TokenClaims(id=payload.uid, telegram_id=payload.sub, is_worker=payload.wrk, name=payload.nam)
+
+
+async def get_current_active_user(current_user: UserOut = Depends(get_current_user)) -> UserOut:
+
+    return current_user
 
-    return current_user
\ No newline at end of file
+async def get_current_admin_claims(claims: TokenClaims = Depends(get_current_claims)) -> TokenClaims:
+    """Faqat ADMIN_TELEGRAM_IDS dagi foydalanuvchilar uchun (diagnostika endpointlari)"""
+    if claims.telegram_id not in settings.ADMIN_TELEGRAM_IDS:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Ruxsat yo'q")
+    return claims
@@ -3,7 +3,7 @@ from typing import Any, Dict, List, Optional, Union
 from pathlib import Path
 import os
 from pydantic_settings import BaseSettings
-from pydantic import field_validator
+from pydantic import Field, field_validator
 
 
 class Settings(BaseSettings):
@@ -26,13 +26,13 @@ class Settings(BaseSettings):
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 1440  # 24 soat
 
     # Database sozlamalari
-    DB_TYPE: str = "sqlite"
+    DB_TYPE: str = "postgresql"
     DB_USER: Optional[str] = "postgres"
-    DB_PASSWORD: Optional[str] = "postgres"
+    DB_PASSWORD: Optional[str] = "Lazizbek1"
     DB_HOST: Optional[str] = "localhost"
     DB_PORT: Optional[str] = "5432"
-    DB_NAME: Optional[str] = "ishbor_db"
-    SQLALCHEMY_DATABASE_URL: Optional[str] = None
+    DB_NAME: Optional[str] = "baza"
+    SQLALCHEMY_DATABASE_URL: Optional[str] = Field(None, validate_default=True)
 
     @field_validator("SQLALCHEMY_DATABASE_URL", mode="before")
     def assemble_db_connection(cls, v: Optional[str], info) -> Any:
@@ -52,6 +52,32 @@ class Settings(BaseSettings):
             # SQLite (default)
             return f"sqlite:///{values.get('BASE_DIR') / 'ishbor.db'}"
 
+    # Async engine va ulanishlar puli
+    DB_ECHO: bool = False  # har bir SQL so'rovni log qilish (faqat debug uchun)
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 20
+    DB_POOL_TIMEOUT: float = 30.0  # sekund, bo'sh ulanishni kutish
+    DB_POOL_RECYCLE: int = 3600  # sekund
+    DB_POOL_PRE_PING: bool = True
+    DB_STATEMENT_CACHE_SIZE: int = 500  # pgbouncer (transaction rejimi) orqasida 0
+    DB_STATEMENT_TIMEOUT: int = 60000  # ms, 0 - cheklovsiz
+    DB_APPLICATION_NAME: str = "ishbor-api"  # pg_stat_activity da ko'rinadi
+    # Sekin so'rovlar jurnali (EXPLAIN bilan, /utils/db/slow-queries)
+    DB_SLOW_QUERY_THRESHOLD: float = 0.5  # sekund, 0 - o'chirilgan
+    DB_SLOW_QUERY_INTERVAL: float = 300.0  # sekund, bitta fingerprint shu oraliqda bir marta yoziladi
+    DB_SLOW_QUERY_BUFFER: int = 100  # xotirada saqlanadigan oxirgi sekin so'rovlar
+    DB_SLOW_QUERY_EXPLAIN_CONCURRENCY: int = 2  # bir vaqtda bajariladigan EXPLAIN lar
+    # Relationship larni lazy="raise" qilish: yashirin N+1 so'rovlar xato beradi (testlar uchun)
+    DB_STRICT_LAZY_LOADS: bool = False
+
+    # O'qish replikasi (faqat o'qiydigan GET endpointlar uchun)
+    DB_READ_URL: Optional[str] = None  # berilmasa barcha so'rovlar primary ga boradi
+    DB_READ_POOL_SIZE: int = 10
+    DB_READ_MAX_OVERFLOW: int = 20
+    DB_READ_MAX_LAG: float = 5.0  # sekund, bundan ortda qolgan replika ishlatilmaydi
+    DB_READ_LAG_CHECK_INTERVAL: float = 2.0  # sekund
+    DB_READ_STICKY_WINDOW: float = 5.0  # sekund, yozgan foydalanuvchi shuncha vaqt primary dan o'qiydi
+
     # Static va media fayllar sozlamalari
     STATIC_URL: str = "/static/"
     STATIC_DIR: Path = BASE_DIR / "static"
@@ -66,11 +92,115 @@ class Settings(BaseSettings):
 
     # Fayl yuklash sozlamalari
     MAX_UPLOAD_SIZE: int = 10 * 1024 * 1024  # 10 MB
+    MAX_REQUEST_BODY_SIZE: int = 11 * 1024 * 1024  # multipart so'rov: fayl + forma maydonlari
     ALLOWED_IMAGE_TYPES: List[str] = ["image/jpeg", "image/png", "image/gif"]
 
+    # Ishchilarni CSV/XLSX dan ommaviy import qilish
+    WORKER_IMPORT_MAX_SIZE: int = 50 * 1024 * 1024  # 50 MB
+    WORKER_IMPORT_MAX_ERRORS: int = 1000  # javobda qaytariladigan xatoli qatorlar soni
+    # Odatiy chegaradan kattaroq multipart so'rov qabul qiladigan endpointlar
+    REQUEST_BODY_SIZE_OVERRIDES: Dict[str, int] = {
+        "/api/v1/workers/import": 51 * 1024 * 1024,
+    }
+
+    # Rasm variantlari: nomi -> eng katta tomon (px)
+    IMAGE_VARIANTS: Dict[str, int] = {"thumb": 128, "card": 480, "full": 1280}
+    IMAGE_WEBP_QUALITY: int = 80
+    IMAGE_JPEG_QUALITY: int = 85
+    IMAGE_MAX_PIXELS: int = 40_000_000  # dekompressiya bombalariga qarshi
+    IMAGE_PROCESS_WORKERS: int = 2  # rasmlarni qayta ishlovchi jarayonlar soni
+
+    # Kontent-manzilli media: fayl nomi o'zgarmaydi, shuning uchun uzoq cache
+    MEDIA_CACHE_MAX_AGE: int = 365 * 24 * 3600  # sekund
+    MEDIA_SWEEP_INTERVAL: int = 3600  # sekund, ishlatilmayotgan fayllarni tozalash
+    MEDIA_SWEEP_GRACE: int = 3600  # sekund, yangi fayllar DB ga yozilguncha o'chirilmaydi
+
+    # Media fayllarni berish: "app" (ASGI server pathsend qo'llasa sendfile orqali)
+    # yoki "accel" (baytlarni nginx X-Accel-Redirect orqali beradi)
+    MEDIA_SERVE_MODE: str = "app"
+    MEDIA_ACCEL_PREFIX: str = "/_protected"  # nginx dagi `internal` location
+    MEDIA_PRECOMPRESSED: bool = True  # .br / .gz nusxalari bo'lsa shularni berish
+
+    # Fon vazifalari navbati
+    JOB_CONCURRENCY: int = 4  # bir vaqtda bajariladigan vazifalar
+    JOB_MAX_ATTEMPTS: int = 5
+    JOB_BACKOFF_BASE: float = 2.0  # sekund, har urinishda ikki baravar oshadi
+    JOB_BACKOFF_MAX: float = 300.0
+    JOB_LEASE: int = 300  # sekund, shu vaqtda tugamagan vazifani boshqa jarayon oladi
+    JOB_POLL_INTERVAL: int = 30  # sekund, bazadagi kutayotgan vazifalarni tekshirish
+    JOB_DRAIN_TIMEOUT: int = 30  # sekund, to'xtashda navbat bo'shashini kutish
+    # Hostga bog'langan vazifalar (lokal spool fayllari) uchun nom. None - socket.gethostname()
+    JOB_HOST: Optional[str] = None
+    # Fon vazifasi qayta ishlaydigan yuklangan fayllar (media papkasidan tashqarida)
+    UPLOAD_SPOOL_DIR: Path = BASE_DIR / "spool" / "uploads"
+
+    # Fon rejimidagi eksportlar (POST /utils/exports)
+    EXPORT_DIR: Path = MEDIA_ROOT / "exports"
+    EXPORT_PROCESS_WORKERS: int = 1  # eksport fayllarini yozuvchi jarayonlar soni
+    EXPORT_REUSE_WINDOW: int = 300  # sekund, shu vaqt ichida tugagan bir xil eksport qayta ishlatiladi
+    EXPORT_FILE_TTL: int = 24 * 3600  # sekund, tayyor fayllar shundan keyin o'chiriladi
+    EXPORT_PROGRESS_INTERVAL: float = 1.0  # sekund, progress bazaga yozilish oralig'i
+    EXPORT_STALE_AFTER: int = 120  # sekund, progress yangilanmasa eksport qayta boshlanadi
+
+    # Ishchilar o'zgarishlari feed i (/workers/changes)
+    WORKER_CHANGES_PAGE_SIZE: int = 500
+    WORKER_CHANGES_MAX_PAGE_SIZE: int = 5000
+
+    # /utils/stats/system snapshoti
+    STATS_REFRESH_INTERVAL: int = 60  # sekund, fonda qayta hisoblash
+    STATS_MAX_AGE: int = 180  # sekund, shundan eski snapshot so'rov paytida yangilanadi
+    STATS_TOP_LIMIT: int = 10  # top_skills / top_languages uzunligi
+
+    # Kunlik/soatlik rollup jadvallari (/utils/stats/series)
+    STATS_ROLLUP_INTERVAL: int = 300  # sekund, yangi qatorlarni rollupga qo'shish
+    STATS_HOURLY_DAYS: int = 2  # soatlik rollup saqlanadigan kunlar (bugun va kecha)
+    STATS_SERIES_MAX_DAYS: int = 1100  # bitta so'rovdagi kunlar soni chegarasi
+
+    # Batch endpointlar (/workers/batch, /users/batch) uchun ID lar soni chegarasi
+    BATCH_MAX_IDS: int = 500
+
+    # Autentifikatsiya cache sozlamalari
+    USER_CACHE_TTL: int = 30  # sekund
+    USER_CACHE_SIZE: int = 10000
+    PROFILE_CACHE_TTL: int = 60  # sekund, /users/me va /workers/me
+    PROFILE_CACHE_SIZE: int = 10000
+    TOKEN_VERSION_REFRESH_INTERVAL: int = 30  # sekund, bekor qilingan tokenlar jadvali
+
+    # Rate limiting (token bucket) sozlamalari
+    RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMIT_IP_RATE: float = 10.0  # sekundiga to'ldiriladigan tokenlar
+    RATE_LIMIT_IP_BURST: int = 40
+    RATE_LIMIT_USER_RATE: float = 5.0
+    RATE_LIMIT_USER_BURST: int = 20
+    RATE_LIMIT_MAX_KEYS: int = 100000  # xotiradagi bucketlar soni chegarasi
+    # Ilova oldidagi ishonchli proxylar soni (nginx - 1). 0 - X-Forwarded-For hisobga olinmaydi
+    TRUSTED_PROXY_COUNT: int = 0
+    # Og'ir endpointlar narxi (qolganlari 1 token)
+    RATE_LIMIT_ROUTE_COSTS: Dict[str, int] = {
+        "/api/v1/utils/export/workers": 20,
+        "/api/v1/workers/workers/filter/": 5,
+        "/api/v1/users/user_check": 3,
+        "/api/v1/workers/import": 20,
+        "/api/v1/utils/exports": 5,
+    }
+
+    # Load shedding sozlamalari
+    LOAD_SHED_MAX_CONCURRENCY: int = 200  # bir vaqtdagi API so'rovlari
+    LOAD_SHED_DB_QUEUE_THRESHOLD: int = 50  # DB ulanishini kutayotgan so'rovlar
+    LOAD_SHED_RETRY_AFTER: int = 1  # sekund
+    LOAD_SHED_EXEMPT_PATHS: List[str] = ["/api/v1/news/stream"]  # uzoq ochiq turadigan ulanishlar
+
+    # Real-time yangiliklar (SSE) sozlamalari
+    NEWS_EVENTS_CHANNEL: str = "ishbor_news"  # PostgreSQL LISTEN/NOTIFY kanali
+    NEWS_STREAM_HEARTBEAT: int = 20  # sekund, proxy ulanishni uzmasligi uchun
+    NEWS_STREAM_MAX_PENDING: int = 10  # bitta ulanishda saqlanadigan yangiliklar soni
+
     # Vaqt mintaqasi
     TIMEZONE: str = "Asia/Tashkent"
 
+    # Diagnostika endpointlariga kira oladigan foydalanuvchilar (telegram_id)
+    ADMIN_TELEGRAM_IDS: List[str] = []
+
     # Ruxsat berilgan hostlar
     ALLOWED_HOSTS: List[str] = ["*"]
 
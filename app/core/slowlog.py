@@ -0,0 +1,166 @@
+"""
+Sekin SQL so'rovlar jurnali
+
+DB_SLOW_QUERY_THRESHOLD dan uzoq bajarilgan statement lar logga yoziladi va
+ularning rejasi fonda `EXPLAIN (ANALYZE false, FORMAT JSON)` bilan olinadi
+(so'rov qayta bajarilmaydi). Bir xil fingerprint (parametrlarsiz SQL) bir
+oraliqda faqat bir marta yoziladi, qolganlari hisoblanadi. Oxirgi yozuvlar
+cheklangan ring bufferda saqlanadi.
+"""
+import asyncio
+import contextvars
+import hashlib
+import json
+import logging
+import re
+import time
+from collections import deque
+from datetime import datetime, timezone
+from typing import Any, Deque, Dict, List, Optional
+
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.core.settings import settings
+
+logger = logging.getLogger("app.sql.slow")
+
+EXPLAINABLE = ("select", "insert", "update", "delete", "with")
+_PLACEHOLDER = re.compile(r"\$\d+(::[\w\s\[\]]+?)?(?=[\s,)]|$)")
+_PLACEHOLDER_LIST = re.compile(r"\?(\s*,\s*\?)+")
+_NUMBER = re.compile(r"\b\d+\b")
+
+
+def query_fingerprint(statement: str) -> str:
+    """Parametrlar, IN ro'yxati uzunligi va bo'shliqlarsiz SQL xeshi"""
+    normalized = _PLACEHOLDER.sub("?", " ".join(statement.split()).lower())
+    normalized = _PLACEHOLDER_LIST.sub("?...", _NUMBER.sub("?", normalized))
+    return hashlib.sha1(normalized.encode("utf-8")).hexdigest()[:16]
+
+
+def parameter_shape(parameters: Any) -> List[str]:
+    """Parametr qiymatlari o'rniga ularning turi (va ketma-ketliklar uzunligi)"""
+    if parameters is None:
+        return []
+    if isinstance(parameters, dict):
+        parameters = parameters.values()
+    shape = []
+    for value in parameters:
+        name = type(value).__name__
+        if isinstance(value, (str, bytes, list, tuple)):
+            name = f"{name}[{len(value)}]"
+        shape.append(name)
+    return shape
+
+
+def _plan_summary(plan: Any) -> str:
+    try:
+        node = plan[0]["Plan"]
+        return f"{node['Node Type']} (cost={node['Total Cost']}, rows={node['Plan Rows']})"
+    except (LookupError, TypeError):
+        return ""
+
+
+class SlowQueryLog:
+    """Sekin so'rovlarni aniqlash, EXPLAIN olish va ring bufferda saqlash"""
+
+    def __init__(self, threshold: float, interval: float, size: int, explain_concurrency: int):
+        self.threshold = threshold
+        self.interval = interval
+        self.explain_concurrency = explain_concurrency
+        self.entries: Deque[Dict[str, Any]] = deque(maxlen=size)
+        self._last_logged: Dict[str, float] = {}  # fingerprint -> time.monotonic()
+        self._suppressed: Dict[str, int] = {}
+        self._explaining = 0
+        self._tasks = set()
+
+    def observe(
+            self,
+            engine: AsyncEngine,
+            statement: str,
+            parameters: Any,
+            duration: float,
+            endpoint: Optional[str],
+            executemany: bool,
+    ) -> None:
+        """after_cursor_execute dan chaqiriladi (sinxron, tez qaytishi kerak)"""
+        if not self.threshold or duration < self.threshold:
+            return
+        if statement.lstrip()[:7].upper() == "EXPLAIN":
+            return  # o'zimizning EXPLAIN so'rovlarimiz
+        fingerprint = query_fingerprint(statement)
+        now = time.monotonic()
+        last = self._last_logged.get(fingerprint)
+        if last is not None and now - last < self.interval:
+            self._suppressed[fingerprint] = self._suppressed.get(fingerprint, 0) + 1
+            return
+        self._last_logged[fingerprint] = now
+        if len(self._last_logged) > self.entries.maxlen * 10:
+            # Eski fingerprintlar cheksiz yig'ilmasin
+            cutoff = now - self.interval
+            self._last_logged = {key: value for key, value in self._last_logged.items() if value >= cutoff}
+
+        entry = {
+            "fingerprint": fingerprint,
+            "statement": statement,
+            "parameters": parameter_shape(parameters if not executemany else None),
+            "duration": round(duration, 4),
+            "endpoint": endpoint,
+            "suppressed": self._suppressed.pop(fingerprint, 0),  # oldingi yozuvdan beri o'tkazib yuborilganlar
+            "captured_at": datetime.now(timezone.utc),
+            "plan": None,
+            "plan_error": None,
+        }
+        self.entries.append(entry)
+        logger.warning(
+            f"Slow query {duration:.3f}s [{fingerprint}] {endpoint or '-'} "
+            f"params={entry['parameters']}: {' '.join(statement.split())[:500]}"
+        )
+
+        explainable = (
+            not executemany
+            and statement.lstrip().split(None, 1)[0].lower() in EXPLAINABLE
+        )
+        if not explainable:
+            entry["plan_error"] = "EXPLAIN qo'llanmaydi"
+        elif self._explaining >= self.explain_concurrency:
+            entry["plan_error"] = "EXPLAIN navbati to'la"
+        else:
+            try:
+                loop = asyncio.get_running_loop()
+            except RuntimeError:
+                entry["plan_error"] = "Event loop yo'q"
+                return
+            self._explaining += 1
+            # Bo'sh context: EXPLAIN so'rovi joriy HTTP so'rovning SQL statistikasiga qo'shilmaydi
+            task = loop.create_task(
+                self._explain(engine, entry, statement, parameters), context=contextvars.Context()
+            )
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _explain(self, engine: AsyncEngine, entry: Dict[str, Any], statement: str, parameters: Any) -> None:
+        try:
+            async with engine.connect() as conn:
+                result = await conn.exec_driver_sql(
+                    f"EXPLAIN (ANALYZE false, FORMAT JSON) {statement}", parameters if parameters else ()
+                )
+                plan = result.scalar()
+                await conn.rollback()
+            entry["plan"] = json.loads(plan) if isinstance(plan, str) else plan
+            logger.warning(f"Slow query [{entry['fingerprint']}] plan: {_plan_summary(entry['plan'])}")
+        except Exception as e:
+            entry["plan_error"] = str(e)
+        finally:
+            self._explaining -= 1
+
+    def snapshot(self) -> List[Dict[str, Any]]:
+        """Eng yangisi birinchi"""
+        return list(reversed(self.entries))
+
+
+slow_query_log = SlowQueryLog(
+    threshold=settings.DB_SLOW_QUERY_THRESHOLD,
+    interval=settings.DB_SLOW_QUERY_INTERVAL,
+    size=settings.DB_SLOW_QUERY_BUFFER,
+    explain_concurrency=settings.DB_SLOW_QUERY_EXPLAIN_CONCURRENCY,
+)
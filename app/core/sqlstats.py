@@ -0,0 +1,90 @@
+"""
+So'rov bo'yicha SQL statistikasi
+
+Engine eventlari har bir SQL so'rovning vaqtini o'lchaydi va joriy HTTP
+so'rovning hisoblagichiga (ContextVar) qo'shadi: so'rovlar soni, umumiy DB
+vaqti va eng sekin statement. LogMiddleware bularni access logga va DEBUG
+rejimida javob headerlariga yozadi. Sekin statement lar slow_query_log ga ham beriladi.
+"""
+import time
+from contextvars import ContextVar
+from typing import Dict, Optional
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.core.slowlog import slow_query_log
+
+SLOWEST_STATEMENT_LENGTH = 200  # header va log uchun qisqartirilgan SQL
+
+
+class RequestSQLStats:
+    __slots__ = ("endpoint", "count", "total_time", "slowest_time", "slowest_statement")
+
+    def __init__(self, endpoint: Optional[str] = None):
+        self.endpoint = endpoint
+        self.count = 0
+        self.total_time = 0.0
+        self.slowest_time = 0.0
+        self.slowest_statement: Optional[str] = None
+
+    def add(self, statement: str, duration: float) -> None:
+        self.count += 1
+        self.total_time += duration
+        if duration > self.slowest_time:
+            self.slowest_time = duration
+            self.slowest_statement = statement
+
+    @property
+    def slowest_summary(self) -> str:
+        """Bir qatorli, qisqartirilgan eng sekin statement"""
+        if self.slowest_statement is None:
+            return ""
+        summary = " ".join(self.slowest_statement.split())
+        if len(summary) > SLOWEST_STATEMENT_LENGTH:
+            summary = summary[:SLOWEST_STATEMENT_LENGTH] + "..."
+        return summary
+
+    def headers(self) -> Dict[str, str]:
+        return {
+            "X-DB-Query-Count": str(self.count),
+            "X-DB-Time": f"{self.total_time:.4f}",
+            "X-DB-Slowest": f"{self.slowest_time:.4f} {self.slowest_summary}".strip().encode("ascii", "replace").decode(),
+        }
+
+
+_request_stats: ContextVar[Optional[RequestSQLStats]] = ContextVar("request_sql_stats", default=None)
+
+
+def start_request_stats(endpoint: Optional[str] = None) -> RequestSQLStats:
+    """
+    Joriy so'rov uchun hisoblagich ochish
+
+    ContextVar so'rovni bajaradigan task larga (va SQLAlchemy greenletlariga)
+    nusxalanadi; obyekt bitta bo'lgani uchun hisoblar shu yerda yig'iladi.
+    """
+    stats = RequestSQLStats(endpoint)
+    _request_stats.set(stats)
+    return stats
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    # Boshlanish vaqti statement ning execution context ida: statement xato bilan
+    # tugasa (after_cursor_execute chaqirilmaydi) u context bilan birga yo'qoladi
+    context._sql_stats_started = time.perf_counter()
+
+
+def instrument_engine(engine: AsyncEngine) -> None:
+    """So'rov statistikasi va sekin so'rovlar jurnali uchun engine eventlarini ulash"""
+
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+        duration = time.perf_counter() - context._sql_stats_started
+        stats = _request_stats.get()
+        if stats is not None:
+            stats.add(statement, duration)
+        slow_query_log.observe(
+            engine, statement, parameters, duration, stats.endpoint if stats is not None else None, executemany
+        )
+
+    event.listen(engine.sync_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine.sync_engine, "after_cursor_execute", after_cursor_execute)
@@ -0,0 +1,127 @@
+"""
+Tizim statistikasi snapshoti
+
+/utils/stats/system dagi agregatlar har so'rovda emas, fon vazifasida davriy
+hisoblanadi va xotiradan beriladi. Snapshot eskirgan bo'lsa ham darhol
+qaytariladi, yangisi esa fonda hisoblanadi (stale-while-revalidate). Bir
+vaqtda faqat bitta hisoblash bajariladi.
+"""
+import asyncio
+import logging
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.settings import settings
+from app.crud import feedback as feedback_crud
+from app.crud import user as user_crud
+from app.crud import worker as worker_crud
+from app.core.replica import replica_router
+
+logger = logging.getLogger("app.stats")
+
+
+async def compute_system_stats(db: AsyncSession) -> Dict[str, Any]:
+    """Barcha agregatlarni bazadan hisoblash"""
+    users_count = await user_crud.get_user_count(db)
+    active_users_count = await user_crud.get_active_user_count(db)
+    worker_stats = await worker_crud.get_worker_statistics(db)
+    feedback_stats = await feedback_crud.get_feedback_statistics(db)
+
+    return {
+        "total_users": users_count,
+        "active_users": active_users_count,
+        "total_workers": worker_stats["total_workers"],
+        "active_workers": worker_stats["active_workers"],
+        "total_feedbacks": feedback_stats["total_feedbacks"],
+        "active_feedbacks": feedback_stats["active_feedbacks"],
+        "average_rating": feedback_stats["average_rating"],
+        "rating_distribution": feedback_stats["rating_distribution"],
+        "payment_distribution": worker_stats["payment_distribution"],
+        "gender_distribution": worker_stats["gender_distribution"],
+        "disability_distribution": worker_stats["disability_distribution"],
+        "top_skills": await worker_crud.get_top_skills(db, settings.STATS_TOP_LIMIT),
+        "top_languages": await worker_crud.get_top_languages(db, settings.STATS_TOP_LIMIT),
+    }
+
+
+class StatsSnapshot:
+    """
+    Xotiradagi statistika snapshoti
+
+    refresh_interval da fonda yangilanadi. So'rov paytida snapshot max_age dan
+    eski bo'lsa (masalan, fon yangilanishi xato bergan bo'lsa) eski qiymat
+    qaytariladi va qayta hisoblash boshlanadi. Snapshot hali yo'q bo'lsa
+    so'rov birinchi hisoblashni kutadi.
+    """
+
+    def __init__(self, refresh_interval: float, max_age: float):
+        self.refresh_interval = refresh_interval
+        self.max_age = max_age
+        self._data: Optional[Dict[str, Any]] = None
+        self._generated_at: Optional[datetime] = None
+        self._refreshed_at = 0.0  # time.monotonic()
+        self._refreshing: Optional[asyncio.Task] = None
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def stale(self) -> bool:
+        return self._data is None or time.monotonic() - self._refreshed_at > self.max_age
+
+    async def refresh(self) -> None:
+        async with replica_router.session_factory()() as db:
+            data = await compute_system_stats(db)
+        self._data = data
+        self._generated_at = datetime.now(timezone.utc)
+        self._refreshed_at = time.monotonic()
+
+    def _revalidate(self) -> asyncio.Task:
+        # Parallel so'rovlar bitta hisoblashni kutadi
+        if self._refreshing is None or self._refreshing.done():
+            self._refreshing = asyncio.create_task(self.refresh())
+            self._refreshing.add_done_callback(self._log_failure)
+        return self._refreshing
+
+    @staticmethod
+    def _log_failure(task: asyncio.Task) -> None:
+        if not task.cancelled() and task.exception() is not None:
+            logger.error(f"Statistikani hisoblashda xatolik: {str(task.exception())}")
+
+    async def get(self) -> Dict[str, Any]:
+        if self._data is None:
+            await asyncio.shield(self._revalidate())
+        elif self.stale:
+            self._revalidate()
+        return {**self._data, "generated_at": self._generated_at}
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self._revalidate()
+            except Exception:
+                pass  # _log_failure yozib qo'yadi
+            await asyncio.sleep(self.refresh_interval)
+
+    async def start(self) -> None:
+        # Birinchi hisoblash fonda: ishga tushish og'ir agregatlarni kutmaydi
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        for task in (self._task, self._refreshing):
+            if task is not None and not task.done():
+                task.cancel()
+                try:
+                    await task
+                except (asyncio.CancelledError, Exception):
+                    pass
+        self._task = None
+        self._refreshing = None
+
+
+system_stats = StatsSnapshot(
+    refresh_interval=settings.STATS_REFRESH_INTERVAL,
+    max_age=settings.STATS_MAX_AGE,
+)
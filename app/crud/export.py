@@ -0,0 +1,130 @@
+from datetime import timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import and_, delete, func, or_, select, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.models import ExportJob
+
+ACTIVE_STATUSES = ("pending", "running")
+
+
+# Export owned by user_id (other users' exports are treated as missing)
+async def get_export(db: AsyncSession, export_id: int, user_id: int) -> Optional[ExportJob]:
+    result = await db.execute(
+        select(ExportJob).where(ExportJob.id == export_id, ExportJob.created_by == user_id)
+    )
+    return result.scalar_one_or_none()
+
+
+# Export with the same fingerprint that is still running or finished within reuse_window
+async def _find_export(db: AsyncSession, fingerprint: str, reuse_window: float) -> Optional[ExportJob]:
+    result = await db.execute(
+        select(ExportJob)
+        .where(
+            ExportJob.fingerprint == fingerprint,
+            or_(
+                ExportJob.status.in_(ACTIVE_STATUSES),
+                and_(
+                    ExportJob.status == "done",
+                    ExportJob.finished_at > func.now() - timedelta(seconds=reuse_window),
+                ),
+            ),
+        )
+        .order_by(ExportJob.id.desc())
+        .limit(1)
+    )
+    return result.scalar_one_or_none()
+
+
+# Join an identical export or create a new one; returns (export, created)
+async def get_or_create_export(
+        db: AsyncSession,
+        fingerprint: str,
+        export_format: str,
+        params: Dict[str, Any],
+        user_id: Optional[int],
+        reuse_window: float,
+) -> Tuple[ExportJob, bool]:
+    export = await _find_export(db, fingerprint, reuse_window)
+    if export is not None:
+        return export, False
+
+    # Partial unique index: parallel so'rovlardan faqat bittasi qator qo'sha oladi
+    result = await db.execute(
+        insert(ExportJob)
+        .values(fingerprint=fingerprint, format=export_format, params=params, status="pending", created_by=user_id)
+        .on_conflict_do_nothing(
+            index_elements=[ExportJob.fingerprint],
+            index_where=ExportJob.status.in_(ACTIVE_STATUSES),
+        )
+        .returning(ExportJob)
+    )
+    export = result.scalar_one_or_none()
+    await db.commit()
+    if export is not None:
+        return export, True
+    return await _find_export(db, fingerprint, reuse_window), False
+
+
+# Move to running unless finished or another process reported progress recently
+async def start_export(db: AsyncSession, export_id: int, stale_after: float) -> Optional[ExportJob]:
+    result = await db.execute(
+        update(ExportJob)
+        .where(
+            ExportJob.id == export_id,
+            or_(
+                ExportJob.status == "pending",
+                and_(
+                    ExportJob.status == "running",
+                    ExportJob.updated_at < func.now() - timedelta(seconds=stale_after),
+                ),
+            ),
+        )
+        .values(status="running", rows=0, updated_at=func.now())
+        .returning(ExportJob)
+    )
+    export = result.scalar_one_or_none()
+    await db.commit()
+    return export
+
+
+async def update_export_progress(db: AsyncSession, export_id: int, rows: int, total: Optional[int] = None) -> None:
+    values = {"rows": rows, "updated_at": func.now()}
+    if total is not None:
+        values["total"] = total
+    await db.execute(update(ExportJob).where(ExportJob.id == export_id).values(**values))
+    await db.commit()
+
+
+async def finish_export(db: AsyncSession, export_id: int, file_path: str, rows: int) -> None:
+    await db.execute(
+        update(ExportJob)
+        .where(ExportJob.id == export_id)
+        .values(status="done", file_path=file_path, rows=rows, finished_at=func.now())
+    )
+    await db.commit()
+
+
+async def fail_export(db: AsyncSession, export_id: int, error: str) -> None:
+    await db.execute(
+        update(ExportJob)
+        .where(ExportJob.id == export_id)
+        .values(status="failed", error=error, finished_at=func.now())
+    )
+    await db.commit()
+
+
+# Delete finished exports older than ttl; returns file paths to remove
+async def purge_expired_exports(db: AsyncSession, ttl: float) -> List[str]:
+    result = await db.execute(
+        delete(ExportJob)
+        .where(
+            ExportJob.status.in_(("done", "failed")),
+            ExportJob.finished_at < func.now() - timedelta(seconds=ttl),
+        )
+        .returning(ExportJob.file_path)
+    )
+    await db.commit()
+    return [file_path for file_path in result.scalars() if file_path]
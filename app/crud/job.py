@@ -0,0 +1,73 @@
+from datetime import timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import delete, func, insert, or_, select, update
+from sqlalchemy.engine import Row
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.models import BackgroundJob
+
+
+# Persist a new job, optionally pinned to a host; commit is left to the caller
+async def create_job(db: AsyncSession, name: str, payload: Dict[str, Any], host: Optional[str] = None) -> int:
+    result = await db.execute(
+        insert(BackgroundJob).values(name=name, payload=payload, host=host).returning(BackgroundJob.id)
+    )
+    return result.scalar_one()
+
+
+# Take a lease on a runnable job; None if another process holds it, it is gone
+# or its retry time has not come yet; jobs pinned to another host are skipped
+async def claim_job(db: AsyncSession, job_id: int, lease: float, host: str) -> Optional[Row]:
+    result = await db.execute(
+        update(BackgroundJob)
+        .where(
+            BackgroundJob.id == job_id,
+            BackgroundJob.failed_at.is_(None),
+            BackgroundJob.run_at <= func.now(),
+            or_(BackgroundJob.host.is_(None), BackgroundJob.host == host),
+            or_(BackgroundJob.locked_until.is_(None), BackgroundJob.locked_until < func.now()),
+        )
+        .values(
+            locked_until=func.now() + timedelta(seconds=lease),
+            attempts=BackgroundJob.attempts + 1,
+        )
+        .returning(BackgroundJob.name, BackgroundJob.payload, BackgroundJob.attempts)
+    )
+    row = result.one_or_none()
+    await db.commit()
+    return row
+
+
+async def complete_job(db: AsyncSession, job_id: int) -> None:
+    await db.execute(delete(BackgroundJob).where(BackgroundJob.id == job_id))
+    await db.commit()
+
+
+# Release the lease and schedule a retry, or mark the job as failed for good
+async def fail_job(db: AsyncSession, job_id: int, error: str, retry_in: Optional[float]) -> None:
+    values = {"locked_until": None, "last_error": error}
+    if retry_in is None:
+        values["failed_at"] = func.now()
+    else:
+        values["run_at"] = func.now() + timedelta(seconds=retry_in)
+    await db.execute(update(BackgroundJob).where(BackgroundJob.id == job_id).values(**values))
+    await db.commit()
+
+
+# Pending jobs this host may run that no live process has leased, as (id, seconds until run_at)
+async def get_runnable_jobs(db: AsyncSession, limit: int, host: str) -> List[Tuple[int, float]]:
+    result = await db.execute(
+        select(
+            BackgroundJob.id,
+            func.greatest(func.extract("epoch", BackgroundJob.run_at - func.now()), 0),
+        )
+        .where(
+            BackgroundJob.failed_at.is_(None),
+            or_(BackgroundJob.locked_until.is_(None), BackgroundJob.locked_until < func.now()),
+            or_(BackgroundJob.host.is_(None), BackgroundJob.host == host),
+        )
+        .order_by(BackgroundJob.run_at)
+        .limit(limit)
+    )
+    return [(job_id, float(delay)) for job_id, delay in result.all()]
@@ -0,0 +1,119 @@
+from datetime import date, datetime
+from typing import Any, List, Optional, Tuple
+
+from sqlalchemy import cast, delete, func, literal, select, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.engine import Row
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.models import StatsDaily, StatsHourly, StatsWatermark
+
+
+# Lock the metric's watermark row for this transaction, creating it on first use.
+# Row fields: last_id, pending_id, pending_xmax
+async def lock_watermark(db: AsyncSession, metric: str) -> Row:
+    await db.execute(
+        insert(StatsWatermark).values(metric=metric, last_id=0).on_conflict_do_nothing(index_elements=["metric"])
+    )
+    result = await db.execute(
+        select(StatsWatermark.last_id, StatsWatermark.pending_id, StatsWatermark.pending_xmax)
+        .where(StatsWatermark.metric == metric)
+        .with_for_update()
+    )
+    return result.one()
+
+
+# Highest visible source id above last_id and the xmax of the snapshot it was read in
+# (one statement, so both come from the same snapshot); id is None when nothing new
+async def get_rollup_candidate(db: AsyncSession, id_column: Any, last_id: int) -> Row:
+    result = await db.execute(
+        select(
+            func.max(id_column).label("id"),
+            func.txid_snapshot_xmax(func.txid_current_snapshot()).label("xmax"),
+        ).where(id_column > last_id)
+    )
+    return result.one()
+
+
+# Oldest transaction still running: every txid below it has committed or aborted
+async def get_snapshot_xmin(db: AsyncSession) -> int:
+    result = await db.execute(select(func.txid_snapshot_xmin(func.txid_current_snapshot())))
+    return result.scalar_one()
+
+
+async def set_pending(db: AsyncSession, metric: str, pending_id: Optional[int], pending_xmax: Optional[int]) -> None:
+    await db.execute(
+        update(StatsWatermark)
+        .where(StatsWatermark.metric == metric)
+        .values(pending_id=pending_id, pending_xmax=pending_xmax)
+    )
+
+
+# Add counts of source rows in (lower_id, upper_id] to the daily and recent hourly buckets
+async def apply_rollup(
+        db: AsyncSession,
+        metric: str,
+        id_column: Any,
+        time_column: Any,
+        lower_id: int,
+        upper_id: int,
+        hourly_since: datetime,
+) -> None:
+    in_range = (id_column > lower_id, id_column <= upper_id, time_column.isnot(None))
+
+    day = cast(func.date_trunc("day", time_column), StatsDaily.day.type)
+    daily = insert(StatsDaily).from_select(
+        ["metric", "day", "count"],
+        select(literal(metric, StatsDaily.metric.type), day, func.count()).where(*in_range).group_by(day),
+    )
+    await db.execute(daily.on_conflict_do_update(
+        index_elements=["metric", "day"], set_={"count": StatsDaily.count + daily.excluded.count}
+    ))
+
+    hour = func.date_trunc("hour", time_column)
+    hourly = insert(StatsHourly).from_select(
+        ["metric", "hour", "count"],
+        select(literal(metric, StatsHourly.metric.type), hour, func.count())
+        .where(*in_range, time_column >= hourly_since)
+        .group_by(hour),
+    )
+    await db.execute(hourly.on_conflict_do_update(
+        index_elements=["metric", "hour"], set_={"count": StatsHourly.count + hourly.excluded.count}
+    ))
+
+
+async def set_watermark(db: AsyncSession, metric: str, last_id: int) -> None:
+    await db.execute(
+        update(StatsWatermark)
+        .where(StatsWatermark.metric == metric)
+        .values(last_id=last_id, pending_id=None, pending_xmax=None, updated_at=func.now())
+    )
+
+
+async def prune_hourly(db: AsyncSession, before: datetime) -> None:
+    await db.execute(delete(StatsHourly).where(StatsHourly.hour < before))
+
+
+async def get_daily_series(db: AsyncSession, metric: str, start: date, end: date) -> List[Tuple[date, int]]:
+    result = await db.execute(
+        select(StatsDaily.day, StatsDaily.count)
+        .where(StatsDaily.metric == metric, StatsDaily.day >= start, StatsDaily.day <= end)
+        .order_by(StatsDaily.day)
+    )
+    return result.all()
+
+
+async def get_hourly_series(
+        db: AsyncSession, metric: str, start: datetime, end: datetime
+) -> List[Tuple[datetime, int]]:
+    result = await db.execute(
+        select(StatsHourly.hour, StatsHourly.count)
+        .where(StatsHourly.metric == metric, StatsHourly.hour >= start, StatsHourly.hour < end)
+        .order_by(StatsHourly.hour)
+    )
+    return result.all()
+
+
+async def get_watermark_time(db: AsyncSession, metric: str) -> Optional[datetime]:
+    result = await db.execute(select(StatsWatermark.updated_at).where(StatsWatermark.metric == metric))
+    return result.scalar_one_or_none()
@@ -0,0 +1,29 @@
+from typing import Dict
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, func
+from sqlalchemy.dialects.postgresql import insert
+
+from app.models.models import TokenVersion
+
+
+# Get all token versions as {user_id: version}
+async def get_token_versions(db: AsyncSession) -> Dict[int, int]:
+    result = await db.execute(
+        select(TokenVersion.user_id, TokenVersion.version)
+    )
+    return {user_id: version for user_id, version in result.all()}
+
+
+# Increment user's token version (revokes issued tokens); commit is left to the caller
+async def bump_token_version(db: AsyncSession, user_id: int) -> int:
+    stmt = (
+        insert(TokenVersion)
+        .values(user_id=user_id, version=1)
+        .on_conflict_do_update(
+            index_elements=[TokenVersion.user_id],
+            set_={"version": TokenVersion.version + 1, "updated_at": func.now()},
+        )
+        .returning(TokenVersion.version)
+    )
+    result = await db.execute(stmt)
+    return result.scalar_one()
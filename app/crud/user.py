@@ -1,9 +1,13 @@
-from typing import List, Optional
+from typing import Any, Dict, List, Optional
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from sqlalchemy import func
+from sqlalchemy import func, lambda_stmt, literal, union_all, any_, bindparam, String
+from sqlalchemy.dialects.postgresql import ARRAY, insert
+from sqlalchemy.engine import Row
 
-from app.models.models import User
+from app.core.cache import invalidate_user, profile_cache, token_versions
+from app.crud import token as token_crud
+from app.models.models import User, Worker
 from app.schemas.schemas import UserCreate, UserUpdate
 
 
@@ -20,12 +24,122 @@ async def get_user_by_telegram_id(
     db: AsyncSession,
     telegram_id: str
 ) -> Optional[User]:
+    # Called on every authenticated request: the lambda statement is built once
     result = await db.execute(
-        select(User).filter(User.telegram_id == telegram_id)
+        lambda_stmt(lambda: select(User).where(User.telegram_id == telegram_id))
     )
     return result.scalars().first()
 
 
+# Create the user unless it exists, in a single statement.
+# Row fields: id, telegram_id, name, is_worker, has_worker, created
+async def get_or_create_user(
+    db: AsyncSession,
+    telegram_id: str,
+    name: Optional[str] = None,
+    is_worker: bool = False
+) -> Row:
+    # ON CONFLICT DO NOTHING parallel ro'yxatdan o'tishlarda unique xatolik bermaydi
+    inserted = (
+        insert(User)
+        .values(telegram_id=telegram_id, name=name, is_worker=is_worker)
+        .on_conflict_do_nothing(index_elements=[User.telegram_id])
+        .returning(User.id, User.telegram_id, User.name, User.is_worker)
+        .cte("inserted")
+    )
+    existing = (
+        select(
+            User.id,
+            User.telegram_id,
+            User.name,
+            User.is_worker,
+            Worker.id.isnot(None).label("has_worker"),
+            literal(False).label("created"),
+        )
+        .outerjoin(Worker, Worker.telegram_id == User.telegram_id)
+        .filter(User.telegram_id == telegram_id)
+    )
+    # CTE dagi INSERT ni asosiy SELECT ko'rmaydi, shuning uchun natija
+    # yoki yangi qator, yoki mavjud foydalanuvchi bo'ladi
+    stmt = union_all(
+        select(
+            inserted.c.id,
+            inserted.c.telegram_id,
+            inserted.c.name,
+            inserted.c.is_worker,
+            literal(False).label("has_worker"),
+            literal(True).label("created"),
+        ),
+        existing,
+    )
+    result = await db.execute(stmt)
+    row = result.first()
+    if row is None:
+        # Parallel tranzaksiya shu telegram_id ni bizdan keyin, lekin INSERT
+        # kutib turganda commit qildi: SELECT qismi eski snapshot bilan uni
+        # ko'rmaydi. Yangi statement yangi snapshot oladi (READ COMMITTED)
+        row = (await db.execute(existing)).first()
+    await db.commit()
+    if row.created:
+        invalidate_user(telegram_id)
+    return row
+
+
+# Columns loaded for /users/me and /workers/me
+PROFILE_USER_FIELDS = ("id", "telegram_id", "is_worker", "name", "created", "updated")
+PROFILE_WORKER_FIELDS = (
+    "id", "telegram_id", "name", "about", "image", "age", "phone", "gender",
+    "payment_type", "time_type", "daily_payment", "languages", "skills", "location",
+    "disability_degree", "aliment_payer", "aliment_payer_code",
+    "created_at", "updated_at", "is_active",
+)
+
+
+# Get user profile with worker columns in one LEFT JOIN query (cached until a profile write)
+async def get_profile(
+    db: AsyncSession,
+    telegram_id: str
+) -> Optional[Dict[str, Any]]:
+    profile = profile_cache.get(telegram_id)
+    if profile is not None:
+        return profile
+
+    result = await db.execute(
+        select(
+            *[getattr(User, field).label(f"u_{field}") for field in PROFILE_USER_FIELDS],
+            *[getattr(Worker, field).label(f"w_{field}") for field in PROFILE_WORKER_FIELDS],
+        )
+        .outerjoin(Worker, Worker.telegram_id == User.telegram_id)
+        .filter(User.telegram_id == telegram_id)
+    )
+    row = result.first()
+    if row is None:
+        return None
+
+    data = row._mapping
+    worker = None
+    if data["w_id"] is not None:
+        worker = {field: data[f"w_{field}"] for field in PROFILE_WORKER_FIELDS}
+    profile = {
+        "user": {field: data[f"u_{field}"] for field in PROFILE_USER_FIELDS},
+        "worker": worker,
+    }
+    profile_cache.set(telegram_id, profile)
+    return profile
+
+
+# Get users by a list of Telegram IDs in one `= ANY(:ids)` query (compact projection)
+async def get_users_by_telegram_ids(
+    db: AsyncSession,
+    telegram_ids: List[str]
+) -> List[Row]:
+    result = await db.execute(
+        select(User.id, User.telegram_id, User.name, User.is_worker)
+        .where(User.telegram_id == any_(bindparam("telegram_ids", telegram_ids, type_=ARRAY(String))))
+    )
+    return result.all()
+
+
 # Get a list of users
 async def get_users(
     db: AsyncSession,
@@ -48,6 +162,7 @@ async def create_user(db: AsyncSession, user: UserCreate) -> User:
     db.add(db_user)
     await db.commit()
     await db.refresh(db_user)
+    invalidate_user(db_user.telegram_id)
     return db_user
 
 
@@ -64,6 +179,7 @@ async def update_user(
             setattr(db_user, field, value)
         await db.commit()
         await db.refresh(db_user)
+        invalidate_user(db_user.telegram_id)
     return db_user
 
 
@@ -80,6 +196,7 @@ async def update_user_by_telegram_id(
             setattr(db_user, field, value)
         await db.commit()
         await db.refresh(db_user)
+        invalidate_user(telegram_id)
     return db_user
 
 
@@ -88,7 +205,11 @@ async def delete_user(db: AsyncSession, user_id: int) -> bool:
     db_user = await get_user(db, user_id)
     if db_user:
         await db.delete(db_user)
+        # Foydalanuvchiga berilgan tokenlarni bekor qilish
+        version = await token_crud.bump_token_version(db, user_id)
         await db.commit()
+        invalidate_user(db_user.telegram_id)
+        token_versions.set(user_id, version)
         return True
     return False
 
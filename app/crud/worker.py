@@ -1,31 +1,156 @@
 from http.client import HTTPException
-from typing import List, Optional, Dict, Any, Tuple
+from typing import AsyncIterator, List, Optional, Dict, Any, Tuple
 from app import models
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 from sqlalchemy.orm import selectinload
-from sqlalchemy import func, or_, and_
+from sqlalchemy import (
+    func, or_, and_, any_, bindparam, exists, lambda_stmt, tuple_, update, Boolean, Column, Integer, MetaData, Table, Text,
+)
+from sqlalchemy.dialects.postgresql import ARRAY, insert
+from sqlalchemy.engine import Row
 import math
 
-from app.models.models import Skills, Worker, Feedback
+from app.core.cache import invalidate_profile
+from app.models.models import (
+    WORKER_IMAGE_UPLOAD_SEQ, Skills, Worker, Feedback, WorkerChangeLog, WorkerImageUpload,
+)
 from app.schemas.schemas import WorkerCreate, WorkerUpdate, WorkerLocation, WorkerSearchParams
 
 
+# Hot lookups use lambda statements: the select is built and its cache key
+# computed once, later calls only substitute the closure value as a parameter
 async def get_worker(db: AsyncSession, worker_id: int) -> Optional[Worker]:
-    result = await db.execute(select(Worker).filter(Worker.id == worker_id))
+    result = await db.execute(lambda_stmt(lambda: select(Worker).where(Worker.id == worker_id)))
     return result.scalar_one_or_none()
 
 
 async def get_worker_by_telegram_id(db: AsyncSession, telegram_id: str) -> Optional[Worker]:
-    result = await db.execute(select(Worker).filter(Worker.telegram_id == telegram_id))
+    result = await db.execute(lambda_stmt(lambda: select(Worker).where(Worker.telegram_id == telegram_id)))
     return result.scalar_one_or_none()
 
 
 async def get_worker_by_phone(db: AsyncSession, phone: str) -> Optional[Worker]:
-    result = await db.execute(select(Worker).filter(Worker.phone == phone))
+    result = await db.execute(lambda_stmt(lambda: select(Worker).where(Worker.phone == phone)))
     return result.scalar_one_or_none()
 
 
+# Compact projection for list/batch responses
+WORKER_BRIEF_COLUMNS = (
+    Worker.id, Worker.name, Worker.age, Worker.gender, Worker.phone, Worker.time_type,
+    Worker.location, Worker.disability_degree, Worker.skills, Worker.languages, Worker.image,
+)
+
+
+async def get_workers_by_ids(db: AsyncSession, worker_ids: List[int]) -> List[Row]:
+    # Bitta `id = ANY(:ids)` so'rovi: ro'yxat uzunligidan qat'i nazar SQL matni bir xil
+    result = await db.execute(
+        select(*WORKER_BRIEF_COLUMNS)
+        .where(Worker.id == any_(bindparam("worker_ids", worker_ids, type_=ARRAY(Integer))))
+    )
+    return result.all()
+
+
+# Criteria behind /workers/filter/ and exports; raises ValueError on a malformed age_range
+def build_worker_filters(
+        name: Optional[str] = None,
+        gender: Optional[str] = None,
+        min_narx: Optional[int] = None,
+        max_narx: Optional[int] = None,
+        skills: List[str] = (),
+        languages: List[str] = (),
+        age_range: List[str] = (),
+        time_type: List[str] = (),
+        disability_degree: List[str] = (),
+        aliment_payer: List[str] = (),
+        is_active: Optional[bool] = True,
+) -> List[Any]:
+    criteria = []
+    if is_active is not None:
+        criteria.append(Worker.is_active == is_active)
+
+    # Name yoki skill bo'yicha filter
+    if name:
+        criteria.append(or_(
+            Worker.name.ilike(f"%{name}%"),
+            Worker.skills.ilike(f"%{name}%"),
+            Worker.location.ilike(f"%{name}%"),
+        ))
+
+    if skills and "barchasi" not in [s.lower() for s in skills]:
+        criteria.append(or_(*[Worker.skills.ilike(f"%{skill}%") for skill in skills]))
+
+    if languages and "barchasi" not in [l.lower() for l in languages]:
+        criteria.append(or_(*[Worker.languages.ilike(f"%{lang}%") for lang in languages]))
+
+    if gender and gender.lower() != "barchasi":
+        criteria.append(Worker.gender.ilike(gender))
+
+    if disability_degree and "barchasi" not in [d.lower() for d in disability_degree]:
+        criteria.append(or_(*[Worker.disability_degree.ilike(f"%{d}%") for d in disability_degree]))
+
+    # Narx oralig'i (filter narxlarni ichida bo'lishi kerak)
+    if min_narx is not None:
+        criteria.append(Worker.daily_payment >= min_narx)
+    if max_narx is not None:
+        criteria.append(Worker.daily_payment <= max_narx)
+
+    if aliment_payer and "barchasi" not in [str(a).lower() for a in aliment_payer]:
+        # 1 yoki 0 string bo'lib keladi, ularni boolean ga aylantiramiz
+        bool_values = [bool(int(a)) for a in aliment_payer if a in ["0", "1"]]
+        criteria.append(Worker.aliment_payer.in_(bool_values))
+
+    if age_range and "barchasi" not in [a.lower() for a in age_range]:
+        age_conditions = []
+        for range_str in age_range:
+            try:
+                min_age, max_age = map(int, range_str.split("-"))
+            except ValueError:
+                raise ValueError(f"age_range '{range_str}' must be like 25-35")
+            age_conditions.append(Worker.age.between(min_age, max_age))
+        criteria.append(or_(*age_conditions))
+
+    if time_type and "barchasi" not in [t.lower() for t in time_type]:
+        criteria.append(or_(*[Worker.time_type.ilike(t) for t in time_type]))
+
+    return criteria
+
+
+# Number of workers matching build_worker_filters criteria
+async def count_workers(db: AsyncSession, *criteria: Any) -> int:
+    result = await db.execute(select(func.count(Worker.id)).where(*criteria))
+    return result.scalar_one()
+
+
+# Change log page after the (txid, seq) cursor, joined with the current worker row
+# (None once deleted). seq is assigned at insert time, so it does not follow commit
+# order; txid below the snapshot xmin is final, so pages are ordered by (txid, seq)
+# and only rows of transactions older than the oldest running one are returned.
+async def get_worker_changes(db: AsyncSession, since: Tuple[int, int], limit: int) -> List[Row]:
+    result = await db.execute(
+        select(WorkerChangeLog.txid, WorkerChangeLog.seq, WorkerChangeLog.worker_id, WorkerChangeLog.op, Worker)
+        .outerjoin(Worker, Worker.id == WorkerChangeLog.worker_id)
+        .where(
+            tuple_(WorkerChangeLog.txid, WorkerChangeLog.seq) > tuple_(*since),
+            WorkerChangeLog.txid < func.txid_snapshot_xmin(func.txid_current_snapshot()),
+        )
+        .order_by(WorkerChangeLog.txid, WorkerChangeLog.seq)
+        .limit(limit)
+    )
+    return result.all()
+
+
+# Server-side cursor over the given columns, yielded in batches (exports)
+async def stream_worker_rows(
+        db: AsyncSession, columns: List[Any], batch_size: int, *criteria: Any
+) -> AsyncIterator[List[Row]]:
+    result = await db.stream(
+        select(*columns).where(*criteria).order_by(Worker.id).execution_options(yield_per=batch_size)
+    )
+    async for rows in result.partitions():
+        yield rows
+
+
 async def get_workers(
         db: AsyncSession, skip: int = 0, limit: int = 100, is_active: bool = True
 ) -> List[Worker]:
@@ -59,6 +184,7 @@ async def create_worker(db: AsyncSession, worker: WorkerCreate) -> Worker:
     db.add(db_worker)
     await db.commit()
     await db.refresh(db_worker)
+    invalidate_profile(db_worker.telegram_id)
 
     if db_worker.languages:
         db_worker.languages_list = [lang.strip() for lang in db_worker.languages.split(',')]
@@ -79,44 +205,85 @@ async def create_worker(db: AsyncSession, worker: WorkerCreate) -> Worker:
     return db_worker
 
 
-async def update_worker(db: AsyncSession, worker_id: int, worker_update: WorkerUpdate) -> Optional[Worker]:
-    db_worker = await get_worker(db, worker_id)
-    if db_worker:
-        update_data = worker_update.dict(exclude_unset=True)
-        for field, value in update_data.items():
-            setattr(db_worker, field, value)
-        await db.commit()
-        await db.refresh(db_worker)
+async def _update_worker_returning(db: AsyncSession, worker_id: int, values: Dict[str, Any]) -> Optional[Worker]:
+    # Single UPDATE ... RETURNING round trip; None when no row matched
+    result = await db.execute(
+        update(Worker)
+        .where(Worker.id == worker_id)
+        .values(**values)
+        .returning(Worker)
+        .execution_options(populate_existing=True, synchronize_session=False)
+    )
+    db_worker = result.scalar_one_or_none()
+    await db.commit()
+    if db_worker is not None:
+        invalidate_profile(db_worker.telegram_id)
     return db_worker
 
 
+async def update_worker(
+        db: AsyncSession, worker_id: int, worker_update: WorkerUpdate, image_path: Optional[str] = None
+) -> Optional[Worker]:
+    update_data = worker_update.model_dump(exclude_unset=True)
+    if image_path is not None:
+        update_data["image"] = image_path
+    if not update_data:
+        return await get_worker(db, worker_id)
+    return await _update_worker_returning(db, worker_id, update_data)
+
+
 async def update_worker_location(
         db: AsyncSession, worker_id: int, location: WorkerLocation
 ) -> Optional[Worker]:
-    db_worker = await get_worker(db, worker_id)
-    if db_worker:
-        db_worker.location = location
-        await db.commit()
-        await db.refresh(db_worker)
-    return db_worker
+    return await _update_worker_returning(db, worker_id, {"location": location.location})
 
 
 async def update_worker_image(db: AsyncSession, worker_id: int, image_path: str) -> Optional[Worker]:
-    db_worker = await get_worker(db, worker_id)
-    if db_worker:
-        db_worker.image = image_path
+    return await _update_worker_returning(db, worker_id, {"image": image_path})
+
+
+async def next_image_upload_seq(db: AsyncSession) -> int:
+    result = await db.execute(select(WORKER_IMAGE_UPLOAD_SEQ.next_value()))
+    return result.scalar_one()
+
+
+# Attach an uploaded image unless a newer upload was already applied.
+# Returns (applied, worker exists, previous image). The upsert locks the worker's
+# api_worker_image_upload row, so concurrent jobs for one worker run the later
+# statements one at a time, each with a fresh snapshot.
+async def apply_worker_image(
+        db: AsyncSession, worker_id: int, image_path: str, upload_seq: int
+) -> Tuple[bool, bool, Optional[str]]:
+    claim = insert(WorkerImageUpload).values(worker_id=worker_id, upload_seq=upload_seq)
+    result = await db.execute(
+        claim.on_conflict_do_update(
+            index_elements=[WorkerImageUpload.worker_id],
+            set_={"upload_seq": claim.excluded.upload_seq, "updated_at": func.now()},
+            where=WorkerImageUpload.upload_seq < claim.excluded.upload_seq,
+        ).returning(WorkerImageUpload.worker_id)
+    )
+    if result.scalar_one_or_none() is None:
+        await db.rollback()
+        return False, True, None
+
+    result = await db.execute(
+        select(Worker.telegram_id, Worker.image).where(Worker.id == worker_id).with_for_update()
+    )
+    row = result.one_or_none()
+    if row is None:
         await db.commit()
-        await db.refresh(db_worker)
-    return db_worker
+        return True, False, None
+    await db.execute(
+        update(Worker).where(Worker.id == worker_id).values(image=image_path)
+        .execution_options(synchronize_session=False)
+    )
+    await db.commit()
+    invalidate_profile(row.telegram_id)
+    return True, True, row.image
 
 
 async def update_worker_status(db: AsyncSession, worker_id: int, is_active: bool) -> Optional[Worker]:
-    db_worker = await get_worker(db, worker_id)
-    if db_worker:
-        db_worker.is_active = is_active
-        await db.commit()
-        await db.refresh(db_worker)
-    return db_worker
+    return await _update_worker_returning(db, worker_id, {"is_active": is_active})
 
 
 async def delete_worker(db: AsyncSession, worker_id: int) -> bool:
@@ -124,17 +291,162 @@ async def delete_worker(db: AsyncSession, worker_id: int) -> bool:
     if db_worker:
         await db.delete(db_worker)
         await db.commit()
+        invalidate_profile(db_worker.telegram_id)
         return True
     return False
 
 
 async def deactivate_worker(db: AsyncSession, worker_id: int) -> Optional[Worker]:
-    db_worker = await get_worker(db, worker_id)
-    if db_worker:
-        db_worker.is_active = False
-        await db.commit()
-        await db.refresh(db_worker)
-    return db_worker
+    return await _update_worker_returning(db, worker_id, {"is_active": False})
+
+
+# Bulk import: rows are COPY'd into a temp staging table and merged set-based
+WORKER_IMPORT_COLUMNS = (
+    "telegram_id", "name", "about", "age", "phone", "gender", "payment_type", "time_type",
+    "daily_payment", "languages", "skills", "location", "disability_degree",
+    "aliment_payer", "aliment_payer_code", "is_active",
+)
+
+worker_import_staging = Table(
+    "worker_import_staging",
+    MetaData(),
+    Column("row_no", Integer, primary_key=True),
+    Column("telegram_id", Text, nullable=False),
+    Column("name", Text),
+    Column("about", Text),
+    Column("age", Integer),
+    Column("phone", Text),
+    Column("gender", Text),
+    Column("payment_type", Text),
+    Column("time_type", Text),
+    Column("daily_payment", Integer),
+    Column("languages", Text),
+    Column("skills", Text),
+    Column("location", Text),
+    Column("disability_degree", Text),
+    Column("aliment_payer", Boolean),
+    Column("aliment_payer_code", Text),
+    Column("is_active", Boolean),
+    Column("error", Text),
+    prefixes=["TEMPORARY"],
+    postgresql_on_commit="DROP",
+)
+
+
+async def _mark_import_duplicates(db: AsyncSession, column, error: str) -> None:
+    # Fayl ichida takrorlangan qiymatlar: birinchi qator qoladi, qolganlari xato
+    staging = worker_import_staging
+    ranked = (
+        select(
+            staging.c.row_no,
+            func.row_number().over(partition_by=column, order_by=staging.c.row_no).label("rank"),
+        )
+        .where(column.isnot(None), staging.c.error.is_(None))
+        .subquery()
+    )
+    await db.execute(
+        update(staging)
+        .where(staging.c.row_no == ranked.c.row_no, ranked.c.rank > 1)
+        .values(error=error)
+    )
+
+
+async def import_workers(
+        db: AsyncSession, records: List[tuple], update_existing: bool = False
+) -> Tuple[int, int, Dict[int, str]]:
+    """
+    Ishchilarni ommaviy qo'shish (yoki telegram_id bo'yicha yangilash)
+
+    records: (row_no, *WORKER_IMPORT_COLUMNS) ko'rinishidagi qatorlar.
+    Qatorlar COPY bilan staging jadvalga yuklanadi, telegram_id/telefon
+    to'qnashuvlari bir nechta set-based so'rov bilan aniqlanadi va
+    qolganlari bitta INSERT ... SELECT bilan qo'shiladi.
+
+    Returns:
+        (qo'shilganlar soni, yangilanganlar soni, {row_no: xato})
+    """
+    staging = worker_import_staging
+    workers = Worker.__table__
+    columns = [staging.c[name] for name in WORKER_IMPORT_COLUMNS]
+
+    connection = await db.connection()
+    await connection.run_sync(lambda sync_conn: staging.create(sync_conn))
+    raw_connection = await connection.get_raw_connection()
+    await raw_connection.driver_connection.copy_records_to_table(
+        staging.name, records=records, columns=["row_no", *WORKER_IMPORT_COLUMNS]
+    )
+
+    await _mark_import_duplicates(db, staging.c.telegram_id, "Telegram ID faylda takrorlangan")
+    await _mark_import_duplicates(db, staging.c.phone, "Telefon raqami faylda takrorlangan")
+    if not update_existing:
+        await db.execute(
+            update(staging)
+            .where(staging.c.error.is_(None), staging.c.telegram_id == workers.c.telegram_id)
+            .values(error="Telegram ID ro'yxatdan o'tgan")
+        )
+    await db.execute(
+        update(staging)
+        .where(
+            staging.c.error.is_(None),
+            staging.c.phone == workers.c.phone,
+            workers.c.telegram_id.is_distinct_from(staging.c.telegram_id),
+        )
+        .values(error="Telefon raqami ro'yxatdan o'tgan")
+    )
+
+    updated = []
+    if update_existing:
+        # Faylda bo'sh qoldirilgan maydonlar o'zgarmaydi
+        result = await db.execute(
+            update(workers)
+            .where(staging.c.error.is_(None), workers.c.telegram_id == staging.c.telegram_id)
+            .values({
+                name: func.coalesce(staging.c[name], workers.c[name])
+                for name in WORKER_IMPORT_COLUMNS if name != "telegram_id"
+            })
+            .returning(workers.c.telegram_id)
+        )
+        updated = result.scalars().all()
+
+    # Modeldagi default qiymatlar (payment_type, is_active, ...) bo'sh maydonlarga qo'yiladi
+    defaults = {
+        column.name: column.default.arg
+        for column in workers.columns
+        if column.default is not None and column.default.is_scalar
+    }
+    result = await db.execute(
+        insert(workers)
+        .from_select(
+            list(WORKER_IMPORT_COLUMNS),
+            select(*[
+                func.coalesce(column, defaults[column.name]) if column.name in defaults else column
+                for column in columns
+            ])
+            .where(
+                staging.c.error.is_(None),
+                ~exists().where(workers.c.telegram_id == staging.c.telegram_id),
+            )
+            .order_by(staging.c.row_no)
+        )
+        .on_conflict_do_nothing()
+        .returning(workers.c.telegram_id)
+    )
+    inserted = result.scalars().all()
+
+    result = await db.execute(select(staging.c.row_no, staging.c.error).where(staging.c.error.isnot(None)))
+    errors = dict(result.all())
+    await db.commit()
+
+    # Parallel so'rov shu orada qo'shgan qatorlar ON CONFLICT DO NOTHING bilan tushib qoladi
+    written = set(inserted) | set(updated)
+    for record in records:
+        row_no, telegram_id = record[0], record[1]
+        if row_no not in errors and telegram_id not in written:
+            errors[row_no] = "Telegram ID yoki telefon raqami ro'yxatdan o'tgan"
+
+    for telegram_id in written:
+        invalidate_profile(telegram_id)
+    return len(inserted), len(updated), errors
 
 
 def calculate_distance(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
@@ -212,15 +524,65 @@ async def get_worker_statistics(db: AsyncSession) -> Dict[str, Any]:
     for gender, count in gender_counts:
         gender_distribution[gender or "Unknown"] = count
 
+    # Nogironlik darajasi bo'yicha taqsimlash
+    disability_distribution = {}
+    disability_counts = await db.execute(
+        select(Worker.disability_degree, func.count(Worker.id))
+        .group_by(Worker.disability_degree)
+    )
+    for disability_degree, count in disability_counts.all():
+        disability_distribution[disability_degree or "Unknown"] = count
+
     return {
         "total_workers": total_workers,
         "active_workers": active_workers,
         "average_rating": float(average_rating),
         "payment_distribution": payment_distribution,
         "gender_distribution": gender_distribution,
+        "disability_distribution": disability_distribution,
     }
 
 
+# Most common entries of a comma-separated column among active workers.
+# Entries are grouped case-insensitively and shown in their most frequent spelling.
+async def _get_top_list_values(db: AsyncSession, column: Any, limit: int) -> List[Dict[str, Any]]:
+    entries = (
+        select(func.trim(func.unnest(func.string_to_array(column, ","))).label("value"))
+        .where(Worker.is_active == True, column.isnot(None))
+        .subquery()
+    )
+    result = await db.execute(
+        select(
+            func.mode().within_group(entries.c.value).label("name"),
+            func.count().label("count"),
+        )
+        .where(entries.c.value != "")
+        .group_by(func.lower(entries.c.value))
+        .order_by(func.count().desc(), func.lower(entries.c.value))
+        .limit(limit)
+    )
+    return [{"name": name, "count": count} for name, count in result.all()]
+
+
+async def get_top_skills(db: AsyncSession, limit: int = 10) -> List[Dict[str, Any]]:
+    return await _get_top_list_values(db, Worker.skills, limit)
+
+
+async def get_top_languages(db: AsyncSession, limit: int = 10) -> List[Dict[str, Any]]:
+    return await _get_top_list_values(db, Worker.languages, limit)
+
+
+async def is_image_referenced(db: AsyncSession, image: str) -> bool:
+    result = await db.execute(select(exists().where(Worker.image == image)))
+    return result.scalar()
+
+
+# Image paths still referenced by workers (media sweeper)
+async def get_worker_image_paths(db: AsyncSession) -> List[str]:
+    result = await db.execute(select(Worker.image).where(Worker.image.isnot(None)).distinct())
+    return result.scalars().all()
+
+
 async def get_all_skill_names(db: AsyncSession) -> List[str]:
     result = await db.execute(select(Skills.name))
     names = result.scalars().all()
@@ -1,25 +1,116 @@
-from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
+from typing import Any, Dict
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine, AsyncSession
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.ext.declarative import declarative_base
-import os
 
-# PostgreSQL konfiguratsiyasini olish
-DB_USER = os.getenv("DB_USER", "postgres")
-DB_PASSWORD = os.getenv("DB_PASSWORD", "Lazizbek1")
-DB_HOST = os.getenv("DB_HOST", "localhost")
-DB_PORT = os.getenv("DB_PORT", "5432")
-DB_NAME = os.getenv("DB_NAME", "baza")
+from app.core.settings import settings
+from app.core.sqlstats import instrument_engine
+
+
+def async_database_url(url: str) -> str:
+    """
+    Sinxron drayverli URL ni (postgresql://...) asyncpg ga almashtirish
+
+    API faqat PostgreSQL bilan ishlaydi (ON CONFLICT, triggerlar, txid
+    funksiyalari, asyncpg server_settings), boshqa bazalar rad etiladi.
+    """
+    for prefix in ("postgresql://", "postgres://", "postgresql+psycopg2://"):
+        if url.startswith(prefix):
+            return "postgresql+asyncpg://" + url[len(prefix):]
+    if not url.startswith("postgresql+asyncpg://"):
+        raise ValueError(
+            f"FastAPI qismi faqat PostgreSQL ni qo'llab-quvvatlaydi (DB_TYPE=postgresql), berilgan URL: "
+            f"{url.split(':', 1)[0]}://..."
+        )
+    return url
+
 
 # SQLAlchemy uchun PostgreSQL URL (async version)
-SQLALCHEMY_DATABASE_URL = f"postgresql+asyncpg://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
+SQLALCHEMY_DATABASE_URL = async_database_url(settings.SQLALCHEMY_DATABASE_URL)
+
+
+def create_engine_from_settings(url: str = SQLALCHEMY_DATABASE_URL, **overrides: Any) -> AsyncEngine:
+    """
+    Sozlamalar asosida async engine yaratish
+
+    overrides create_async_engine ga to'g'ridan-to'g'ri beriladi; poolclass
+    berilsa (masalan NullPool) pul o'lchamlari qo'llanmaydi.
+    """
+    server_settings = {"application_name": settings.DB_APPLICATION_NAME}
+    if settings.DB_STATEMENT_TIMEOUT:
+        server_settings["statement_timeout"] = str(settings.DB_STATEMENT_TIMEOUT)
+
+    options: Dict[str, Any] = {
+        "echo": settings.DB_ECHO,  # SQL so'rovlarini konsolda ko'rsatish (faqat debug uchun)
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,  # Ulanish mavjudligini tekshirish
+        "pool_recycle": settings.DB_POOL_RECYCLE,  # Shuncha sekunddan keyin ulanishlarni yangilash
+        "connect_args": {
+            # asyncpg va SQLAlchemy adapterining prepared statement cache lari
+            # (pgbouncer transaction rejimida ikkalasi ham 0 bo'lishi kerak)
+            "statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE,
+            "prepared_statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE,
+            "server_settings": server_settings,
+        },
+    }
+    if "poolclass" not in overrides:
+        options.update(
+            pool_size=settings.DB_POOL_SIZE,
+            max_overflow=settings.DB_MAX_OVERFLOW,
+            pool_timeout=settings.DB_POOL_TIMEOUT,
+        )
+    options.update(overrides)
+    return create_async_engine(url, **options)
+
+
+class PoolMetrics:
+    """
+    Ulanish puli hisoblagichlari
+
+    Pul eventlari orqali yig'iladi; joriy holat (band/bo'sh ulanishlar)
+    snapshot paytida puldan o'qiladi.
+    """
+
+    def __init__(self, engine: AsyncEngine):
+        self.pool = engine.sync_engine.pool
+        self.connects = 0
+        self.checkouts = 0
+        self.invalidations = 0
+        self.max_checked_out = 0
+        event.listen(self.pool, "connect", self._on_connect)
+        event.listen(self.pool, "checkout", self._on_checkout)
+        event.listen(self.pool, "invalidate", self._on_invalidate)
+
+    def _on_connect(self, dbapi_connection, connection_record) -> None:
+        self.connects += 1
+
+    def _on_checkout(self, dbapi_connection, connection_record, connection_proxy) -> None:
+        self.checkouts += 1
+        self.max_checked_out = max(self.max_checked_out, self.pool.checkedout())
+
+    def _on_invalidate(self, dbapi_connection, connection_record, exception) -> None:
+        self.invalidations += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        size = getattr(self.pool, "size", None)
+        return {
+            "size": size() if size is not None else None,
+            "max_overflow": getattr(self.pool, "_max_overflow", None),
+            "checked_out": self.pool.checkedout(),
+            "checked_in": self.pool.checkedin() if size is not None else None,
+            "overflow": self.pool.overflow() if size is not None else None,
+            "max_checked_out": self.max_checked_out,
+            "connects": self.connects,
+            "checkouts": self.checkouts,
+            "invalidations": self.invalidations,
+        }
+
 
 # PostgreSQL uchun async engine yaratish
-engine = create_async_engine(
-    SQLALCHEMY_DATABASE_URL,
-    echo=True,  # SQL so'rovlarini konsolda ko'rsatish
-    pool_pre_ping=True,  # Ulanish mavjudligini tekshirish
-    pool_recycle=3600,   # 1 soatdan keyin ulanishlarni yangilash
-)
+engine = create_engine_from_settings()
+pool_metrics = PoolMetrics(engine)
+instrument_engine(engine)
 
 # Async Session factory
 AsyncSessionLocal = sessionmaker(
@@ -28,6 +119,25 @@ AsyncSessionLocal = sessionmaker(
     expire_on_commit=False,
 )
 
+# Faqat o'qish uchun engine (replika). DB_READ_URL berilmasa primary ning o'zi
+if settings.DB_READ_URL:
+    read_engine = create_engine_from_settings(
+        async_database_url(settings.DB_READ_URL),
+        pool_size=settings.DB_READ_POOL_SIZE,
+        max_overflow=settings.DB_READ_MAX_OVERFLOW,
+    )
+    ReadSessionLocal = sessionmaker(
+        bind=read_engine,
+        class_=AsyncSession,
+        expire_on_commit=False,
+    )
+    read_pool_metrics = PoolMetrics(read_engine)
+    instrument_engine(read_engine)
+else:
+    read_engine = engine
+    ReadSessionLocal = AsyncSessionLocal
+    read_pool_metrics = None
+
 # Model uchun baza klass
 Base = declarative_base()
 
@@ -37,4 +147,4 @@ async def get_db():
         try:
             yield db
         finally:
-            await db.close()
\ No newline at end of file
+            await db.close()
@@ -6,7 +6,6 @@ Loyihaning asosiy fayli
 import logging
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
 import uvicorn
 import os
 from pathlib import Path
@@ -17,7 +16,17 @@ from fastapi.security import OAuth2PasswordBearer
 from app.api.api import api_router
 from app.core.settings import settings
 from app.database import Base, engine
-from app.core.middleware import LogMiddleware
+from app.core.middleware import BodySizeLimitMiddleware, LogMiddleware
+from app.core.ratelimit import RateLimitMiddleware
+from app.core.events import news_hub
+from app.core.cache import token_versions
+from app.core.media import MediaFiles, media_sweeper
+from app.core.jobs import job_queue
+from app.core.replica import ReadYourWritesMiddleware, replica_router
+from app.core.rollups import stats_rollup
+from app.core.stats import system_stats
+from app.utils.exports import shutdown_export_pool
+from app.utils.images import shutdown_image_pool
 
 # FastAPI ilovasini yaratish
 app = FastAPI(
@@ -37,6 +46,27 @@ async def init_db():
 @app.on_event("startup")
 async def on_startup():
     await init_db()
+    await replica_router.start()
+    await token_versions.start()
+    await news_hub.start()
+    await media_sweeper.start()
+    await system_stats.start()
+    await stats_rollup.start()
+    await job_queue.start()
+
+# Shutdown eventida fon vazifalarini to'xtatish
+@app.on_event("shutdown")
+async def on_shutdown():
+    # Navbatdagi vazifalar rasm puli va DB ga muhtoj, shuning uchun birinchi to'xtatiladi
+    await job_queue.stop()
+    await media_sweeper.stop()
+    await system_stats.stop()
+    await stats_rollup.stop()
+    await news_hub.stop()
+    await token_versions.stop()
+    await replica_router.stop()
+    shutdown_image_pool()
+    shutdown_export_pool()
 
 def custom_openapi():
     """Custom OpenAPI sxemasi"""
@@ -68,6 +98,15 @@ def custom_openapi():
 
 app.openapi = custom_openapi
 
+# Yozgan foydalanuvchini qisqa vaqt primary dan o'qitish (replika sozlangan bo'lsa)
+app.add_middleware(ReadYourWritesMiddleware)
+
+# Multipart so'rovlar hajmini cheklash
+app.add_middleware(BodySizeLimitMiddleware)
+
+# Rate limiting va load shedding (CORS ichida, 429/503 javoblari ham CORS headerlarini oladi)
+app.add_middleware(RateLimitMiddleware)
+
 # CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -81,9 +120,12 @@ app.add_middleware(
 app.add_middleware(LogMiddleware)
 
 # Static va media fayllar uchun mounting
-app.mount("/static", StaticFiles(directory=settings.STATIC_DIR), name="static")
-app.mount("/media", StaticFiles(directory=settings.MEDIA_ROOT), name="media")
-app.mount("/uploads", StaticFiles(directory=settings.UPLOAD_DIR), name="uploads")
+app.mount("/static", MediaFiles(
+    directory=settings.STATIC_DIR, accel_location=f"{settings.MEDIA_ACCEL_PREFIX}/static/"), name="static")
+app.mount("/media", MediaFiles(
+    directory=settings.MEDIA_ROOT, accel_location=f"{settings.MEDIA_ACCEL_PREFIX}/media/"), name="media")
+app.mount("/uploads", MediaFiles(
+    directory=settings.UPLOAD_DIR, accel_location=f"{settings.MEDIA_ACCEL_PREFIX}/media/uploads/"), name="uploads")
 
 # API routerlarini qo'shish
 app.include_router(api_router, prefix=settings.API_V1_STR)
@@ -1,11 +1,19 @@
 from django.db.models.fields import PositiveIntegerField
-from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Boolean, Float, UniqueConstraint
+from sqlalchemy import (
+    DDL, Column, Integer, BigInteger, String, Text, Date, DateTime, ForeignKey, Boolean, Float, Index, Sequence,
+    UniqueConstraint, event, inspect,
+)
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 import datetime
 
+from app.core.settings import settings
 from app.database import Base
 
+# Strict rejimda selectinload/joinedload siz relationship o'qish xato beradi
+RELATIONSHIP_LAZY = "raise" if settings.DB_STRICT_LAZY_LOADS else "select"
+
 
 class User(Base):
 
@@ -19,7 +27,7 @@ class User(Base):
     updated = Column(DateTime, default=func.now(), onupdate=func.now())
 
     # Django modelida foreign key qanday nomlangan bo'lsa, relationship ham shunga mos bo'lishi kerak
-    feedbacks = relationship("Feedback", back_populates="user")
+    feedbacks = relationship("Feedback", back_populates="user", lazy=RELATIONSHIP_LAZY)
 
     def __str__(self):
         return self.name or self.telegram_id
@@ -51,7 +59,7 @@ class Worker(Base):
     aliment_payer_code = Column(String(255), nullable = True)
 
     # Django modelida foreign key qanday nomlangan bo'lsa, relationship ham shunga mos bo'lishi kerak
-    feedbacks = relationship("Feedback", back_populates="worker")
+    feedbacks = relationship("Feedback", back_populates="worker", lazy=RELATIONSHIP_LAZY)
 
     
     def get_languages_list(self):
@@ -105,11 +113,15 @@ class Feedback(Base):
     create_at = Column(DateTime, default=func.now())
     update_at = Column(DateTime, default=func.now(), onupdate=func.now())
 
-    worker = relationship("Worker", back_populates="feedbacks")
-    user = relationship("User", back_populates="feedbacks")
+    worker = relationship("Worker", back_populates="feedbacks", lazy=RELATIONSHIP_LAZY)
+    user = relationship("User", back_populates="feedbacks", lazy=RELATIONSHIP_LAZY)
 
     def __str__(self):
-        return f"{self.worker.name} - {self.user.name} - {self.rate}"
+        # Yuklanmagan relationship lar uchun so'rov yubormasdan id ko'rsatiladi
+        unloaded = inspect(self).unloaded
+        worker = self.worker_id if "worker" in unloaded or self.worker is None else self.worker.name
+        user = self.user_id if "user" in unloaded or self.user is None else self.user.name
+        return f"{worker} - {user} - {self.rate}"
 
 class Skills(Base):
     __tablename__ = "workers_skills"  # Django jadval nomi
@@ -137,5 +149,196 @@ class NewsView(Base):
     news_id = Column(Integer, ForeignKey("workers_news.id", ondelete="CASCADE"))
     created_at = Column(DateTime, default=func.now())
 
-    user = relationship("User")
-    news = relationship("News")
\ No newline at end of file
+    user = relationship("User", lazy=RELATIONSHIP_LAZY)
+    news = relationship("News", lazy=RELATIONSHIP_LAZY)
+
+class TokenVersion(Base):
+    """
+    Foydalanuvchi tokenlari versiyasi (faqat FastAPI uchun jadval)
+
+    Versiya oshirilganda undan oldin berilgan barcha tokenlar bekor bo'ladi
+    """
+    __tablename__ = "api_user_token_version"
+
+    user_id = Column(Integer, primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, default=func.now(), onupdate=func.now())
+
+
+class BackgroundJob(Base):
+    """
+    Fon vazifalari navbati (faqat FastAPI uchun jadval)
+
+    Vazifa bajarilgach o'chiriladi; `locked_until` bajarayotgan jarayonning
+    ijarasi, u o'tib ketsa vazifani boshqa jarayon qayta oladi. `host` berilgan
+    vazifalarni (masalan lokal spool fayliga bog'liq) faqat shu hostdagi
+    jarayonlar bajaradi.
+    """
+    __tablename__ = "api_background_job"
+
+    id = Column(BigInteger, primary_key=True)
+    name = Column(String(100), nullable=False)
+    payload = Column(JSONB, nullable=False)
+    attempts = Column(Integer, nullable=False, default=0)
+    run_at = Column(DateTime, nullable=False, default=func.now(), index=True)
+    locked_until = Column(DateTime, nullable=True)
+    host = Column(String(255), nullable=True)
+    failed_at = Column(DateTime, nullable=True)
+    last_error = Column(Text, nullable=True)
+    created_at = Column(DateTime, default=func.now())
+
+
+class ExportJob(Base):
+    """
+    Fon rejimidagi eksportlar (faqat FastAPI uchun jadval)
+
+    `fingerprint` - format va filtrlar xeshi: bir xil parametrli eksport
+    bajarilayotgan paytda yangisi yaratilmaydi, so'rov mavjudiga ulanadi.
+    """
+    __tablename__ = "api_export_job"
+
+    id = Column(BigInteger, primary_key=True)
+    fingerprint = Column(String(64), nullable=False, index=True)
+    format = Column(String(10), nullable=False)
+    params = Column(JSONB, nullable=False)
+    status = Column(String(20), nullable=False, default="pending")  # pending, running, done, failed
+    rows = Column(Integer, nullable=False, default=0)  # yozilgan qatorlar
+    total = Column(Integer, nullable=True)
+    file_path = Column(String(255), nullable=True)  # yuklab olish URL i (/media/exports/...)
+    error = Column(Text, nullable=True)
+    created_by = Column(Integer, nullable=True)
+    created_at = Column(DateTime, default=func.now())
+    updated_at = Column(DateTime, default=func.now(), onupdate=func.now())
+    finished_at = Column(DateTime, nullable=True)
+
+
+# Bir xil parametrli faol eksport faqat bitta bo'lishi mumkin
+Index(
+    "api_export_job_active_fingerprint",
+    ExportJob.fingerprint,
+    unique=True,
+    postgresql_where=ExportJob.status.in_(("pending", "running")),
+)
+
+
+class WorkerChangeLog(Base):
+    """
+    Ishchilar o'zgarishlari jurnali (faqat FastAPI uchun jadval)
+
+    Qatorlarni workers_worker dagi trigger yozadi, shuning uchun Django admin,
+    import va to'g'ridan-to'g'ri SQL o'zgarishlari ham tushadi. `seq` o'sib
+    boruvchi tartib raqami, `txid` esa yozgan tranzaksiya. seq commit tartibiga
+    mos kelmaydi, shuning uchun feed (txid, seq) bo'yicha tartiblanadi va hali
+    tugamagan tranzaksiyalardan keyingi qatorlarni ushlab turadi.
+    """
+    __tablename__ = "api_worker_change"
+    __table_args__ = (
+        Index("api_worker_change_txid_seq", "txid", "seq"),
+    )
+
+    seq = Column(BigInteger, primary_key=True)
+    worker_id = Column(Integer, nullable=False)
+    op = Column(String(10), nullable=False)  # upsert, delete
+    txid = Column(BigInteger, nullable=False, server_default=func.txid_current())
+    created_at = Column(DateTime, server_default=func.now())
+
+
+# Statement darajasidagi triggerlar: ommaviy import/UPDATE da har qator uchun alohida chaqiruv bo'lmaydi
+WORKER_CHANGE_FUNCTION = DDL("""
+CREATE OR REPLACE FUNCTION api_log_worker_changes() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        INSERT INTO api_worker_change (worker_id, op) SELECT id, 'upsert' FROM new_rows ORDER BY id;
+    ELSIF TG_OP = 'UPDATE' THEN
+        INSERT INTO api_worker_change (worker_id, op)
+        SELECT n.id, 'upsert' FROM new_rows n JOIN old_rows o ON o.id = n.id
+        WHERE n IS DISTINCT FROM o
+        ORDER BY n.id;
+    ELSE
+        INSERT INTO api_worker_change (worker_id, op) SELECT id, 'delete' FROM old_rows ORDER BY id;
+    END IF;
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql
+""")
+
+# Birinchi o'rnatishda mavjud ishchilar ham jurnalga yoziladi: since=0 to'liq katalogni beradi
+WORKER_CHANGE_TRIGGERS = DDL("""
+DO $$
+BEGIN
+    IF NOT EXISTS (SELECT 1 FROM pg_trigger WHERE tgname = 'api_worker_change_insert') THEN
+        CREATE TRIGGER api_worker_change_insert AFTER INSERT ON workers_worker
+            REFERENCING NEW TABLE AS new_rows
+            FOR EACH STATEMENT EXECUTE PROCEDURE api_log_worker_changes();
+        CREATE TRIGGER api_worker_change_update AFTER UPDATE ON workers_worker
+            REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+            FOR EACH STATEMENT EXECUTE PROCEDURE api_log_worker_changes();
+        CREATE TRIGGER api_worker_change_delete AFTER DELETE ON workers_worker
+            REFERENCING OLD TABLE AS old_rows
+            FOR EACH STATEMENT EXECUTE PROCEDURE api_log_worker_changes();
+        INSERT INTO api_worker_change (worker_id, op) SELECT id, 'upsert' FROM workers_worker ORDER BY id;
+    END IF;
+EXCEPTION WHEN duplicate_object THEN
+    NULL;  -- boshqa jarayon parallel o'rnatdi
+END
+$$
+""")
+
+# create_all dan keyin (workers_worker ham mavjud bo'lganda) o'rnatiladi
+event.listen(Base.metadata, "after_create", WORKER_CHANGE_FUNCTION.execute_if(dialect="postgresql"))
+event.listen(Base.metadata, "after_create", WORKER_CHANGE_TRIGGERS.execute_if(dialect="postgresql"))
+
+
+class WorkerImageUpload(Base):
+    """
+    Ishchiga oxirgi biriktirilgan rasm yuklanishining tartib raqami (faqat FastAPI uchun jadval)
+
+    Har bir yuklanish WORKER_IMAGE_UPLOAD_SEQ dan raqam oladi; fon vazifasi
+    rasmni faqat o'z raqami saqlangandan katta bo'lsa biriktiradi, shuning
+    uchun kechikkan (yoki qayta uringan) eski yuklanish yangisini almashtirmaydi.
+    """
+    __tablename__ = "api_worker_image_upload"
+
+    worker_id = Column(Integer, primary_key=True)
+    upload_seq = Column(BigInteger, nullable=False)
+    updated_at = Column(DateTime, default=func.now(), onupdate=func.now())
+
+
+WORKER_IMAGE_UPLOAD_SEQ = Sequence("api_worker_image_upload_seq", metadata=Base.metadata)
+
+
+class StatsDaily(Base):
+    """Kunlik rollup: metrika bo'yicha shu kuni yaratilgan qatorlar soni (faqat FastAPI uchun jadval)"""
+    __tablename__ = "api_stats_daily"
+
+    metric = Column(String(32), primary_key=True)
+    day = Column(Date, primary_key=True)
+    count = Column(Integer, nullable=False, default=0)
+
+
+class StatsHourly(Base):
+    """Soatlik rollup, faqat oxirgi kunlar uchun saqlanadi (faqat FastAPI uchun jadval)"""
+    __tablename__ = "api_stats_hourly"
+
+    metric = Column(String(32), primary_key=True)
+    hour = Column(DateTime, primary_key=True)
+    count = Column(Integer, nullable=False, default=0)
+
+
+class StatsWatermark(Base):
+    """
+    Rollup qaysi qatorgacha hisoblangani (faqat FastAPI uchun jadval)
+
+    `last_id` - manba jadvalda hisoblangan oxirgi id; keyingi ishga tushishda
+    faqat undan kattalari o'qiladi. `pending_id` - keyingi partiya chegarasi:
+    u o'qilgan snapshot dagi barcha tranzaksiyalar (txid < `pending_xmax`)
+    tugagandan keyin hisoblanadi, shunda kichikroq id li kech commit bo'lgan
+    qatorlar o'tkazib yuborilmaydi.
+    """
+    __tablename__ = "api_stats_watermark"
+
+    metric = Column(String(32), primary_key=True)
+    last_id = Column(BigInteger, nullable=False, default=0)
+    pending_id = Column(BigInteger, nullable=True)
+    pending_xmax = Column(BigInteger, nullable=True)
+    updated_at = Column(DateTime, default=func.now(), onupdate=func.now())
@@ -49,11 +49,17 @@ class WorkerSimpleSchema(BaseModel):
     skills: List[str]
     languages: List[str]
     image: Optional[str] = None
+    image_thumb: Optional[str] = None  # Ro'yxatlar uchun kichik WebP varianti
 
     class Config:
         orm_mode = True
 
 
+class UserBatchRequest(BaseModel):
+    """Bir nechta foydalanuvchini telegram_id bo'yicha olish"""
+    telegram_ids: List[str]
+
+
 # Worker schemas
 class WorkerBase(BaseModel):
     """Worker uchun asosiy ma'lumotlar"""
@@ -235,6 +241,18 @@ class TokenPayload(BaseModel):
     """Token payload"""
     sub: Optional[str] = None
     exp: Optional[int] = None
+    uid: Optional[int] = None  # User ID
+    wrk: bool = False  # is_worker
+    nam: Optional[str] = None  # User nomi
+    ver: int = 0  # Token versiyasi (bekor qilish uchun)
+
+
+class TokenClaims(BaseModel):
+    """Bazaga murojaat qilmasdan tokendan olingan joriy foydalanuvchi"""
+    id: int
+    telegram_id: str
+    is_worker: bool = False
+    name: Optional[str] = None
 
 
 # Search schemas
@@ -252,6 +270,50 @@ class WorkerSearchParams(BaseModel):
     distance: Optional[float] = None  # km hisobida
 
 
+class WorkerImportError(BaseModel):
+    """Import qilinmagan qator (row - fayldagi qator raqami)"""
+    row: int
+    errors: List[str]
+
+
+class WorkerImportResult(BaseModel):
+    """Ishchilarni ommaviy import qilish natijasi"""
+    total: int
+    inserted: int
+    updated: int
+    failed: int
+    errors: List[WorkerImportError]
+
+
+class WorkerChange(BaseModel):
+    """Feed yozuvi: op=upsert da ishchining joriy holati, op=delete da worker=None"""
+    seq: int
+    op: str
+    worker_id: int
+    worker: Optional[WorkerInDBBase] = None
+
+
+class WorkerChangeFeed(BaseModel):
+    """Keyingi sahifa uchun since=next_since yuboriladi ("<txid>-<seq>" kursor)"""
+    changes: List[WorkerChange]
+    next_since: str
+    has_more: bool
+
+
+class ExportJobStatus(BaseModel):
+    """Fon rejimidagi eksport holati (download_url faqat status=done bo'lganda)"""
+    id: int
+    format: str
+    status: str
+    rows: int
+    total: Optional[int] = None
+    progress: Optional[float] = None  # foizda
+    download_url: Optional[str] = None
+    error: Optional[str] = None
+    created_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+
 # Statistics schemas
 class WorkerStats(BaseModel):
     """Worker statistikasi"""
@@ -0,0 +1,278 @@
+"""
+Ishchilar eksporti
+
+Eksport ustunlari, XLSX yozuvchisi va CSV/NDJSON oqimi.
+
+XLSX openpyxl write-only rejimida vaqtinchalik faylga yoziladi (yozish metodlari
+bloklovchi, ular threadda chaqiriladi). CSV va NDJSON esa server-side cursor
+partiyalaridan to'g'ridan-to'g'ri javobga (kerak bo'lsa gzip bilan) oqadi.
+Ikkala holatda ham xotira qatorlar soniga bog'liq emas.
+
+Fon rejimidagi eksportlar (POST /utils/exports) run_worker_export orqali
+alohida jarayonda faylga yoziladi va progress api_export_job ga yoziladi.
+"""
+import asyncio
+import csv
+import hashlib
+import io
+import json
+import multiprocessing
+import os
+import time
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, datetime
+from typing import Any, AsyncIterator, Dict, Iterable, List, Optional, Sequence
+
+import openpyxl
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Font
+from openpyxl.utils import get_column_letter
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
+
+from app.core.settings import settings
+from app.crud import export as export_crud
+from app.crud import worker as worker_crud
+from app.database import AsyncSessionLocal, create_engine_from_settings
+from app.models.models import Worker
+
+
+def _isoformat(value: Any) -> str:
+    return value.isoformat() if value else ""
+
+
+def _yes_no(value: Any) -> str:
+    return "Ha" if value else "Yo'q"
+
+
+# (ustun nomi, maydon, formatlovchi)
+WORKER_EXPORT_COLUMNS = (
+    ("ID", Worker.id, None),
+    ("Telegram ID", Worker.telegram_id, None),
+    ("Ism", Worker.name, None),
+    ("Haqida", Worker.about, None),
+    ("Yosh", Worker.age, None),
+    ("Telefon", Worker.phone, None),
+    ("Jinsi", Worker.gender, None),
+    ("To'lov turi", Worker.payment_type, None),
+    ("Kunlik to'lov", Worker.daily_payment, None),
+    ("Tillar", Worker.languages, None),
+    ("Ko'nikmalar", Worker.skills, None),
+    ("Manzil", Worker.location, None),
+    ("Nogironlik darajasi", Worker.disability_degree, None),
+    ("Rasm", Worker.image, None),
+    ("Yaratilgan sana", Worker.created_at, _isoformat),
+    ("Yangilangan sana", Worker.updated_at, _isoformat),
+    ("Faol", Worker.is_active, _yes_no),
+)
+WORKER_EXPORT_HEADERS = [title for title, _, _ in WORKER_EXPORT_COLUMNS]
+WORKER_EXPORT_FIELDS = [column for _, column, _ in WORKER_EXPORT_COLUMNS]
+WORKER_EXPORT_KEYS = [column.key for column in WORKER_EXPORT_FIELDS]  # NDJSON kalitlari
+_WORKER_EXPORT_FORMATTERS = [formatter for _, _, formatter in WORKER_EXPORT_COLUMNS]
+
+EXPORT_BATCH_SIZE = 1000  # server-side cursor dan bir martada olinadigan qatorlar
+XLSX_MEDIA_TYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+# format -> (media type, fayl kengaytmasi)
+EXPORT_FORMATS = {
+    "xlsx": (XLSX_MEDIA_TYPE, "xlsx"),
+    "csv": ("text/csv; charset=utf-8", "csv"),
+    "ndjson": ("application/x-ndjson", "ndjson"),
+}
+
+
+def worker_export_row(row: Sequence[Any]) -> List[Any]:
+    """DB qatorini eksport qiymatlariga aylantirish (WORKER_EXPORT_COLUMNS tartibida)"""
+    return [
+        formatter(value) if formatter is not None else value
+        for value, formatter in zip(row, _WORKER_EXPORT_FORMATTERS)
+    ]
+
+
+def export_params(filters: Dict[str, Any], is_active: Optional[bool]) -> Dict[str, Any]:
+    """build_worker_filters parametrlari: ro'yxatlar tartiblangan, bo'shlari tashlab yuborilgan"""
+    params = {"is_active": is_active}
+    for key, value in filters.items():
+        if isinstance(value, list):
+            if value:
+                params[key] = sorted(value)
+        elif value is not None:
+            params[key] = value
+    return params
+
+
+def export_fingerprint(export_format: str, params: Dict[str, Any], user_id: int) -> str:
+    """Bir foydalanuvchining bir xil eksport so'rovlarini aniqlash uchun xesh"""
+    raw = json.dumps(
+        {"format": export_format, "params": params, "user": user_id}, sort_keys=True, ensure_ascii=False
+    )
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f"{type(value).__name__} JSON ga aylantirilmaydi")
+
+
+def encode_csv_rows(rows: Iterable[Sequence[Any]], header: bool = False) -> bytes:
+    """Partiyani CSV qatorlariga aylantirish (ustunlar XLSX bilan bir xil)"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if header:
+        writer.writerow(WORKER_EXPORT_HEADERS)
+    writer.writerows(map(worker_export_row, rows))
+    return buffer.getvalue().encode("utf-8")
+
+
+def encode_ndjson_rows(rows: Iterable[Sequence[Any]]) -> bytes:
+    """Partiyani NDJSON ga aylantirish: har qatorda bitta {maydon: qiymat} obyekt"""
+    return "".join(
+        json.dumps(dict(zip(WORKER_EXPORT_KEYS, row)), ensure_ascii=False, default=_json_default) + "\n"
+        for row in rows
+    ).encode("utf-8")
+
+
+async def iter_worker_export(
+        export_format: str, criteria: Sequence[Any], compress: bool = False, sessions: sessionmaker = AsyncSessionLocal
+) -> AsyncIterator[bytes]:
+    """
+    Ishchilarni CSV yoki NDJSON ko'rinishida bo'laklab berish
+
+    Sessiya generator ichida ochiladi: StreamingResponse body si endpoint
+    dependency lari yopilgandan keyin o'qiladi. compress=True bo'lsa har bir
+    partiya bitta gzip oqimiga siqiladi (Content-Encoding: gzip).
+    """
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS) if compress else None
+    first = True
+    async with sessions() as db:
+        async for rows in worker_crud.stream_worker_rows(db, WORKER_EXPORT_FIELDS, EXPORT_BATCH_SIZE, *criteria):
+            if export_format == "csv":
+                chunk = encode_csv_rows(rows, header=first)
+            else:
+                chunk = encode_ndjson_rows(rows)
+            first = False
+            if compressor is not None:
+                chunk = compressor.compress(chunk)
+            if chunk:
+                yield chunk
+    if export_format == "csv" and first:
+        # Bo'sh natija ham sarlavhali CSV bo'lib qaytadi
+        chunk = encode_csv_rows((), header=True)
+        yield compressor.compress(chunk) if compressor is not None else chunk
+    if compressor is not None:
+        yield compressor.flush()
+
+
+class XlsxExportWriter:
+    """openpyxl write-only varag'iga qatorlarni bo'lib-bo'lib yozish"""
+
+    def __init__(self, title: str, headers: List[str], column_width: int = 15):
+        self.workbook = openpyxl.Workbook(write_only=True)
+        self.worksheet = self.workbook.create_sheet(title)
+        for col_num in range(1, len(headers) + 1):
+            self.worksheet.column_dimensions[get_column_letter(col_num)].width = column_width
+
+        header_cells = []
+        for header in headers:
+            cell = WriteOnlyCell(self.worksheet, value=header)
+            cell.font = Font(bold=True)
+            header_cells.append(cell)
+        self.worksheet.append(header_cells)
+
+    def append_rows(self, rows: Iterable[Sequence[Any]]) -> None:
+        for row in rows:
+            self.worksheet.append(row)
+
+    def save(self, path: str) -> None:
+        self.workbook.save(path)
+
+
+_pool: Optional[ProcessPoolExecutor] = None
+
+
+def get_export_pool() -> ProcessPoolExecutor:
+    global _pool
+    if _pool is None:
+        _pool = ProcessPoolExecutor(
+            max_workers=settings.EXPORT_PROCESS_WORKERS,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+    return _pool
+
+
+def shutdown_export_pool() -> None:
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=True)
+        _pool = None
+
+
+async def _write_worker_export(
+        export_id: int, export_format: str, params: Dict[str, Any], path: str, progress_interval: float
+) -> int:
+    # Jarayonning o'z engine i: ota jarayon ulanishlari boshqa event loopga tegishli
+    engine = create_engine_from_settings(poolclass=NullPool)
+    sessions = sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
+    criteria = worker_crud.build_worker_filters(**params)
+    written = 0
+    try:
+        # Progress alohida sessiyada: cursor tranzaksiyasi tugaguncha ko'rinmay qolmasligi uchun
+        async with sessions() as db, sessions() as progress_db:
+            total = await worker_crud.count_workers(db, *criteria)
+            await export_crud.update_export_progress(progress_db, export_id, 0, total)
+
+            if export_format == "xlsx":
+                writer = XlsxExportWriter("Ishchilar", WORKER_EXPORT_HEADERS)
+                out = None
+            else:
+                writer = None
+                out = open(path, "wb")
+            try:
+                reported_at = time.monotonic()
+                async for rows in worker_crud.stream_worker_rows(db, WORKER_EXPORT_FIELDS, EXPORT_BATCH_SIZE, *criteria):
+                    if writer is not None:
+                        writer.append_rows(map(worker_export_row, rows))
+                    elif export_format == "csv":
+                        out.write(encode_csv_rows(rows, header=written == 0))
+                    else:
+                        out.write(encode_ndjson_rows(rows))
+                    written += len(rows)
+                    if time.monotonic() - reported_at >= progress_interval:
+                        await export_crud.update_export_progress(progress_db, export_id, written)
+                        reported_at = time.monotonic()
+                if export_format == "csv" and written == 0:
+                    out.write(encode_csv_rows((), header=True))
+            finally:
+                if out is not None:
+                    out.close()
+            if writer is not None:
+                writer.save(path)
+    finally:
+        await engine.dispose()
+    return written
+
+
+def run_worker_export(export_id: int, export_format: str, params: Dict[str, Any], path: str) -> int:
+    """
+    Eksport faylini yozish (ProcessPoolExecutor da bajariladi)
+
+    Fayl avval .part nomi bilan yoziladi, tugagach path ga ko'chiriladi.
+
+    Returns:
+        Yozilgan qatorlar soni
+    """
+    part_path = f"{path}.part"
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    try:
+        written = asyncio.run(_write_worker_export(
+            export_id, export_format, params, part_path, settings.EXPORT_PROGRESS_INTERVAL
+        ))
+        os.replace(part_path, path)
+    except BaseException:
+        if os.path.exists(part_path):
+            os.remove(part_path)
+        raise
+    return written
@@ -1,10 +1,21 @@
 import os
 import shutil
+import hashlib
+import aiofiles
 from fastapi import UploadFile
-from typing import Optional
+from typing import AsyncIterator, Optional, Tuple
 import uuid
 from pathlib import Path
 
+# Yuklanayotgan fayl shu hajmdagi bo'laklar bilan o'qiladi
+UPLOAD_CHUNK_SIZE = 64 * 1024
+# Fayl turini aniqlash uchun saqlanadigan boshlang'ich baytlar
+UPLOAD_HEADER_SIZE = 16
+
+
+class UploadTooLargeError(ValueError):
+    """Yuklangan fayl ruxsat etilgan hajmdan katta"""
+
 
 def save_upload_file(upload_file: UploadFile, destination: str, file_prefix: str = "") -> str:
     """
@@ -39,6 +50,63 @@ def save_upload_file(upload_file: UploadFile, destination: str, file_prefix: str
     return django_path
 
 
+async def stream_upload_file(upload_file: UploadFile, file_path: str, max_size: int) -> Tuple[bytes, str]:
+    """
+    Upload qilingan faylni bo'laklab diskka yozish
+
+    Fayl xotiraga to'liq o'qilmaydi; hajm chegarasi yozish davomida tekshiriladi
+    va oshib ketsa yarim yozilgan fayl o'chiriladi.
+
+    Args:
+        upload_file: FastAPI UploadFile obyekti
+        file_path: Yoziladigan fayl yo'li
+        max_size: Ruxsat etilgan eng katta hajm (bayt)
+
+    Returns:
+        Faylning boshlang'ich baytlari (turini aniqlash uchun) va SHA-256 hex digesti
+    """
+    size = 0
+    header = b""
+    digest = hashlib.sha256()
+    try:
+        async with aiofiles.open(file_path, "wb") as buffer:
+            while True:
+                chunk = await upload_file.read(UPLOAD_CHUNK_SIZE)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if size > max_size:
+                    raise UploadTooLargeError(f"Fayl hajmi {max_size} baytdan oshmasligi kerak")
+                if len(header) < UPLOAD_HEADER_SIZE:
+                    header += chunk[:UPLOAD_HEADER_SIZE - len(header)]
+                digest.update(chunk)
+                await buffer.write(chunk)
+    except BaseException:
+        if os.path.exists(file_path):
+            os.remove(file_path)
+        raise
+
+    return header, digest.hexdigest()
+
+
+async def iter_file(file_path: str, chunk_size: int = UPLOAD_CHUNK_SIZE, remove: bool = False) -> AsyncIterator[bytes]:
+    """
+    Faylni bo'laklab o'qish (StreamingResponse uchun)
+
+    remove=True bo'lsa fayl o'qib bo'lingach (yoki ulanish uzilganda) o'chiriladi
+    """
+    try:
+        async with aiofiles.open(file_path, "rb") as f:
+            while True:
+                chunk = await f.read(chunk_size)
+                if not chunk:
+                    break
+                yield chunk
+    finally:
+        if remove and os.path.exists(file_path):
+            os.remove(file_path)
+
+
 def get_distance(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
     """
     Ikki nuqta orasidagi masofani hisoblash (Haversine formula)
@@ -0,0 +1,181 @@
+"""
+Rasmlarni qayta ishlash
+
+Yuklangan rasmni dekodlash, EXIF ni olib tashlash, orientatsiyani to'g'rilash
+va bir nechta o'lchamdagi variantlarni (WebP va JPEG) yaratish.
+Og'ir ish event loopni bloklamasligi uchun alohida jarayonlar pulida bajariladi.
+"""
+import asyncio
+import multiprocessing
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+from app.core.settings import settings
+
+# Variant fayllari: {basename}_{variant}.{format}
+IMAGE_FORMATS = ("webp", "jpg")
+DEFAULT_VARIANT = "full"
+_VARIANT_RE = re.compile(r"^(?P<prefix>.+)_(?P<variant>[a-z]+)\.(?P<format>webp|jpg)$")
+
+# Kontent-manzilli fayllar: {digest[:2]}/{digest[:32]}_{variant}.{format}
+CONTENT_HASH_LENGTH = 32
+_CONTENT_ADDRESSED_RE = re.compile(r"/[0-9a-f]{2}/[0-9a-f]{32}_[a-z]+\.(?:webp|jpg)$")
+
+# Fayl boshidagi "magic" baytlar -> MIME turi
+_IMAGE_SIGNATURES = (
+    (b"\xff\xd8\xff", "image/jpeg"),
+    (b"\x89PNG\r\n\x1a\n", "image/png"),
+    (b"GIF87a", "image/gif"),
+    (b"GIF89a", "image/gif"),
+)
+
+_pool: Optional[ProcessPoolExecutor] = None
+
+
+class InvalidImageError(ValueError):
+    """Fayl rasm sifatida o'qilmadi"""
+
+
+def sniff_image_type(header: bytes) -> Optional[str]:
+    """Rasm turini mijoz yuborgan content_type emas, fayl baytlari bo'yicha aniqlash"""
+    for signature, content_type in _IMAGE_SIGNATURES:
+        if header.startswith(signature):
+            return content_type
+    if header[:4] == b"RIFF" and header[8:12] == b"WEBP":
+        return "image/webp"
+    return None
+
+
+def process_image(
+    source_path: str,
+    destination: str,
+    basename: str,
+    variants: Dict[str, int],
+    max_pixels: int,
+) -> List[str]:
+    """
+    Rasm variantlarini yaratish (jarayonlar pulida ishlaydi)
+
+    Args:
+        source_path: Yuklangan fayl yo'li
+        destination: Variantlar saqlanadigan papka
+        basename: Fayl nomi asosi (kontent xeshi)
+        variants: Variant nomi -> eng katta tomon (px)
+        max_pixels: Dekompressiya bombalariga qarshi piksellar chegarasi
+
+    Returns:
+        Yaratilgan fayllar nomlari
+    """
+    from PIL import Image, ImageOps, UnidentifiedImageError
+
+    Image.MAX_IMAGE_PIXELS = max_pixels
+    try:
+        with Image.open(source_path) as original:
+            original.load()
+            # EXIF dagi orientatsiyani qo'llash; EXIF ning o'zi saqlanmaydi
+            image = ImageOps.exif_transpose(original)
+    except (UnidentifiedImageError, Image.DecompressionBombError, OSError) as e:
+        raise InvalidImageError(str(e))
+
+    # Shaffof rasmlar JPEG uchun oq fonga joylashtiriladi
+    if image.mode in ("RGBA", "LA", "P"):
+        rgba = image.convert("RGBA")
+        image = Image.new("RGB", rgba.size, (255, 255, 255))
+        image.paste(rgba, mask=rgba.getchannel("A"))
+    elif image.mode != "RGB":
+        image = image.convert("RGB")
+
+    os.makedirs(destination, exist_ok=True)
+    written = []
+    for variant, size in variants.items():
+        resized = image.copy()
+        resized.thumbnail((size, size), Image.LANCZOS)
+        for image_format in IMAGE_FORMATS:
+            filename = f"{basename}_{variant}.{image_format}"
+            file_path = os.path.join(destination, filename)
+            tmp_path = f"{file_path}.tmp"
+            if image_format == "webp":
+                resized.save(tmp_path, "WEBP", quality=settings.IMAGE_WEBP_QUALITY, method=4)
+            else:
+                resized.save(tmp_path, "JPEG", quality=settings.IMAGE_JPEG_QUALITY, optimize=True, progressive=True)
+            # O'quvchilar yarim yozilgan faylni ko'rmasligi uchun
+            os.replace(tmp_path, file_path)
+            written.append(filename)
+    return written
+
+
+def get_image_pool() -> ProcessPoolExecutor:
+    global _pool
+    if _pool is None:
+        _pool = ProcessPoolExecutor(
+            max_workers=settings.IMAGE_PROCESS_WORKERS,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+    return _pool
+
+
+def shutdown_image_pool() -> None:
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=True)
+        _pool = None
+
+
+async def create_image_variants(source_path: str, destination: str, basename: str) -> List[str]:
+    """process_image ni event loopdan tashqarida bajarish"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        get_image_pool(),
+        process_image,
+        source_path,
+        destination,
+        basename,
+        dict(settings.IMAGE_VARIANTS),
+        settings.IMAGE_MAX_PIXELS,
+    )
+
+
+def content_image_location(digest: str) -> Tuple[str, str]:
+    """
+    Yuklangan fayl SHA-256 digesti bo'yicha variantlar papkasi (WORKER_IMAGES_DIR ga nisbatan)
+    va fayl nomi asosi. Bir xil rasm doim bir xil nomga tushadi.
+    """
+    basename = digest[:CONTENT_HASH_LENGTH]
+    return basename[:2], basename
+
+
+def is_content_addressed(path: str) -> bool:
+    """Fayl nomi kontent xeshidan olinganmi (ya'ni fayl hech qachon o'zgarmaydimi)"""
+    return bool(_CONTENT_ADDRESSED_RE.search(path))
+
+
+def image_variant_url(image: Optional[str], variant: str = "thumb", image_format: str = "webp") -> Optional[str]:
+    """
+    Saqlangan rasm yo'lidan kerakli variant yo'lini olish
+
+    Variantlari bo'lmagan eski rasmlar uchun asl yo'l qaytariladi
+    """
+    if not image:
+        return None
+    match = _VARIANT_RE.match(image)
+    if not match or match.group("variant") not in settings.IMAGE_VARIANTS:
+        return image
+    return f"{match.group('prefix')}_{variant}.{image_format}"
+
+
+def image_file_paths(image: Optional[str]) -> List[str]:
+    """Rasm yo'liga tegishli barcha fayllar (variantlar bilan) diskdagi yo'llari"""
+    if not image:
+        return []
+    match = _VARIANT_RE.match(image)
+    if not match:
+        paths = [image]
+    else:
+        paths = [
+            f"{match.group('prefix')}_{variant}.{image_format}"
+            for variant in settings.IMAGE_VARIANTS
+            for image_format in IMAGE_FORMATS
+        ]
+    return [os.path.join(settings.BASE_DIR, path.lstrip("/")) for path in paths]
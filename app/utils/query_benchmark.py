@@ -0,0 +1,98 @@
+"""
+Tez-tez chaqiriladigan CRUD so'rovlari uchun mikro-benchmark
+
+Oddiy select(...).where(...) bilan lambda_stmt ni solishtiradi:
+  build   - statement qurish va SQL cache kalitini hisoblash (faqat Python, bazasiz)
+  execute - sessiya orqali to'liq so'rov (asyncpg prepared statement cache bilan)
+
+CLI:
+    python -m app.utils.query_benchmark [-n 5000] [--telegram-id 123] [--no-db]
+"""
+import argparse
+import asyncio
+import time
+from typing import Any, Callable, Dict
+
+from sqlalchemy import lambda_stmt
+from sqlalchemy.future import select
+
+from app.models.models import User, Worker
+
+# nom -> (oddiy statement, lambda statement); ikkalasi ham bitta qiymat oladi
+LOOKUPS: Dict[str, tuple] = {
+    "user_by_telegram_id": (
+        lambda value: select(User).filter(User.telegram_id == value),
+        lambda value: lambda_stmt(lambda: select(User).where(User.telegram_id == value)),
+    ),
+    "worker_by_id": (
+        lambda value: select(Worker).filter(Worker.id == value),
+        lambda value: lambda_stmt(lambda: select(Worker).where(Worker.id == value)),
+    ),
+    "worker_by_telegram_id": (
+        lambda value: select(Worker).filter(Worker.telegram_id == value),
+        lambda value: lambda_stmt(lambda: select(Worker).where(Worker.telegram_id == value)),
+    ),
+    "worker_by_phone": (
+        lambda value: select(Worker).filter(Worker.phone == value),
+        lambda value: lambda_stmt(lambda: select(Worker).where(Worker.phone == value)),
+    ),
+}
+
+
+def _lookup_value(name: str, telegram_id: str) -> Any:
+    if name == "worker_by_id":
+        return 1
+    if name == "worker_by_phone":
+        return "+998900000000"
+    return telegram_id
+
+
+def bench_build(factory: Callable[[Any], Any], value: Any, iterations: int) -> float:
+    """Bitta chaqiruvning o'rtacha vaqti (mikrosekund): statement + cache kaliti"""
+    factory(value)._generate_cache_key()  # birinchi chaqiruv (lambda tahlili) hisobga olinmaydi
+    started = time.perf_counter()
+    for _ in range(iterations):
+        factory(value)._generate_cache_key()
+    return (time.perf_counter() - started) / iterations * 1e6
+
+
+async def bench_execute(factory: Callable[[Any], Any], value: Any, iterations: int) -> float:
+    """Bitta so'rovning o'rtacha vaqti (mikrosekund), bazaga borib-kelish bilan"""
+    from app.database import AsyncSessionLocal
+
+    async with AsyncSessionLocal() as db:
+        (await db.execute(factory(value))).scalars().first()
+        started = time.perf_counter()
+        for _ in range(iterations):
+            (await db.execute(factory(value))).scalars().first()
+            db.expunge_all()
+        return (time.perf_counter() - started) / iterations * 1e6
+
+
+async def _main(iterations: int, telegram_id: str, use_db: bool) -> None:
+    from app.database import engine
+
+    print(f"{'lookup':<24}{'bosqich':<10}{'select':>12}{'lambda':>12}{'farq':>10}")
+    try:
+        for name, (plain, cached) in LOOKUPS.items():
+            value = _lookup_value(name, telegram_id)
+            stages = [("build", bench_build(plain, value, iterations), bench_build(cached, value, iterations))]
+            if use_db:
+                stages.append((
+                    "execute",
+                    await bench_execute(plain, value, iterations),
+                    await bench_execute(cached, value, iterations),
+                ))
+            for stage, plain_us, cached_us in stages:
+                print(f"{name:<24}{stage:<10}{plain_us:>10.1f}us{cached_us:>10.1f}us{plain_us - cached_us:>8.1f}us")
+    finally:
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="CRUD lookup so'rovlari uchun mikro-benchmark")
+    parser.add_argument("-n", "--iterations", type=int, default=5000, help="Har bir o'lchov uchun chaqiruvlar soni")
+    parser.add_argument("--telegram-id", default="0", help="Qidiriladigan telegram_id")
+    parser.add_argument("--no-db", action="store_true", help="Faqat Python qismini o'lchash (bazasiz)")
+    args = parser.parse_args()
+    asyncio.run(_main(args.iterations, args.telegram_id, not args.no_db))
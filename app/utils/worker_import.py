@@ -0,0 +1,252 @@
+"""
+Ishchilarni CSV/XLSX fayldan import qilish
+
+export_workers_excel ning teskarisi: fayl qatorlari oqim ko'rinishida o'qiladi,
+WorkerCreate bilan tekshiriladi va worker_crud.import_workers orqali bitta
+COPY + set-based merge bilan bazaga yoziladi.
+
+CLI:
+    python -m app.utils.worker_import ishchilar.xlsx [--update]
+"""
+import argparse
+import asyncio
+import csv
+import json
+import os
+import zipfile
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import openpyxl
+from openpyxl.utils.exceptions import InvalidFileException
+from pydantic import ValidationError
+
+from app.crud import worker as worker_crud
+from app.crud.worker import WORKER_IMPORT_COLUMNS
+from app.models.models import Worker
+from app.schemas.schemas import WorkerCreate
+
+# Ustun sarlavhasi -> maydon. Eksportdagi sarlavhalar va maydon nomlarining o'zi qabul qilinadi
+IMPORT_HEADERS = {
+    "telegram id": "telegram_id",
+    "ism": "name",
+    "haqida": "about",
+    "yosh": "age",
+    "telefon": "phone",
+    "jinsi": "gender",
+    "to'lov turi": "payment_type",
+    "ish vaqti": "time_type",
+    "kunlik to'lov": "daily_payment",
+    "tillar": "languages",
+    "ko'nikmalar": "skills",
+    "manzil": "location",
+    "nogironlik darajasi": "disability_degree",
+    "aliment to'lovchi": "aliment_payer",
+    "aliment kodi": "aliment_payer_code",
+    "faol": "is_active",
+}
+IMPORT_HEADERS.update({field: field for field in WORKER_IMPORT_COLUMNS})
+
+XLSX_SIGNATURE = b"PK\x03\x04"
+CSV_SNIFF_SIZE = 64 * 1024
+
+_TRUE_VALUES = {"ha", "true", "1", "yes", "+"}
+_FALSE_VALUES = {"yo'q", "yoq", "false", "0", "no", "-"}
+# DB dagi VARCHAR uzunliklari va INTEGER chegarasi: COPY butun faylni bitta qiymat uchun rad etmasligi uchun
+_COLUMN_LENGTHS = {
+    column.name: column.type.length
+    for column in Worker.__table__.columns
+    if column.name in WORKER_IMPORT_COLUMNS and getattr(column.type, "length", None)
+}
+_INT_FIELDS = ("age", "daily_payment")
+_INT_RANGE = (-2 ** 31, 2 ** 31 - 1)
+
+
+class ImportFileError(ValueError):
+    """Fayl formati yoki sarlavhalari noto'g'ri"""
+
+
+def _cell_text(value: Any) -> Optional[str]:
+    if value is None:
+        return None
+    # Excel telefon va telegram ID larni son sifatida saqlaydi (998901234567.0)
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    text = str(value).strip()
+    return text or None
+
+
+def _parse_bool(value: str) -> bool:
+    lowered = value.lower()
+    if lowered in _TRUE_VALUES:
+        return True
+    if lowered in _FALSE_VALUES:
+        return False
+    raise ValueError(f"ha/yo'q qiymati kutilgan: {value!r}")
+
+
+def _map_header(header_row: List[Any]) -> Dict[int, str]:
+    mapping = {}
+    for index, title in enumerate(header_row):
+        field = IMPORT_HEADERS.get((_cell_text(title) or "").lower())
+        if field is not None and field not in mapping.values():
+            mapping[index] = field
+    if "telegram_id" not in mapping.values():
+        raise ImportFileError("Faylda 'Telegram ID' ustuni topilmadi")
+    return mapping
+
+
+def _iter_xlsx(path: str) -> Iterator[List[Any]]:
+    # read_only rejim: varaq xotiraga to'liq yuklanmaydi.
+    # Fayl obyekti beriladi, chunki vaqtinchalik fayl nomida .xlsx qo'shimchasi yo'q
+    with open(path, "rb") as f:
+        workbook = openpyxl.load_workbook(f, read_only=True, data_only=True)
+        try:
+            for row in workbook.worksheets[0].iter_rows(values_only=True):
+                yield list(row)
+        finally:
+            workbook.close()
+
+
+def _iter_csv(path: str) -> Iterator[List[Any]]:
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        sample = f.read(CSV_SNIFF_SIZE)
+        f.seek(0)
+        try:
+            dialect = csv.Sniffer().sniff(sample, delimiters=",;\t")
+        except csv.Error:
+            dialect = csv.excel
+        yield from csv.reader(f, dialect)
+
+
+def iter_import_rows(path: str) -> Iterator[Tuple[int, Dict[str, Optional[str]]]]:
+    """Fayl qatorlarini (qator raqami, {maydon: qiymat}) ko'rinishida o'qish"""
+    with open(path, "rb") as f:
+        is_xlsx = f.read(len(XLSX_SIGNATURE)) == XLSX_SIGNATURE
+    rows = _iter_xlsx(path) if is_xlsx else _iter_csv(path)
+
+    header = next(rows, None)
+    if header is None:
+        raise ImportFileError("Fayl bo'sh")
+    mapping = _map_header(header)
+
+    for row_no, row in enumerate(rows, 2):
+        values = {field: _cell_text(row[index]) for index, field in mapping.items() if index < len(row)}
+        if any(value is not None for value in values.values()):
+            yield row_no, values
+
+
+def validate_row(values: Dict[str, Optional[str]]) -> Tuple[Optional[tuple], List[str]]:
+    """
+    Qatorni WorkerCreate bilan tekshirish
+
+    Returns:
+        (staging jadval uchun qiymatlar yoki None, xatolar)
+    """
+    errors = []
+    data = {field: value for field, value in values.items() if value is not None}
+
+    is_active = None
+    for field in ("aliment_payer", "is_active"):
+        if field in data:
+            try:
+                parsed = _parse_bool(data[field])
+            except ValueError as e:
+                errors.append(f"{field}: {str(e)}")
+                del data[field]
+                continue
+            if field == "is_active":
+                is_active = parsed
+                del data[field]
+            else:
+                data[field] = parsed
+
+    try:
+        worker = WorkerCreate(**data)
+    except ValidationError as e:
+        for error in e.errors():
+            errors.append(f"{'.'.join(str(loc) for loc in error['loc'])}: {error['msg']}")
+        return None, errors
+
+    # Faylda berilmagan maydonlar None bo'lib qoladi (yangilashda eski qiymat saqlanadi)
+    fields = worker.model_dump(exclude_unset=True)
+    fields["is_active"] = is_active
+    for field, max_length in _COLUMN_LENGTHS.items():
+        value = fields.get(field)
+        if value is not None and len(value) > max_length:
+            errors.append(f"{field}: {max_length} belgidan oshmasligi kerak")
+    for field in _INT_FIELDS:
+        value = fields.get(field)
+        if value is not None and not _INT_RANGE[0] <= value <= _INT_RANGE[1]:
+            errors.append(f"{field}: qiymat juda katta")
+    if errors:
+        return None, errors
+    return tuple(map(fields.get, WORKER_IMPORT_COLUMNS)), []
+
+
+def parse_import_file(path: str) -> Tuple[List[tuple], Dict[int, List[str]], int]:
+    """
+    Faylni o'qib, tekshirilgan qatorlarni yig'ish (CPU ishi, threadda chaqiriladi)
+
+    Returns:
+        (staging qatorlari (row_no, ...), {row_no: xatolar}, jami qatorlar soni)
+    """
+    records = []
+    errors = {}
+    total = 0
+    try:
+        for row_no, values in iter_import_rows(path):
+            total += 1
+            record, row_errors = validate_row(values)
+            if row_errors:
+                errors[row_no] = row_errors
+            else:
+                records.append((row_no, *record))
+    except (UnicodeDecodeError, csv.Error, zipfile.BadZipFile, InvalidFileException, KeyError) as e:
+        raise ImportFileError(f"Faylni o'qib bo'lmadi: {str(e)}")
+    return records, errors, total
+
+
+async def import_workers_file(
+        db, path: str, update_existing: bool = False, max_errors: Optional[int] = None
+) -> Dict[str, Any]:
+    """Faylni import qilib, WorkerImportResult ko'rinishidagi hisobotni qaytarish"""
+    records, errors, total = await asyncio.to_thread(parse_import_file, path)
+    inserted = updated = 0
+    if records:
+        inserted, updated, merge_errors = await worker_crud.import_workers(db, records, update_existing)
+        for row_no, error in merge_errors.items():
+            errors.setdefault(row_no, []).append(error)
+
+    report = [{"row": row_no, "errors": errors[row_no]} for row_no in sorted(errors)]
+    return {
+        "total": total,
+        "inserted": inserted,
+        "updated": updated,
+        "failed": len(errors),
+        "errors": report[:max_errors] if max_errors is not None else report,
+    }
+
+
+async def _main(path: str, update_existing: bool) -> Dict[str, Any]:
+    from app.database import AsyncSessionLocal, engine
+
+    try:
+        async with AsyncSessionLocal() as db:
+            return await import_workers_file(db, path, update_existing)
+    finally:
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Ishchilarni CSV/XLSX fayldan import qilish")
+    parser.add_argument("path", help="CSV yoki XLSX fayl")
+    parser.add_argument("--update", action="store_true", help="Mavjud ishchilarni telegram_id bo'yicha yangilash")
+    args = parser.parse_args()
+
+    if not os.path.isfile(args.path):
+        parser.error(f"Fayl topilmadi: {args.path}")
+    try:
+        result = asyncio.run(_main(args.path, args.update))
+    except ImportFileError as e:
+        parser.error(str(e))
+    print(json.dumps(result, ensure_ascii=False, indent=2))
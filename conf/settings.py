@@ -97,6 +97,9 @@ CSRF_TRUSTED_ORIGINS = [
     'https://admin.ishbozor.uz',  # Trust originni qo'shish
 ]
 
+# FastAPI real-time hodisalari uchun PostgreSQL NOTIFY kanali
+NEWS_EVENTS_CHANNEL = 'ishbor_news'
+
 # CSRF so'rovlarini boshqarish
 CSRF_USE_SESSIONS = True  # Seans orqali CSRF tokenlarini saqlash
 # Password validation
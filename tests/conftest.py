@@ -0,0 +1,44 @@
+"""
+Test fixturelari
+
+Testlar sozlamalardagi PostgreSQL bazasida ishlaydi (SQLALCHEMY_DATABASE_URL);
+baza mavjud bo'lmasa DB testlari o'tkazib yuboriladi. Har bir test o'z
+engine ini NullPool bilan oladi: ulanishlar testning event loopiga bog'liq.
+
+Relationshiplar lazy="raise" rejimida yuklanadi (DB_STRICT_LAZY_LOADS):
+endpoint da unutilgan eager load (N+1) testda xatolik beradi.
+"""
+import os
+
+os.environ.setdefault("DB_STRICT_LAZY_LOADS", "true")
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
+
+from app.database import create_engine_from_settings
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture
+async def db_engine():
+    engine = create_engine_from_settings(poolclass=NullPool)
+    try:
+        async with engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+    except Exception as e:
+        await engine.dispose()
+        pytest.skip(f"Baza mavjud emas: {e}")
+    yield engine
+    await engine.dispose()
+
+
+@pytest.fixture
+def sessions(db_engine):
+    return sessionmaker(bind=db_engine, class_=AsyncSession, expire_on_commit=False)
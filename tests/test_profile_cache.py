@@ -0,0 +1,42 @@
+import json
+
+import anyio
+import pytest
+from sqlalchemy import func, select
+
+from app.core.cache import profile_cache
+from app.core.events import PROFILE_CHANGED, NewsHub
+from app.core.settings import settings
+from app.database import engine
+
+pytestmark = pytest.mark.anyio
+
+TEST_TELEGRAM_ID = "pc-031"
+
+
+async def test_admin_profile_notify_invalidates_cache(db_engine):
+    hub = NewsHub(settings.NEWS_EVENTS_CHANNEL, settings.NEWS_STREAM_MAX_PENDING)
+    await hub.start()
+    try:
+        # LISTEN ulanishi ochilguncha kutish (ochilganda cache tozalanadi)
+        profile_cache.set("pc-warmup", {})
+        with anyio.fail_after(10):
+            while profile_cache.get("pc-warmup") is not None:
+                await anyio.sleep(0.05)
+
+        profile_cache.set(TEST_TELEGRAM_ID, {"user": {}, "worker": None})
+        # Django admin (workers/notify.py) yuboradigan hodisa
+        async with db_engine.begin() as conn:
+            await conn.execute(select(func.pg_notify(
+                settings.NEWS_EVENTS_CHANNEL,
+                json.dumps({"type": PROFILE_CHANGED, "telegram_id": TEST_TELEGRAM_ID}),
+            )))
+
+        with anyio.fail_after(10):
+            while profile_cache.get(TEST_TELEGRAM_ID) is not None:
+                await anyio.sleep(0.05)
+    finally:
+        await hub.stop()
+        profile_cache.pop(TEST_TELEGRAM_ID)
+        # hub ilova engine idan foydalanadi: ulanishlar shu event loop ga bog'langan
+        await engine.dispose()
@@ -0,0 +1,77 @@
+import uuid
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import delete
+
+from app.core.settings import settings
+from app.crud import feedback as feedback_crud
+from app.database import AsyncSessionLocal
+from app.main import app
+from app.models import models
+
+
+@pytest.fixture(scope="module")
+def client():
+    limits = settings.RATE_LIMIT_IP_BURST, settings.RATE_LIMIT_USER_BURST
+    settings.RATE_LIMIT_IP_BURST = settings.RATE_LIMIT_USER_BURST = 1000
+    try:
+        with TestClient(app) as client:
+            yield client
+    finally:
+        settings.RATE_LIMIT_IP_BURST, settings.RATE_LIMIT_USER_BURST = limits
+
+
+@pytest.fixture(scope="module")
+def worker(client):
+    telegram_id = f"test-{uuid.uuid4().hex[:16]}"
+    response = client.post(f"/api/v1/users/register?telegram_id={telegram_id}&name=Test&is_worker=true")
+    assert response.status_code == 200
+    headers = {"Authorization": f"Bearer {response.json()['access_token']['access_token']}"}
+
+    response = client.post(
+        "/api/v1/workers/with-image", data={"telegram_id": telegram_id, "name": "Test"}, headers=headers
+    )
+    assert response.status_code == 201
+    worker = response.json()
+    yield worker, headers
+
+    async def cleanup():
+        async with AsyncSessionLocal() as db:
+            await db.execute(delete(models.Feedback).where(models.Feedback.worker_id == worker["id"]))
+            await db.execute(delete(models.Worker).where(models.Worker.id == worker["id"]))
+            await db.execute(delete(models.User).where(models.User.telegram_id == telegram_id))
+            await db.commit()
+
+    client.portal.call(cleanup)
+
+
+def test_strict_mode_enabled():
+    assert settings.DB_STRICT_LAZY_LOADS
+    assert models.RELATIONSHIP_LAZY == "raise"
+
+
+def test_worker_detail_and_feedback_paths(client, worker):
+    worker, headers = worker
+
+    response = client.post(
+        f"/api/v1/feedbacks/?worker_id={worker['id']}&text=Yaxshi&rate=5", headers=headers
+    )
+    assert response.status_code == 201
+
+    response = client.get(f"/api/v1/workers/{worker['id']}")
+    assert response.status_code == 200
+    feedbacks = response.json()["feedbacks"]
+    assert [(fb["rate"], fb["user"]["name"]) for fb in feedbacks] == [(5, "Test")]
+
+    async def load_feedbacks():
+        async with AsyncSessionLocal() as db:
+            user_feedbacks = await feedback_crud.get_user_feedbacks(db, feedbacks[0]["user"]["id"])
+            # __str__ yuklanmagan relationship larga murojaat qilmasligi kerak
+            return [(feedback.id, str(feedback)) for feedback in user_feedbacks]
+
+    user_feedbacks = client.portal.call(load_feedbacks)
+    assert len(user_feedbacks) == 1
+
+    response = client.delete(f"/api/v1/feedbacks/{user_feedbacks[0][0]}", headers=headers)
+    assert response.status_code == 200
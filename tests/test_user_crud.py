@@ -0,0 +1,48 @@
+import asyncio
+import uuid
+
+import pytest
+from sqlalchemy import delete, insert
+
+from app.crud import user as user_crud
+from app.models.models import User
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+async def telegram_id(sessions):
+    telegram_id = f"test-{uuid.uuid4().hex[:16]}"
+    yield telegram_id
+    async with sessions() as db:
+        await db.execute(delete(User).where(User.telegram_id == telegram_id))
+        await db.commit()
+
+
+async def test_get_or_create_user_concurrent(sessions, telegram_id):
+    async def register():
+        async with sessions() as db:
+            return await user_crud.get_or_create_user(db, telegram_id, name="test")
+
+    rows = await asyncio.gather(register(), register())
+
+    assert sorted(row.created for row in rows) == [False, True]
+    assert rows[0].id == rows[1].id
+
+
+async def test_get_or_create_user_waits_for_conflicting_insert(sessions, telegram_id):
+    # Boshqa tranzaksiya qatorni qo'shgan, lekin hali commit qilmagan:
+    # bizning INSERT ... ON CONFLICT uni kutadi va SELECT qismi eski snapshot da qoladi
+    async with sessions() as other:
+        await other.execute(insert(User).values(telegram_id=telegram_id, name="other", is_worker=False))
+
+        async with sessions() as db:
+            task = asyncio.create_task(user_crud.get_or_create_user(db, telegram_id, name="test"))
+            await asyncio.sleep(0.3)
+            assert not task.done()
+            await other.commit()
+            row = await asyncio.wait_for(task, timeout=10)
+
+    assert row is not None
+    assert row.created is False
+    assert row.name == "other"
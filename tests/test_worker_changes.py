@@ -0,0 +1,48 @@
+import pytest
+from sqlalchemy import delete, insert, select, text
+
+from app.crud import worker as worker_crud
+from app.models.models import WorkerChangeLog
+
+pytestmark = pytest.mark.anyio
+
+TEST_WORKER_ID = -43  # mavjud bo'lmagan ishchi: feed da tombstone bo'lib keladi
+
+
+async def _test_changes(db, cursor):
+    rows = await worker_crud.get_worker_changes(db, cursor, 10000)
+    return [row for row in rows if row.worker_id == TEST_WORKER_ID], (rows[-1].txid, rows[-1].seq) if rows else cursor
+
+
+async def test_change_feed_does_not_skip_lower_seq_committed_later(sessions):
+    async with sessions() as reader:
+        last = (await reader.execute(
+            select(WorkerChangeLog.txid, WorkerChangeLog.seq)
+            .order_by(WorkerChangeLog.txid.desc(), WorkerChangeLog.seq.desc())
+            .limit(1)
+        )).first()
+        await reader.rollback()
+    cursor = tuple(last) if last else (0, 0)
+
+    try:
+        async with sessions() as older, sessions() as newer:
+            # older tranzaksiya txid ni birinchi oladi, lekin seq ni keyinroq
+            await older.execute(text("SELECT txid_current()"))
+            await newer.execute(insert(WorkerChangeLog).values(worker_id=TEST_WORKER_ID, op="delete"))
+            await older.execute(insert(WorkerChangeLog).values(worker_id=TEST_WORKER_ID, op="delete"))
+            await older.commit()
+
+            async with sessions() as reader:
+                first, cursor = await _test_changes(reader, cursor)
+            assert len(first) == 1
+
+            await newer.commit()
+
+        async with sessions() as reader:
+            second, _ = await _test_changes(reader, cursor)
+        assert len(second) == 1
+        assert second[0].seq < first[0].seq
+    finally:
+        async with sessions() as db:
+            await db.execute(delete(WorkerChangeLog).where(WorkerChangeLog.worker_id == TEST_WORKER_ID))
+            await db.commit()
@@ -0,0 +1,59 @@
+import asyncio
+import uuid
+
+import pytest
+from sqlalchemy import delete, insert, select
+
+from app.crud import worker as worker_crud
+from app.models.models import Worker, WorkerImageUpload
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+async def worker_id(sessions):
+    async with sessions() as db:
+        worker_id = (await db.execute(
+            insert(Worker).values(telegram_id=f"test-{uuid.uuid4().hex[:16]}", image="/old.jpg").returning(Worker.id)
+        )).scalar_one()
+        await db.commit()
+    yield worker_id
+    async with sessions() as db:
+        await db.execute(delete(WorkerImageUpload).where(WorkerImageUpload.worker_id == worker_id))
+        await db.execute(delete(Worker).where(Worker.id == worker_id))
+        await db.commit()
+
+
+async def _image(sessions, worker_id):
+    async with sessions() as db:
+        return (await db.execute(select(Worker.image).where(Worker.id == worker_id))).scalar_one()
+
+
+async def test_older_upload_does_not_replace_newer(sessions, worker_id):
+    async with sessions() as db:
+        older, newer = await worker_crud.next_image_upload_seq(db), await worker_crud.next_image_upload_seq(db)
+
+    async with sessions() as db:
+        assert await worker_crud.apply_worker_image(db, worker_id, "/new.jpg", newer) == (True, True, "/old.jpg")
+    # Eski yuklanishning qayta urinishi keyin bajarildi
+    async with sessions() as db:
+        assert await worker_crud.apply_worker_image(db, worker_id, "/older.jpg", older) == (False, True, None)
+
+    assert await _image(sessions, worker_id) == "/new.jpg"
+
+
+async def test_concurrent_uploads_keep_newest_and_report_each_old_image(sessions, worker_id):
+    async with sessions() as db:
+        seqs = [await worker_crud.next_image_upload_seq(db) for _ in range(2)]
+
+    async def apply(image, seq):
+        async with sessions() as db:
+            return await worker_crud.apply_worker_image(db, worker_id, image, seq)
+
+    results = await asyncio.gather(apply("/a.jpg", seqs[0]), apply("/b.jpg", seqs[1]))
+
+    assert await _image(sessions, worker_id) == "/b.jpg"
+    applied = [result for result in results if result[0]]
+    # Ikkalasi ham biriktirilgan bo'lsa, ikkinchisi birinchisining rasmini eski deb ko'radi
+    if len(applied) == 2:
+        assert sorted(result[2] for result in applied) == ["/a.jpg", "/old.jpg"]
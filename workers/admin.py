@@ -2,18 +2,37 @@ from django.contrib import admin
 
 from .models import User, Worker, Feedback, Skills,News
 from .forms import FeedbackForm
+from .notify import notify_news_created, notify_profile_changed
 
 
+class ProfileNotifyMixin:
+    """FastAPI dagi profil cache ni admin o'zgarishlaridan keyin yangilash"""
+
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        # telegram_id o'zgargan bo'lsa eski qiymat ham o'chiriladi
+        notify_profile_changed(obj.telegram_id, form.initial.get('telegram_id') if change else None)
+
+    def delete_model(self, request, obj):
+        telegram_id = obj.telegram_id
+        super().delete_model(request, obj)
+        notify_profile_changed(telegram_id)
+
+    def delete_queryset(self, request, queryset):
+        telegram_ids = list(queryset.values_list('telegram_id', flat=True))
+        super().delete_queryset(request, queryset)
+        notify_profile_changed(*telegram_ids)
+
 
 @admin.register(User)
-class UserAdmin(admin.ModelAdmin):
+class UserAdmin(ProfileNotifyMixin, admin.ModelAdmin):
     list_display = ('id', 'telegram_id', 'name', 'created', 'updated')
     search_fields = ('telegram_id', 'name')
     ordering = ('-created',)
 
 
 @admin.register(Worker)
-class WorkerAdmin(admin.ModelAdmin):
+class WorkerAdmin(ProfileNotifyMixin, admin.ModelAdmin):
     list_display = ('id', 'telegram_id', 'name', 'phone', 'gender', 'payment_type', 'daily_payment', 'created_at')
     list_filter = ('payment_type', 'gender')
     search_fields = ('telegram_id', 'name', 'phone', 'languages', 'skills')
@@ -50,4 +69,10 @@ class SkillsAdmin(admin.ModelAdmin):
 class NewsAdmin(admin.ModelAdmin):
     list_display = ('name','title', 'count_views')
     search_fields = ('name',)
-    ordering = ('name',)
\ No newline at end of file
+    ordering = ('name',)
+
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        # Yangi yangilik ulangan foydalanuvchilarga real-time yuboriladi
+        if not change:
+            notify_news_created(obj)
\ No newline at end of file
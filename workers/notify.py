@@ -0,0 +1,32 @@
+import json
+
+from django.conf import settings
+from django.db import connection
+
+
+def pg_notify(channel, payload):
+    """
+    PostgreSQL NOTIFY orqali FastAPI jarayonlariga hodisa yuborish.
+    Hodisa joriy tranzaksiya commit bo'lgandan keyin yetkaziladi.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT pg_notify(%s, %s)", [channel, json.dumps(payload)])
+
+
+def notify_news_created(news):
+    pg_notify(settings.NEWS_EVENTS_CHANNEL, {
+        "type": "news_created",
+        "news": {"id": news.id, "name": news.name, "title": news.title},
+    })
+
+
+def notify_profile_changed(*telegram_ids):
+    """
+    Admin user/worker ni o'zgartirganda FastAPI jarayonlaridagi profil
+    cache yozuvlarini o'chirish.
+    """
+    for telegram_id in {t for t in telegram_ids if t}:
+        pg_notify(settings.NEWS_EVENTS_CHANNEL, {
+            "type": "profile_changed",
+            "telegram_id": str(telegram_id),
+        })